@@ -0,0 +1,172 @@
+"""
+Benchmark of the upload/download against simulated devices on a virtual bus
+
+    python benchmarks/bench.py [--eds FILE] [--latency MS] [--nodes N]
+
+The result is printed (or saved with --output) as JSON.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "yacc")
+)
+
+# requirements
+import canopen  # pylint: disable=wrong-import-position
+
+# local module
+from bus import Bus  # pylint: disable=wrong-import-position
+import odcache  # pylint: disable=wrong-import-position
+from simulator import Simulator  # pylint: disable=wrong-import-position
+
+PDO_INDEXES = [0x1400, 0x1600, 0x1800, 0x1A00]
+
+
+def pdo_dcf(source: str, destination: str):
+    """
+    function to save a dcf with only the PDO records of the source one
+    """
+    od = odcache.import_od(source)
+    pdo_od = canopen.ObjectDictionary()
+    pdo_od.node_id = od.node_id
+    pdo_od.bitrate = od.bitrate
+    pdo_od.device_information = od.device_information
+    for obj in od.values():
+        if (obj.index & 0xFF00) in PDO_INDEXES:
+            pdo_od.add_object(obj)
+    canopen.objectdictionary.export_od(pdo_od, destination, "dcf")
+
+
+def run_scenario(name, simulator, bus, operation):
+    """
+    function to run a scenario and to measure it
+    """
+    simulator.reset_counters()
+    entries = {nodeid: 0 for nodeid in bus.devices}
+
+    def progress(nodeid):
+        entries[nodeid] += 1
+
+    start = time.perf_counter()
+    results = operation(progress)
+    wall_time = time.perf_counter() - start
+    errors = {
+        str(nodeid): str(err) for nodeid, err in results.items() if err is not None
+    }
+    total_entries = sum(entries.values())
+    return {
+        "name": name,
+        "entries": total_entries,
+        "sdo_round_trips": sum(simulator.sdo_requests.values()),
+        "wall_time_s": round(wall_time, 4),
+        "entries_per_s": round(total_entries / wall_time, 1) if wall_time else None,
+        "errors": errors,
+    }
+
+
+def main():
+    """
+    Main function
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--eds",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample.eds"),
+    )
+    parser.add_argument(
+        "--latency", type=float, default=1.0, help="SDO response delay [ms]"
+    )
+    parser.add_argument(
+        "--heartbeat", type=int, default=100, help="heartbeat period [ms]"
+    )
+    parser.add_argument("--nodes", type=int, default=1, help="number of nodes")
+    parser.add_argument("--output", default="", help="JSON file for the results")
+    parser.add_argument("--debug", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.debug:
+        logging.basicConfig(level=logging.DEBUG)
+    else:
+        logging.disable(logging.CRITICAL)
+
+    eds = os.path.abspath(args.eds)
+    nodeids = list(range(1, args.nodes + 1))
+    channel = f"yacc-bench-{os.getpid()}"
+    simulator = Simulator(
+        eds,
+        nodeids=nodeids,
+        channel=channel,
+        delay=args.latency / 1000,
+        heartbeat=args.heartbeat,
+    )
+    bus = Bus(nodeids=nodeids, filename=eds, interface="virtual")
+    for device in bus.devices.values():
+        device.set_channel(channel)
+
+    report = {
+        "eds": eds,
+        "latency_ms": args.latency,
+        "heartbeat_ms": args.heartbeat,
+        "nodes": args.nodes,
+        "python": platform.python_version(),
+        "canopen": canopen.__version__,
+        "scenarios": [],
+    }
+    current_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        # the uploaded files and the journals are written in the current folder
+        os.chdir(folder)
+        simulator.start()
+        try:
+            bus.connect()
+            try:
+                report["scenarios"].append(
+                    run_scenario("upload", simulator, bus, lambda p: bus.upload_dcf(p))
+                )
+                uploads = sorted(x for x in os.listdir(folder) if x.endswith(".dcf"))
+                if uploads:
+                    dcf = os.path.join(folder, uploads[0])
+                    report["scenarios"].append(
+                        run_scenario(
+                            "download",
+                            simulator,
+                            bus,
+                            lambda p: bus.download_dcf(dcf, p),
+                        )
+                    )
+                    pdo_file = os.path.join(folder, "pdo.dcf")
+                    pdo_dcf(dcf, pdo_file)
+                    report["scenarios"].append(
+                        run_scenario(
+                            "download_pdo",
+                            simulator,
+                            bus,
+                            lambda p: bus.download_dcf(pdo_file, p),
+                        )
+                    )
+            finally:
+                bus.disconnect()
+        finally:
+            simulator.stop()
+            os.chdir(current_dir)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    failed = any(scenario["errors"] for scenario in report["scenarios"])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
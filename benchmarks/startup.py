@@ -0,0 +1,148 @@
+"""
+Benchmark of the start of the CLI, checked against a start time budget
+
+    python benchmarks/startup.py [--runs N] [--budget MS]
+
+A headless command (e.g. save, default, read) loads the CLI and the device
+module only: the GUI, the progress bars and the other commands must not be
+loaded, and the time to start beyond the one of the CAN stack (canopen and
+python-can, needed by any command talking to a device) must stay within the
+budget. The import times are measured with python -X importtime, the wall
+times include the shared libraries (e.g. Tcl/Tk) loaded on import. The result
+is printed (or saved with --output) as JSON, the exit code is 1 if the budget
+is exceeded.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+YACC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "yacc")
+# modules that a headless command must not load
+HEADLESS_EXCLUDED = [
+    "tkinter",
+    "gui",
+    "tomli_w",
+    "tqdm",
+    "fleet",
+    "simulator",
+    "multiprocessing",
+    "numpy",
+]
+# (name, modules imported by the command before it talks to the device)
+SCENARIOS = [
+    ("version", []),
+    ("headless", ["device"]),
+    # everything, as the CLI did at every start before the lazy imports
+    ("full", ["device", "tkinter", "gui", "tqdm", "bus", "fleet", "simulator"]),
+]
+
+
+def cli_code(modules: list[str]) -> str:
+    """
+    function to get the code importing the CLI and the modules
+    """
+    return f"import sys; sys.path.insert(0, {YACC_DIR!r}); import yacc" + "".join(
+        f"; import {module}" for module in modules
+    )
+
+
+def import_time(code: str) -> tuple[float, str]:
+    """
+    function to get the time [ms] spent importing by the code in a new
+    interpreter, and its output
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    total = 0
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | module, top level not indented
+        fields = line.split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit() and fields[2][1:2] != " ":
+            total += int(fields[1])
+    return total / 1000, result.stdout
+
+
+def wall_time(code: str) -> float:
+    """
+    function to get the time [ms] to start an interpreter, run the code and
+    exit
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    """
+    Main function
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5, help="runs per scenario")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=120.0,
+        help="start time budget of a headless command, beyond the CAN stack [ms]",
+    )
+    parser.add_argument("--output", default="", help="JSON file for the results")
+    args = parser.parse_args()
+
+    report = {
+        "python": platform.python_version(),
+        "budget_ms": args.budget,
+        "scenarios": [],
+    }
+    failed = False
+    can_stack = statistics.median(wall_time("import canopen") for _ in range(args.runs))
+    report["can_stack_ms"] = round(can_stack, 1)
+    for name, modules in SCENARIOS:
+        code = cli_code(modules)
+        try:
+            import_times = [import_time(code)[0] for _ in range(args.runs)]
+            wall_times = [wall_time(code) for _ in range(args.runs)]
+        except subprocess.CalledProcessError as err:
+            # e.g. tkinter missing on a headless machine
+            report["scenarios"].append({"name": name, "error": err.stderr})
+            continue
+        scenario = {
+            "name": name,
+            "import_time_ms": round(statistics.median(import_times), 1),
+            "wall_time_ms": round(statistics.median(wall_times), 1),
+        }
+        if name == "headless":
+            _, output = import_time(
+                code
+                + f"; print([x for x in {HEADLESS_EXCLUDED!r} if x in sys.modules])"
+            )
+            scenario["excluded_loaded"] = json.loads(output.replace("'", '"'))
+            scenario["own_wall_time_ms"] = round(
+                scenario["wall_time_ms"] - can_stack, 1
+            )
+            scenario["within_budget"] = (
+                not scenario["excluded_loaded"]
+                and scenario["own_wall_time_ms"] <= args.budget
+            )
+            failed = not scenario["within_budget"]
+        report["scenarios"].append(scenario)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Fixtures of the tests, run against simulated devices on a python-can virtual bus
+"""
+
+import itertools
+import os
+import struct
+import sys
+import threading
+import types
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "yacc")
+)
+
+# local module
+from device import Device  # pylint: disable=wrong-import-position
+from simulator import Simulator  # pylint: disable=wrong-import-position
+
+SAMPLE_EDS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "sample.eds"
+)
+# a DOMAIN and the program download objects, missing from the sample
+EXTRA_OBJECTS = """
+[3100]
+ParameterName=Trace buffer
+ObjectType=0x7
+DataType=0x000F
+AccessType=rw
+PDOMapping=0
+
+[1F50]
+ParameterName=Program data
+ObjectType=0x8
+SubNumber=2
+
+[1F50sub0]
+ParameterName=Number of entries
+ObjectType=0x7
+DataType=0x0005
+AccessType=ro
+DefaultValue=1
+PDOMapping=0
+
+[1F50sub1]
+ParameterName=Program number 1
+ObjectType=0x7
+DataType=0x000F
+AccessType=rw
+PDOMapping=0
+
+[1F51]
+ParameterName=Program control
+ObjectType=0x8
+SubNumber=2
+
+[1F51sub0]
+ParameterName=Number of entries
+ObjectType=0x7
+DataType=0x0005
+AccessType=ro
+DefaultValue=1
+PDOMapping=0
+
+[1F51sub1]
+ParameterName=Program number 1
+ObjectType=0x7
+DataType=0x0005
+AccessType=rw
+DefaultValue=1
+PDOMapping=0
+
+[1F56]
+ParameterName=Program software identification
+ObjectType=0x8
+SubNumber=2
+
+[1F56sub0]
+ParameterName=Number of entries
+ObjectType=0x7
+DataType=0x0005
+AccessType=ro
+DefaultValue=1
+PDOMapping=0
+
+[1F56sub1]
+ParameterName=Program number 1
+ObjectType=0x7
+DataType=0x0007
+AccessType=ro
+DefaultValue=0x12345678
+PDOMapping=0
+"""
+
+_channels = itertools.count()
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """
+    run in a temporary folder (journals, uploads), with a private cache
+    """
+    monkeypatch.setenv("YACC_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def eds() -> str:
+    """
+    the object dictionary of the simulated nodes, the sample one
+    """
+    return os.path.abspath(SAMPLE_EDS)
+
+
+@pytest.fixture(scope="session")
+def domain_eds(tmp_path_factory) -> str:
+    """
+    the sample object dictionary with the extra objects
+    """
+    path = tmp_path_factory.mktemp("eds") / "sample.eds"
+    with open(SAMPLE_EDS, encoding="utf-8") as f:
+        path.write_text(f.read() + EXTRA_OBJECTS, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def channel() -> str:
+    """
+    a virtual bus of its own for every test
+    """
+    return f"yacc-test-{os.getpid()}-{next(_channels)}"
+
+
+@pytest.fixture
+def simulator(eds, channel):
+    """
+    two simulated nodes, 1 and 2
+    """
+    sim = Simulator(eds, nodeids=[1, 2], channel=channel, heartbeat=50)
+    sim.start()
+    yield sim
+    sim.stop()
+
+
+@pytest.fixture
+def device(simulator, eds, channel):  # pylint: disable=unused-argument
+    """
+    a device connected to the simulated node 1
+    """
+    dev = Device(filename=eds, nodeid=1, interface="virtual", channel=channel)
+    dev.connect()
+    yield dev
+    dev.disconnect()
+
+
+@pytest.fixture
+def fast_device(simulator, eds, channel):  # pylint: disable=unused-argument
+    """
+    a device connected to the simulated node 1, with a fixed 0.2 s timeout
+    """
+    timeout = 0.2
+    dev = Device(
+        filename=eds,
+        nodeid=1,
+        interface="virtual",
+        channel=channel,
+        sdo_policy={"timeout": timeout, "probe_timeout": timeout, "adaptive": False},
+    )
+    dev.connect()
+    yield dev
+    dev.disconnect()
+
+
+@pytest.fixture
+def late_answers(simulator, monkeypatch):
+    """
+    delays (in seconds, None to lose it) of the answer of the node 1 to the
+    next upload request of an entry, and the SDO requests the node received
+    """
+    sdo = simulator.nodes[1].sdo
+    on_request = sdo.on_request
+    answers = types.SimpleNamespace(delays={}, requests=[])
+
+    def request(can_id, data, timestamp):
+        answers.requests.append(bytes(data))
+        _, index, subindex = struct.unpack_from("<BHB", data)
+        if data[0] == 0x40 and (index, subindex) in answers.delays:
+            delay = answers.delays.pop((index, subindex))
+            if delay is not None:
+                threading.Timer(delay, on_request, (can_id, data, timestamp)).start()
+            return
+        on_request(can_id, data, timestamp)
+
+    monkeypatch.setattr(sdo, "on_request", request)
+    return answers
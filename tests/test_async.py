@@ -0,0 +1,73 @@
+"""
+Tests of the asyncio front-end of the device
+"""
+
+import asyncio
+import os
+
+import pytest
+
+# local module
+from device import AsyncDevice
+
+
+@pytest.fixture
+def devices(simulator, eds, channel):  # pylint: disable=unused-argument
+    """
+    asyncio devices of the simulated nodes 1 and 2
+    """
+    nodes = [
+        AsyncDevice(filename=eds, nodeid=nodeid, interface="virtual", channel=channel)
+        for nodeid in [1, 2]
+    ]
+    asyncio.run(nodes[0].connect())
+    asyncio.run(nodes[1].connect(nodes[0].device.get_network()))
+    yield nodes
+    for node in reversed(nodes):
+        asyncio.run(node.disconnect())
+        node.close()
+
+
+def test_nodes_concurrently(simulator, devices):
+    async def run():
+        await asyncio.gather(
+            devices[0].write_entry(0x1017, 0, (200).to_bytes(2, "little")),
+            devices[1].write_entry(0x1017, 0, (300).to_bytes(2, "little")),
+        )
+        return await asyncio.gather(
+            *(device.read_entry(0x1017, 0) for device in devices)
+        )
+
+    assert [data.unsigned for data in asyncio.run(run())] == [200, 300]
+    assert simulator.nodes[2].get_data(0x1017, 0) == (300).to_bytes(2, "little")
+
+
+def test_event_loop_not_blocked(devices):
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0.001)
+
+    async def run():
+        task = asyncio.create_task(ticker())
+        entries = []
+        await devices[0].upload_dcf("upload.dcf", progress=lambda: entries.append(1))
+        task.cancel()
+        return len(entries)
+
+    entries = asyncio.run(run())
+    assert entries == devices[0].device.get_objdict_elements(upload=True)
+    assert len(ticks) > 1
+    assert os.path.isfile("upload.dcf")
+
+
+def test_timeout_leaves_journal_for_resume(devices):
+    device = devices[0]
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(device.upload_dcf("upload.dcf", timeout=0.05))
+    assert os.path.isfile(device.device.get_upload_journal())
+    asyncio.run(device.upload_dcf("upload.dcf", resume=True))
+    assert not os.path.exists(device.device.get_upload_journal())
+    assert os.path.isfile("upload.dcf")
@@ -0,0 +1,70 @@
+"""
+Tests of the batch read/write of entries
+"""
+
+import struct
+import sys
+
+from canopen.sdo.constants import REQUEST_ABORTED
+import pytest
+
+# local module
+from device import DataBatch
+
+
+def test_read_write_entries(simulator, device):
+    errors = device.write_entries(
+        [(0x1017, 0, (500).to_bytes(2, "little")), (0x1800, 2, b"\x05")]
+    )
+    assert errors == [None, None]
+    assert simulator.nodes[1].get_data(0x1017, 0) == (500).to_bytes(2, "little")
+    columns = device.read_entries([(0x1017, 0), (0x1800, 2)]).to_columns()
+    assert columns["value"] == [500, 5]
+    assert columns["error"] == [None, None]
+
+
+def test_read_entries_truncated_to_od_size(simulator, device):
+    # some devices answer with 4 bytes whatever the size of the entry
+    node = simulator.nodes[1]
+    node.data_store.setdefault(0x1800, {})[2] = b"\x05\x00\x00\x00"
+    batch = device.read_entries([(0x1800, 2)])
+    assert batch.raw(0) == device.read_entry(0x1800, 2).bytes == b"\x05"
+    assert batch.values() == [5]
+
+
+def test_values_without_numpy(monkeypatch):
+    batch = DataBatch()
+    batch.append(0x1017, 0, 0x0006, (500).to_bytes(2, "little"))
+    batch.append(0x2000, 0, 0x0008, b"\x00\x00\x80\x3f")
+    batch.append(0x2001, 0, 0x0003, (-2).to_bytes(2, "little", signed=True))
+    batch.append(0x2002, 0, 0x0007, b"", error="aborted")
+    expected = [500, 1.0, -2, None]
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    assert batch.values() == expected
+    monkeypatch.undo()
+    pytest.importorskip("numpy")
+    assert batch.values() == expected
+
+
+def test_late_answer_taken(simulator, fast_device, late_answers):
+    late_answers.delays[(0x1017, 0)] = 0.3
+    batch = fast_device.read_entries([(0x1017, 0), (0x1800, 2)])
+    assert batch.values() == [
+        int.from_bytes(simulator.nodes[1].get_data(0x1017, 0), "little"),
+        int.from_bytes(simulator.nodes[1].get_data(0x1800, 2), "little"),
+    ]
+    # not read again, and no late answer left for the next request
+    assert len(late_answers.requests) == 2
+    assert fast_device.read_entry(0x1008, 0).bytes == b"yacc benchmark device"
+
+
+def test_segmented_answer_aborted(simulator, device, late_answers):
+    simulator.nodes[1].data_store.setdefault(0x1800, {})[2] = bytes(8)
+    batch = device.read_entries([(0x1800, 2)])
+    assert batch.error == [None]
+    aborts = [
+        struct.unpack_from("<BHBL", request)
+        for request in late_answers.requests
+        if request[0] == REQUEST_ABORTED
+    ]
+    assert aborts == [(REQUEST_ABORTED, 0x1800, 2, 0x08000000)]
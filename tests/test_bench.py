@@ -0,0 +1,40 @@
+"""
+Tests of the benchmark suite
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+BENCH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "bench.py"
+)
+
+
+def test_bench(workdir):
+    output = workdir / "bench.json"
+    subprocess.run(
+        [
+            sys.executable,
+            BENCH,
+            "--latency",
+            "0",
+            "--nodes",
+            "2",
+            "--output",
+            str(output),
+        ],
+        check=True,
+        timeout=60,
+    )
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert report["nodes"] == 2
+    assert [scenario["name"] for scenario in report["scenarios"]] == [
+        "upload",
+        "download",
+        "download_pdo",
+    ]
+    for scenario in report["scenarios"]:
+        assert scenario["errors"] == {}
+        assert 0 < scenario["entries"] <= scenario["sdo_round_trips"]
@@ -0,0 +1,63 @@
+"""
+Tests of the SDO block transfer and of its fallback to segmented transfer
+"""
+
+import pytest
+
+DATA = bytes(range(100))
+# initiate and one request per 7 bytes segment
+SEGMENTED_REQUESTS = 1 + 15
+
+
+@pytest.fixture
+def eds(domain_eds) -> str:
+    """
+    the object dictionary with a DOMAIN
+    """
+    return domain_eds
+
+
+def write_requests(simulator, device) -> int:
+    """
+    SDO requests sent to write the DOMAIN
+    """
+    before = simulator.sdo_requests[1]
+    device.write_entry(0x3100, 0, DATA)
+    return simulator.sdo_requests[1] - before
+
+
+def test_fallback_to_segmented(simulator, device):
+    # the simulated node refuses the block download
+    assert write_requests(simulator, device) > SEGMENTED_REQUESTS
+    assert simulator.nodes[1].get_data(0x3100, 0) == DATA
+    # not tried again on the same connection
+    assert write_requests(simulator, device) == SEGMENTED_REQUESTS
+    assert device.read_entry(0x3100, 0).bytes == DATA
+
+
+def test_block_transfer_disabled(simulator, device):
+    device.set_block_transfer(False)
+    assert write_requests(simulator, device) == SEGMENTED_REQUESTS
+    assert device.read_entry(0x3100, 0).bytes == DATA
+
+
+def test_small_entry_not_block(simulator, device):
+    before = simulator.sdo_requests[1]
+    device.write_entry(0x3100, 0, DATA[:20])
+    assert simulator.sdo_requests[1] - before == 1 + 3
+
+
+@pytest.mark.parametrize(
+    "index, value, requests",
+    [
+        # a string read with a protocol switch, initiate and 3 segments
+        (0x1008, b"yacc benchmark device", 1 + 3),
+        (0x3100, bytes(4), 1),
+    ],
+)
+def test_upload_switched_to_segmented(simulator, device, index, value, requests):
+    simulator.nodes[1].set_data(index, 0, value)
+    before = simulator.sdo_requests[1]
+    assert device.read_entry(index, 0).bytes == value
+    # no abort and no second upload
+    assert simulator.sdo_requests[1] - before == requests
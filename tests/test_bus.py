@@ -0,0 +1,85 @@
+"""
+Tests of the operations on several nodes of a bus
+"""
+
+import glob
+
+import canopen
+import pytest
+
+# local module
+from bus import Bus
+
+
+@pytest.fixture
+def bus(simulator, eds, channel):  # pylint: disable=unused-argument
+    """
+    the simulated nodes 1 and 2
+    """
+    devices = Bus(nodeids=[1, 2], filename=eds, interface="virtual", channel=channel)
+    devices.connect()
+    yield devices
+    devices.disconnect()
+
+
+def heartbeat(simulator, nodeid) -> int:
+    """
+    producer heartbeat time of a simulated node
+    """
+    return int.from_bytes(simulator.nodes[nodeid].get_data(0x1017, 0), "little")
+
+
+@pytest.mark.parametrize("snapshot", [True, False])
+def test_download_snapshot_per_node(simulator, bus, snapshot):
+    assert bus.upload_dcf() == {1: None, 2: None}
+    dcf = glob.glob("upload_*_node1.dcf")[0]
+    uploaded = heartbeat(simulator, 1)
+    for nodeid in [1, 2]:
+        simulator.nodes[nodeid].set_data(0x1017, 0, (777).to_bytes(2, "little"))
+    results = bus.download_dcf(
+        dcf,
+        diff=True,
+        snapshot=dcf.replace("node1", "node{nodeid}") if snapshot else None,
+    )
+    assert results == {1: None, 2: None}
+    for nodeid, device in bus.devices.items():
+        assert device.get_skipped_writes() > 0
+        # the snapshot has the uploaded value, so the write is skipped
+        assert heartbeat(simulator, nodeid) == (777 if snapshot else uploaded)
+
+
+def test_upload_download_nodes(simulator, bus, eds):
+    simulator.nodes[1].set_data(0x1017, 0, (200).to_bytes(2, "little"))
+    simulator.nodes[2].set_data(0x1017, 0, (300).to_bytes(2, "little"))
+    entries = {1: 0, 2: 0}
+
+    def progress(nodeid):
+        entries[nodeid] += 1
+
+    assert bus.upload_dcf(progress) == {1: None, 2: None}
+    total = bus.get_objdict_elements(eds, upload=True)
+    assert entries == {1: total, 2: total}
+    files = {nodeid: glob.glob(f"upload_*_node{nodeid}.dcf")[0] for nodeid in [1, 2]}
+    for nodeid, value in [(1, 200), (2, 300)]:
+        od = canopen.import_od(files[nodeid], nodeid)
+        assert od[0x1017].value == value
+    assert bus.download_dcf(files[2]) == {1: None, 2: None}
+    assert heartbeat(simulator, 1) == heartbeat(simulator, 2) == 300
+
+
+def test_failed_node_does_not_stop_the_others(simulator, eds, channel):
+    devices = Bus(
+        nodeids=[1, 2, 3],
+        filename=eds,
+        interface="virtual",
+        channel=channel,
+        sdo_policy={"timeout": 0.1, "retries": 0},
+    )
+    devices.connect()
+    try:
+        results = devices.upload_dcf()
+    finally:
+        devices.disconnect()
+    assert results[1] is None and results[2] is None
+    assert isinstance(results[3], Exception)
+    assert glob.glob("upload_*_node1.dcf") and glob.glob("upload_*_node2.dcf")
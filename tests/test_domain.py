@@ -0,0 +1,52 @@
+"""
+Tests of the streamed DOMAIN transfers
+"""
+
+import os
+import time
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def eds(domain_eds):
+    """
+    the object dictionary with a DOMAIN and the program download objects
+    """
+    return domain_eds
+
+
+def test_write_read_domain(simulator, device, workdir):
+    image = os.urandom(20000)
+    (workdir / "in.bin").write_bytes(image)
+    for _ in device.write_domain(0x3100, 0, str(workdir / "in.bin")):
+        pass
+    assert bytes(simulator.nodes[1].get_data(0x3100, 0)) == image
+    progress = list(device.read_domain(0x3100, 0, str(workdir / "out.bin")))
+    assert progress[-1] == (len(image), len(image))
+    assert (workdir / "out.bin").read_bytes() == image
+
+
+def test_closed_write_domain_is_aborted(simulator, device, workdir, monkeypatch):
+    monkeypatch.setattr("device.DOMAIN_CHUNK", 700)
+    simulator.nodes[1].set_data(0x3100, 0, b"before")
+    (workdir / "in.bin").write_bytes(os.urandom(20000))
+    transfer = device.write_domain(0x3100, 0, str(workdir / "in.bin"))
+    assert next(transfer) == (700, 20000)
+    transfer.close()
+    # the node did not get the end of the transfer, so it kept the old value
+    assert bytes(simulator.nodes[1].get_data(0x3100, 0)) == b"before"
+    assert device.read_entry(0x1017, 0).unsigned == 100
+
+
+def test_closed_read_domain_is_aborted(simulator, device, workdir, monkeypatch):
+    monkeypatch.setattr("device.DOMAIN_CHUNK", 700)
+    simulator.nodes[1].set_data(0x3100, 0, os.urandom(20000))
+    transfer = device.read_domain(0x3100, 0, str(workdir / "out.bin"))
+    next(transfer)
+    transfer.close()
+    deadline = time.monotonic() + 1
+    while simulator.nodes[1].sdo.last_received_error != 0x08000000:
+        assert time.monotonic() < deadline, "no abort received"
+        time.sleep(0.01)
+    assert device.read_entry(0x1017, 0).unsigned == 100
@@ -0,0 +1,145 @@
+"""
+Tests of the dcf download
+"""
+
+import os
+import re
+
+import pytest
+
+# local module
+from device import Device
+from simulator import Simulator
+
+
+def upload(device, filename="upload.dcf") -> str:
+    """
+    upload a dcf from the device
+    """
+    for _ in device.upload_dcf(True, filename=filename):
+        pass
+    return filename
+
+
+def set_value(filename, section, value):
+    """
+    change the value of an entry of a dcf
+    """
+    with open(filename, encoding="utf-8") as f:
+        text = f.read()
+    text, count = re.subn(
+        rf"(\[{section}\][^\[]*?ParameterValue=)[^\n]*",
+        rf"\g<1>{value}",
+        text,
+        flags=re.IGNORECASE,
+    )
+    assert count == 1
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def cobid(simulator, nodeid=1) -> int:
+    """
+    COB-ID of the TPDO1 of a simulated node
+    """
+    return int.from_bytes(simulator.nodes[nodeid].get_data(0x1800, 1), "little")
+
+
+@pytest.mark.parametrize(
+    "before, written, after",
+    [
+        (0x181, "0x80000185", 0x80000185),
+        (0x80000181, "0x185", 0x185),
+        (0x181, "0x185", 0x185),
+        (0x80000181, "0x80000185", 0x80000185),
+    ],
+)
+def test_pdo_valid_bit_follows_dcf(simulator, device, before, written, after):
+    dcf = upload(device)
+    set_value(dcf, "1800sub1", written)
+    simulator.nodes[1].set_data(0x1800, 1, before.to_bytes(4, "little"))
+    for _ in device.download_dcf(dcf, True, verify=True):
+        pass
+    assert cobid(simulator) == after
+    assert not device.get_verify_mismatches()
+
+
+@pytest.mark.parametrize("before", [0x181, 0x80000181])
+def test_pdo_state_kept_without_cobid(simulator, device, before):
+    dcf = upload(device)
+    set_value(dcf, "1800sub1", hex(before))
+    set_value(dcf, "1800sub2", "0x05")
+    simulator.nodes[1].set_data(0x1800, 1, before.to_bytes(4, "little"))
+    # the COB-ID is the same, so diff writes only the transmission type
+    for _ in device.download_dcf(dcf, True, diff=True):
+        pass
+    assert device.get_skipped_writes() > 0
+    assert simulator.nodes[1].get_data(0x1800, 2)[0] == 5
+    assert cobid(simulator) == before
+
+
+def test_verify_pdo_against_dcf(simulator, device, monkeypatch):
+    dcf = upload(device)
+    set_value(dcf, "1800sub1", "0x185")
+    # a PDO that is not enabled again must be reported
+    monkeypatch.setattr(Device, "_Device__pdo_enable", lambda self, index: True)
+    with pytest.raises(Exception):
+        for _ in device.download_dcf(dcf, True, verify=True):
+            pass
+    assert cobid(simulator) == 0x80000185
+    assert {
+        "index": "0x1800",
+        "subindex": "0x01",
+        "expected": "85010000",
+        "actual": "85010080",
+        "error": None,
+    } in device.get_verify_mismatches()
+
+
+def test_diff_skips_matching_entries(simulator, device):
+    dcf = upload(device)
+    for _ in device.download_dcf(dcf, True, diff=True):
+        pass
+    matching = device.get_skipped_writes()
+    assert matching > 0
+    set_value(dcf, "2000", "1234")
+    set_value(dcf, "2001", "4321")
+    for _ in device.download_dcf(dcf, True, diff=True):
+        pass
+    assert device.get_skipped_writes() == matching - 2
+    assert simulator.nodes[1].get_data(0x2000, 0) == (1234).to_bytes(2, "little")
+    assert simulator.nodes[1].get_data(0x2001, 0) == (4321).to_bytes(2, "little")
+
+
+def test_download_without_diff_skips_nothing(simulator, device):
+    dcf = upload(device)
+    for _ in device.download_dcf(dcf, True):
+        pass
+    assert device.get_skipped_writes() == 0
+
+
+def test_resume_after_abort(eds, channel, device, simulator):
+    dcf = upload(device)
+    set_value(dcf, "1017", "777")
+    set_value(dcf, "2010", "4321")
+    simulator.stop()
+    sim = Simulator(eds, nodeids=[1], channel=channel, aborts=[(0x2005, 0)])
+    sim.start()
+    try:
+        with pytest.raises(Exception):
+            for _ in device.download_dcf(dcf, True):
+                pass
+        assert os.path.isfile(device.get_download_journal())
+        assert sim.nodes[1].get_data(0x1017, 0) == (777).to_bytes(2, "little")
+        sim.stop()
+        sim = Simulator(eds, nodeids=[1], channel=channel)
+        sim.start()
+        for _ in device.download_dcf(dcf, True, resume=True):
+            pass
+        assert not os.path.exists(device.get_download_journal())
+        # written before the abort, so not written again to the new node
+        assert sim.nodes[1].get_data(0x1017, 0) != (777).to_bytes(2, "little")
+        assert sim.nodes[1].get_data(0x2010, 0) == (4321).to_bytes(2, "little")
+    finally:
+        sim.stop()
+        simulator.start()
@@ -0,0 +1,73 @@
+"""
+Tests of the firmware flashing through the program download objects
+"""
+
+import os
+
+import pytest
+
+# local module
+from bus import Bus
+from simulator import Simulator
+
+
+@pytest.fixture(scope="session")
+def eds(domain_eds):
+    """
+    the object dictionary with a DOMAIN and the program download objects
+    """
+    return domain_eds
+
+
+def test_flash_nodes(simulator, eds, channel, workdir):
+    image = os.urandom(3000)
+    (workdir / "fw.bin").write_bytes(image)
+    bus = Bus(nodeids=[1, 2], filename=eds, interface="virtual", channel=channel)
+    bus.connect()
+    try:
+        results = bus.flash(str(workdir / "fw.bin"), software_id=0x12345678)
+    finally:
+        bus.disconnect()
+    assert results == {1: None, 2: None}
+    for nodeid in [1, 2]:
+        node = simulator.nodes[nodeid]
+        assert bytes(node.get_data(0x1F50, 1)) == image
+        assert node.get_data(0x1F51, 1)[0] == 1
+        assert bus.devices[nodeid].get_software_id() == 0x12345678
+
+
+def test_flash_software_id_mismatch(device, workdir):
+    (workdir / "fw.bin").write_bytes(os.urandom(100))
+    with pytest.raises(Exception, match="0x12345678 instead of 0x00000001"):
+        for _ in device.flash(str(workdir / "fw.bin"), software_id=1):
+            pass
+
+
+def test_flash_interrupted(simulator, device, workdir, monkeypatch):
+    monkeypatch.setattr("device.DOMAIN_CHUNK", 700)
+    simulator.nodes[1].set_data(0x1F50, 1, b"old")
+    (workdir / "fw.bin").write_bytes(os.urandom(5000))
+    transfer = device.flash(str(workdir / "fw.bin"))
+    next(transfer)
+    transfer.close()
+    node = simulator.nodes[1]
+    assert bytes(node.get_data(0x1F50, 1)) == b"old"
+    # cleared, never started on the partial image
+    assert node.get_data(0x1F51, 1)[0] == 3
+
+
+def test_flash_failed_write(eds, channel, workdir):
+    sim = Simulator(eds, channel=channel, heartbeat=50, aborts=[(0x1F50, 1)])
+    sim.start()
+    try:
+        bus = Bus(nodeids=[1], filename=eds, interface="virtual", channel=channel)
+        bus.connect()
+        try:
+            (workdir / "fw.bin").write_bytes(os.urandom(100))
+            err = bus.flash(str(workdir / "fw.bin"))[1]
+        finally:
+            bus.disconnect()
+        assert "left stopped and cleared" in str(err)
+        assert sim.nodes[1].get_data(0x1F51, 1)[0] == 3
+    finally:
+        sim.stop()
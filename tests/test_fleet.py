@@ -0,0 +1,125 @@
+"""
+Tests of the fleet mode, one process per bus
+"""
+
+import logging
+import queue
+
+import pytest
+
+# local module
+import fleet
+
+
+@pytest.fixture
+def logging_calls(monkeypatch) -> list:
+    """
+    logging set up by a worker
+    """
+    calls = []
+    monkeypatch.setattr(
+        fleet.logging, "basicConfig", lambda **kwargs: calls.append(kwargs)
+    )
+    monkeypatch.setattr(fleet.logging, "disable", lambda level: calls.append(level))
+    return calls
+
+
+def run_worker(eds, channel, options, operation="upload") -> list:
+    """
+    run a worker on the simulated nodes 1 and 2 in this process, and get its
+    events
+    """
+    bus = {
+        "interface": "virtual",
+        "channel": channel,
+        "baudrate": 250,
+        "nodeids": [1, 2],
+        "file": eds,
+    }
+    events = queue.Queue()
+    fleet._worker(0, bus, operation, {}, options, events)
+    return [events.get_nowait() for _ in range(events.qsize())]
+
+
+@pytest.mark.parametrize(
+    "options, expected",
+    [
+        ({}, logging.CRITICAL),
+        ({"log_level": logging.INFO}, {"level": logging.INFO}),
+        ({"log_level": logging.DEBUG}, {"level": logging.DEBUG}),
+    ],
+)
+def test_worker_logging(
+    simulator, eds, channel, logging_calls, options, expected
+):  # pylint: disable=unused-argument
+    events = run_worker(eds, channel, options)
+    assert logging_calls == [expected]
+    kind, number, report = events[-1]
+    assert (kind, number) == ("done", 0)
+    assert {nodeid: node["error"] for nodeid, node in report.items()} == {
+        1: None,
+        2: None,
+    }
+
+
+def test_worker_snapshot(
+    simulator, eds, channel, logging_calls, workdir
+):  # pylint: disable=unused-argument
+    run_worker(eds, channel, {})
+    folder = workdir / f"virtual-{channel}"
+    dcf = str(next(folder.glob("upload_*_node1.dcf")))
+    for nodeid in [1, 2]:
+        simulator.nodes[nodeid].set_data(0x1017, 0, (777).to_bytes(2, "little"))
+    options = {"diff": True, "snapshot": dcf.replace("node1", "node{nodeid}")}
+    _, _, report = run_worker(dcf, channel, options, "download")[-1]
+    assert all(node["error"] is None and node["skipped"] for node in report.values())
+    for nodeid in [1, 2]:
+        assert simulator.nodes[nodeid].get_data(0x1017, 0) == (777).to_bytes(
+            2, "little"
+        )
+
+
+def test_load_manifest(workdir):
+    (workdir / "fleet.toml").write_text(
+        """
+[[bus]]
+interface = "virtual"
+channel = "line1"
+nodes = "1-3,5"
+file = "line1.dcf"
+
+[[bus]]
+interface = "virtual"
+channel = "line2"
+nodes = [7, 8]
+file = "dcf/line2.dcf"
+
+[[bus]]
+interface = "virtual"
+channel = "line3"
+nodes = 4
+file = "line3.dcf"
+""",
+        encoding="utf-8",
+    )
+    buses = fleet.load_manifest("fleet.toml")
+    assert [bus["nodeids"] for bus in buses] == [[1, 2, 3, 5], [7, 8], [4]]
+    assert buses[1]["file"] == str(workdir / "dcf" / "line2.dcf")
+    assert [fleet.bus_label(bus) for bus in buses] == [
+        "virtual-line1",
+        "virtual-line2",
+        "virtual-line3",
+    ]
+
+
+def test_manifest_without_file(workdir):
+    (workdir / "fleet.toml").write_text("[[bus]]\nnodes = 1\n", encoding="utf-8")
+    with pytest.raises(Exception, match="missing file of the bus 1"):
+        fleet.load_manifest("fleet.toml")
+
+
+def test_worker_refresh_identity_cache(
+    simulator, eds, channel, logging_calls, workdir
+):  # pylint: disable=unused-argument
+    run_worker(eds, channel, {"refresh_identity_cache": True})
+    assert list((workdir / "cache" / "identity").glob("*.json"))
@@ -0,0 +1,72 @@
+"""
+Tests of the parts of the GUI that do not need a display
+"""
+
+import types
+
+import pytest
+
+try:
+    import tomllib
+except ImportError:
+    import tomli as tomllib
+
+gui = pytest.importorskip("gui")
+
+
+def variable(value):
+    """
+    stand-in for a tkinter variable or entry
+    """
+    return types.SimpleNamespace(get=lambda: value)
+
+
+def test_save_config_keeps_other_keys(workdir):
+    (workdir / "config.toml").write_text(
+        """
+[object_dictionary]
+filename = "old.eds"
+
+[can]
+interface = "peak"
+baudrate = 250
+nodeid = 1
+channel = "PCAN_USBBUS2"
+nmt_timeout = 5.0
+
+[sdo]
+retries = 4
+""",
+        encoding="utf-8",
+    )
+    window = gui.Gui.__new__(gui.Gui)
+    window.file_str_entry = variable("new.eds")
+    window.interface_variable = variable("virtual")
+    window.variable_br = variable("500")
+    window.variable_node = variable("3")
+    window._Gui__save_config()
+    with open(workdir / "config.toml", "rb") as f:
+        config = tomllib.load(f)
+    assert config == {
+        "object_dictionary": {"filename": "new.eds"},
+        "can": {
+            "interface": "virtual",
+            "baudrate": 500,
+            "nodeid": 3,
+            "channel": "PCAN_USBBUS2",
+            "nmt_timeout": 5.0,
+        },
+        "sdo": {"retries": 4},
+    }
+
+
+def test_save_config_new_file(workdir):
+    window = gui.Gui.__new__(gui.Gui)
+    window.file_str_entry = variable("sample.eds")
+    window.interface_variable = variable("peak")
+    window.variable_br = variable("250")
+    window.variable_node = variable("1")
+    window._Gui__save_config()
+    with open(workdir / "config.toml", "rb") as f:
+        config = tomllib.load(f)
+    assert config["can"] == {"interface": "peak", "baudrate": 250, "nodeid": 1}
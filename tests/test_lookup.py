@@ -0,0 +1,99 @@
+"""
+Tests of the lookup tables of the object dictionary
+"""
+
+import shutil
+
+import canopen
+import pytest
+
+# local module
+from device import Device
+from lookup import ObjectTable
+import odcache
+
+
+@pytest.fixture
+def table(eds) -> ObjectTable:
+    """
+    the lookup tables of the sample object dictionary
+    """
+    return ObjectTable(odcache.import_od(eds))
+
+
+def test_index_name(table, eds):
+    od = odcache.import_od(eds)
+    assert len(table) == len(od)
+    for index, name, entries in table.objects:
+        assert table.index(name) == index
+        assert table.name(index) == od[index].name
+        assert entries == (
+            not isinstance(od[index], canopen.objectdictionary.ODVariable)
+        )
+
+
+def test_entries(table):
+    assert table.subindex(0x1018, "Vendor-ID") == 1
+    assert (1, "Vendor-ID") in table.entries(0x1018)
+    assert not table.entries(0x1017)
+    assert table.subindex(0x1017, "Producer heartbeat time") == 0
+    assert table.entry(0x1017, 0).length == 2
+    assert table.entry(0x1008, 0).length is None
+    assert table.entry(0x1008, 0).access_type == "const"
+
+
+@pytest.mark.parametrize(
+    "text, first",
+    [
+        ("0x1017", 0x1017),
+        ("1017", 0x1017),
+        ("producer heartbeat", 0x1017),
+        ("HEARTBEAT", 0x1017),
+        # a typo finds the closest name
+        ("producer hartbeat time", 0x1017),
+    ],
+)
+def test_search(table, text, first):
+    assert table.search(text)[0] == first
+
+
+def test_search_limit(table):
+    assert table.search("0x1", limit=3) == [0x1000, 0x1001, 0x1008]
+    assert not table.search("no such object")
+
+
+@pytest.mark.parametrize(
+    "text, entry",
+    [
+        ("1017", (0x1017, 0)),
+        ("Producer heartbeat time", (0x1017, 0)),
+        ("Identity object:Vendor-ID", (0x1018, 1)),
+        ("1018:2", (0x1018, 2)),
+    ],
+)
+def test_parse_entry(device, text, entry):
+    assert device.parse_entry(text) == entry
+
+
+def test_parse_unknown_entry(device):
+    with pytest.raises(Exception, match="unknown entry"):
+        device.parse_entry("no such object")
+
+
+def test_lookup_after_reconnect(
+    simulator, eds, domain_eds, channel, workdir
+):  # pylint: disable=unused-argument
+    path = workdir / "node.eds"
+    shutil.copyfile(eds, path)
+    dev = Device(filename=str(path), interface="virtual", channel=channel)
+    dev.connect()
+    with pytest.raises(Exception, match="unknown entry"):
+        dev.parse_entry("Trace buffer")
+    dev.disconnect()
+    # the same file, edited while disconnected
+    shutil.copyfile(domain_eds, path)
+    dev.connect()
+    try:
+        assert dev.parse_entry("Trace buffer") == (0x3100, 0)
+    finally:
+        dev.disconnect()
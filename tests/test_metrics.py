@@ -0,0 +1,70 @@
+"""
+Tests of the SDO transfer metrics
+"""
+
+import json
+
+import pytest
+
+# local module
+from device import Device
+from metrics import SLOWEST, Metrics
+from simulator import Simulator
+
+
+def test_histogram():
+    metrics = Metrics()
+    for rtt in [0.0004, 0.003, 0.003, 3.0]:
+        metrics.record(1, "upload", 0x2001, 0, rtt, size=2)
+    metrics.record(1, "upload", 0x2002, 0, 0.001, abort_code=0x06010000)
+    summary = metrics.to_dict()["nodes"]["1"]["upload"]["0x2000"]
+    assert summary["count"] == 5
+    assert summary["bytes"] == 8
+    assert summary["aborts"] == {"0x06010000": 1}
+    assert summary["max_s"] == 3.0
+    histogram = summary["histogram"]
+    assert (histogram["0.0005"], histogram["0.005"], histogram["2.0"]) == (1, 4, 4)
+    assert histogram["+Inf"] == 5
+
+
+def test_slowest():
+    metrics = Metrics()
+    for subindex in range(2 * SLOWEST):
+        metrics.record(1, "download", 0x2000, subindex, subindex / 1000)
+    slowest = metrics.to_dict()["slowest"]
+    assert len(slowest) == SLOWEST
+    assert slowest[0]["subindex"] == f"0x{2 * SLOWEST - 1:02X}"
+
+
+def test_prometheus():
+    metrics = Metrics()
+    metrics.record(2, "upload", 0x1017, 0, 0.002, size=2, retries=1)
+    text = metrics.to_prometheus()
+    labels = 'node="2",direction="upload",range="0x1000"'
+    assert f'yacc_sdo_rtt_seconds_bucket{{{labels},le="0.002"}} 1' in text
+    assert f"yacc_sdo_rtt_seconds_count{{{labels}}} 1" in text
+    assert f"yacc_sdo_retries_total{{{labels}}} 1" in text
+
+
+def test_unknown_format():
+    with pytest.raises(Exception, match="unknown metrics format"):
+        Metrics().save("metrics.txt", "csv")
+
+
+def test_upload_metrics(eds, channel):
+    sim = Simulator(eds, channel=channel, aborts=[(0x2000, 0)])
+    sim.start()
+    dev = Device(filename=eds, interface="virtual", channel=channel)
+    dev.connect()
+    try:
+        for _ in dev.upload_dcf(True, filename="upload.dcf", collect_aborts=True):
+            pass
+    finally:
+        dev.disconnect()
+        sim.stop()
+    dev.get_metrics().save("metrics.json")
+    with open("metrics.json", encoding="utf-8") as f:
+        upload = json.load(f)["nodes"]["1"]["upload"]
+    assert upload["0x2000"]["aborts"] == {"0x08000000": 1}
+    transfers = sum(summary["count"] for summary in upload.values())
+    assert transfers == dev.get_objdict_elements(upload=True)
@@ -0,0 +1,116 @@
+"""
+Tests of the live sampling of entries
+"""
+
+import itertools
+
+import pytest
+
+# local module
+from device import Device
+from simulator import Simulator
+
+ENTRIES = [(0x2000, 0), (0x2001, 0)]
+
+
+def tpdos(simulator) -> dict[tuple[int, int], bytes]:
+    """
+    communication and mapping parameters of the TPDOs of the node 1
+    """
+    node = simulator.nodes[1]
+    return {
+        (index, subindex): node.get_data(index, subindex)
+        for number in range(4)
+        for index in [0x1800 + number, 0x1A00 + number]
+        if index in node.object_dictionary
+        for subindex in node.object_dictionary[index].subindices
+        if subindex
+    }
+
+
+@pytest.mark.parametrize("pdo", [True, False])
+def test_monitor(simulator, device, pdo):
+    node = simulator.nodes[1]
+    node.set_data(0x2000, 0, (11).to_bytes(2, "little"))
+    node.set_data(0x2001, 0, (22).to_bytes(2, "little"))
+    before = tpdos(simulator)
+    # the TPDOs of the sample are all enabled, so none is spare
+    samples = device.monitor(ENTRIES, period=0.01, tpdo=4, pdo=pdo)
+    values = [values for _, values in itertools.islice(samples, 5)]
+    assert values[-1] == [11, 22]
+    node.set_data(0x2000, 0, (33).to_bytes(2, "little"))
+    for _, values in itertools.islice(samples, 50):
+        if values == [33, 22]:
+            break
+    assert values == [33, 22]
+    samples.close()
+    assert device.get_monitor_tpdo() == (4 if pdo else None)
+    assert tpdos(simulator) == before
+    assert node.nmt.state == "PRE-OPERATIONAL"
+
+
+def test_not_mappable_entries_polled(simulator, device):
+    # a string cannot be mapped in a TPDO
+    samples = device.monitor([(0x1008, 0)], period=0.01)
+    _, values = next(samples)
+    samples.close()
+    assert values == ["yacc benchmark device"]
+    assert device.get_monitor_tpdo() is None
+
+
+def test_spare_tpdo(simulator, device):
+    simulator.nodes[1].set_data(0x1802, 1, (0x80000381).to_bytes(4, "little"))
+    samples = device.monitor(ENTRIES, period=0.01)
+    next(samples)
+    samples.close()
+    assert device.get_monitor_tpdo() == 3
+
+
+def test_state_restored_with_slow_heartbeat(eds, channel):
+    sim = Simulator(eds, channel=channel, heartbeat=1000)
+    sim.start()
+    sim.nodes[1].nmt.state = "OPERATIONAL"
+    dev = Device(filename=eds, interface="virtual", channel=channel)
+    dev.connect()
+    try:
+        samples = dev.monitor(ENTRIES, period=0.01, tpdo=4)
+        next(samples)
+        samples.close()
+        assert sim.nodes[1].nmt.state == "OPERATIONAL"
+    finally:
+        dev.disconnect()
+        sim.stop()
+
+
+def test_unknown_state_not_changed(eds, channel):
+    sim = Simulator(eds, channel=channel, heartbeat=0)
+    sim.start()
+    sim.nodes[1].nmt.state = "OPERATIONAL"
+    # started anyway from 0x1017 on the boot-up of the node
+    sim.nodes[1].nmt.stop_heartbeat()
+    dev = Device(filename=eds, interface="virtual", channel=channel, nmt_timeout=0.2)
+    dev.connect()
+    try:
+        with pytest.raises(Exception, match="no heartbeat from the node"):
+            next(dev.monitor(ENTRIES, period=0.01, tpdo=4))
+        assert sim.nodes[1].nmt.state == "OPERATIONAL"
+    finally:
+        dev.disconnect()
+        sim.stop()
+
+
+def test_serial_polling_after_lost_answers(fast_device, late_answers, monkeypatch):
+    late_answers.delays[(0x2001, 0)] = None
+    pipelined = []
+    upload_pipelined = fast_device._Device__sdo_upload_pipelined
+    monkeypatch.setattr(
+        fast_device,
+        "_Device__sdo_upload_pipelined",
+        lambda keys: pipelined.append(keys) or upload_pipelined(keys),
+    )
+    samples = fast_device.monitor(ENTRIES, period=0.01, pdo=False)
+    values = [values for _, values in itertools.islice(samples, 3)]
+    samples.close()
+    assert values[-1] == values[0]
+    assert None not in values[0]
+    assert len(pipelined) == 1
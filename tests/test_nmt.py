@@ -0,0 +1,51 @@
+"""
+Tests of the NMT state tracking
+"""
+
+import time
+
+import pytest
+
+
+@pytest.fixture
+def nmt_commands(device) -> list[int]:
+    """
+    NMT commands sent to the node by the device
+    """
+    commands = []
+    nmt = device._Device__node.nmt
+    send_command = nmt.send_command
+
+    def record(code):
+        commands.append(code)
+        send_command(code)
+
+    nmt.send_command = record
+    return commands
+
+
+def download(device):
+    """
+    upload a dcf from the device and download it back
+    """
+    for _ in device.upload_dcf(True, filename="upload.dcf"):
+        pass
+    for _ in device.download_dcf("upload.dcf", True):
+        pass
+
+
+def test_no_command_in_pre_operational(simulator, device, nmt_commands):
+    # the state is known from the heartbeat
+    time.sleep(0.2)
+    download(device)
+    assert not nmt_commands
+    assert simulator.nodes[1].nmt.state == "PRE-OPERATIONAL"
+
+
+def test_single_command_from_operational(simulator, device, nmt_commands):
+    simulator.nodes[1].nmt.state = "OPERATIONAL"
+    time.sleep(0.2)
+    download(device)
+    # PRE-OPERATIONAL once, then tracked for all the PDOs
+    assert nmt_commands == [0x80]
+    assert simulator.nodes[1].nmt.state == "PRE-OPERATIONAL"
@@ -0,0 +1,96 @@
+"""
+Tests of the object dictionary cache
+"""
+
+import os
+import stat
+
+import pytest
+
+# local module
+import odcache
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "getuid"), reason="no file owners on this platform"
+)
+
+
+@pytest.fixture(autouse=True)
+def memo(monkeypatch):
+    """
+    an empty in-process cache, so that the disk one is used
+    """
+    monkeypatch.setattr(odcache, "_memo", {})
+
+
+def cached_files() -> list[str]:
+    """
+    pickle files of the on-disk cache
+    """
+    folder = odcache.cache_dir()
+    return [
+        os.path.join(folder, name)
+        for name in os.listdir(folder)
+        if name.endswith(".pickle")
+    ]
+
+
+def test_cache_private(eds):
+    odcache.import_od(eds)
+    assert stat.S_IMODE(os.stat(odcache.cache_dir()).st_mode) == 0o700
+    assert [stat.S_IMODE(os.stat(path).st_mode) for path in cached_files()] == [0o600]
+
+
+@pytest.mark.parametrize("mode", [0o620, 0o602])
+def test_writable_cache_file_not_loaded(eds, monkeypatch, mode):
+    odcache.import_od(eds)
+    (path,) = cached_files()
+    os.chmod(path, mode)
+    monkeypatch.setattr(odcache, "_memo", {})
+    loads = []
+    monkeypatch.setattr(odcache.pickle, "loads", loads.append)
+    od = odcache.import_od(eds)
+    assert not loads
+    assert 0x1000 in od
+
+
+def test_foreign_cache_file_not_loaded(eds, monkeypatch):
+    odcache.import_od(eds)
+    monkeypatch.setattr(odcache, "_memo", {})
+    uid = os.getuid() + 1
+    monkeypatch.setattr(odcache.os, "getuid", lambda: uid)
+    loads = []
+    monkeypatch.setattr(odcache.pickle, "loads", loads.append)
+    assert 0x1000 in odcache.import_od(eds)
+    assert not loads
+
+
+def test_parsed_once_for_all_node_ids(eds, monkeypatch):
+    parsed = []
+    import_od = odcache.canopen.import_od
+    monkeypatch.setattr(
+        odcache.canopen,
+        "import_od",
+        lambda *args: parsed.append(args) or import_od(*args),
+    )
+    for node_id in [1, 2, 3, None]:
+        od = odcache.import_od(eds, node_id)
+        expected = import_od(eds, node_id)
+        for index in [0x1400, 0x1800, 0x1A00]:
+            for subindex in expected[index].subindices:
+                assert od[index][subindex].default == expected[index][subindex].default
+        if node_id is not None:
+            assert od[0x1800][1].default == 0x180 + node_id
+    assert parsed == [(eds,)]
+
+
+def test_least_recently_used_evicted(workdir):  # pylint: disable=unused-argument
+    folder = odcache.cache_dir("test")
+    for number in range(3):
+        odcache.store_file(folder, f"{number}.json", b"[]", 3)
+        path = os.path.join(folder, f"{number}.json")
+        os.utime(path, (number, number))
+    # a load is a use
+    assert odcache.load_file(os.path.join(folder, "0.json")) == b"[]"
+    odcache.store_file(folder, "3.json", b"[]", 3)
+    assert sorted(os.listdir(folder)) == ["0.json", "2.json", "3.json"]
@@ -0,0 +1,96 @@
+"""
+Tests of the SDO timeout and retry policy
+"""
+
+import time
+
+import canopen
+import pytest
+
+# local module
+from device import Device
+from policy import SdoPolicy
+from simulator import Simulator
+
+
+def aborted(code: int) -> canopen.SdoAbortedError:
+    """
+    an abort of a transfer
+    """
+    return canopen.SdoAbortedError(code)
+
+
+@pytest.mark.parametrize("code", [0x08000000, 0x08000020])
+def test_deterministic_aborts_not_retried(code):
+    assert SdoPolicy().retry(aborted(code), 0) is None
+    assert SdoPolicy(retryable_aborts=[code]).retry(aborted(code), 0) is not None
+
+
+def test_transient_abort_retried():
+    assert SdoPolicy().retry(aborted(0x08000022), 0) is not None
+
+
+def test_timeout_floor_per_kind():
+    policy = SdoPolicy(timeout=1.0)
+    for _ in range(20):
+        policy.update(0.001)
+    assert policy.timeout() == pytest.approx(0.05)
+    assert policy.timeout("write") == pytest.approx(0.2)
+    assert policy.timeout("segmented") == pytest.approx(0.1)
+    assert policy.timeout("block") == pytest.approx(0.5)
+
+
+def test_timeout_floor_bounded_by_timeout():
+    policy = SdoPolicy(timeout=0.3)
+    for _ in range(20):
+        policy.update(0.001)
+    assert policy.timeout("block") == pytest.approx(0.3)
+
+
+def test_device_timeout_per_kind(simulator, device):
+    sdo = device._Device__node.sdo
+    for _ in range(5):
+        device.read_entry(0x1017, 0)
+    assert sdo.RESPONSE_TIMEOUT < 0.1
+    assert device.read_entry(0x1008, 0).bytes == b"yacc benchmark device"
+    assert sdo.RESPONSE_TIMEOUT >= 0.1
+    device.write_entry(0x1017, 0, (500).to_bytes(2, "little"))
+    assert sdo.RESPONSE_TIMEOUT >= 0.2
+
+
+@pytest.mark.parametrize("code, attempts", [(0x08000022, 3), (0x08000000, 1)])
+def test_device_retries(eds, channel, code, attempts):
+    sim = Simulator(eds, channel=channel, aborts=[(0x2000, 0)], abort_code=code)
+    sim.start()
+    dev = Device(filename=eds, interface="virtual", channel=channel)
+    dev.connect()
+    try:
+        with pytest.raises(canopen.SdoAbortedError):
+            dev.read_entry(0x2000, 0)
+    finally:
+        dev.disconnect()
+        sim.stop()
+    assert sim.injected_aborts[1] == attempts
+
+
+def test_timeout_not_retried_before_an_answer():
+    policy = SdoPolicy()
+    assert policy.timeout() == pytest.approx(0.5)
+    assert policy.retry(canopen.SdoCommunicationError("timeout"), 0) is None
+    policy.answered()
+    assert policy.timeout() == pytest.approx(1.0)
+    assert policy.retry(canopen.SdoCommunicationError("timeout"), 0) is not None
+    policy.reset()
+    assert policy.retry(canopen.SdoCommunicationError("timeout"), 0) is None
+
+
+def test_missing_node_reported_fast(simulator, eds, channel):
+    dev = Device(filename=eds, nodeid=5, interface="virtual", channel=channel)
+    dev.connect()
+    try:
+        start = time.perf_counter()
+        with pytest.raises(canopen.SdoCommunicationError):
+            dev.read_entry(0x1017, 0)
+        assert time.perf_counter() - start < 1.0
+    finally:
+        dev.disconnect()
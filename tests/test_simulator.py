@@ -0,0 +1,68 @@
+"""
+Tests of the simulated devices
+"""
+
+import time
+
+import canopen
+import pytest
+
+# local module
+from device import Device
+from simulator import Simulator
+
+
+@pytest.fixture
+def node(eds, channel, request):
+    """
+    a device connected to a node simulated with the parameters of the test
+    """
+    sim = Simulator(eds, channel=channel, **request.param)
+    sim.start()
+    dev = Device(
+        filename=eds,
+        interface="virtual",
+        channel=channel,
+        sdo_policy={"retries": 0},
+    )
+    dev.connect()
+    yield sim, dev
+    dev.disconnect()
+    sim.stop()
+
+
+def test_requests_counted(simulator, device):
+    before = simulator.sdo_requests[1]
+    device.read_entry(0x1017, 0)
+    assert simulator.sdo_requests[1] == before + 1
+    assert simulator.sdo_requests[2] == 0
+
+
+@pytest.mark.parametrize("node", [{"delay": 0.05}], indirect=True)
+def test_delay(node):
+    _, dev = node
+    start = time.perf_counter()
+    dev.read_entry(0x1017, 0)
+    assert time.perf_counter() - start >= 0.05
+
+
+@pytest.mark.parametrize(
+    "node", [{"aborts": [(0x2000, 0)], "abort_code": 0x06010000}], indirect=True
+)
+def test_aborted_entry(node):
+    sim, dev = node
+    with pytest.raises(canopen.SdoAbortedError) as err:
+        dev.read_entry(0x2000, 0)
+    assert err.value.code == 0x06010000
+    assert sim.injected_aborts[1] == 1
+    dev.read_entry(0x2001, 0)
+    assert sim.injected_aborts[1] == 1
+
+
+@pytest.mark.parametrize("node", [{"abort_rate": 1.0}], indirect=True)
+def test_abort_rate(node):
+    sim, dev = node
+    for index in [0x1017, 0x2000]:
+        with pytest.raises(canopen.SdoAbortedError):
+            dev.read_entry(index, 0)
+    assert sim.injected_aborts[1] == 2
@@ -0,0 +1,67 @@
+"""
+Tests of the modules loaded by the headless commands
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+YACC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "yacc")
+# modules that a headless command must not load
+EXCLUDED = ["tkinter", "gui", "tomli_w", "tqdm", "numpy"]
+# the command runs in a new interpreter, with a simulated node on its bus
+COMMAND = """
+import json
+import sys
+
+sys.path.insert(0, {yacc_dir!r})
+from simulator import Simulator
+
+simulator = Simulator({eds!r}, channel={channel!r}, heartbeat=50)
+simulator.start()
+sys.argv = ["yacc.py"] + {args!r}
+import yacc
+
+try:
+    yacc.main()
+except SystemExit as err:
+    code = err.code
+simulator.stop()
+print(json.dumps([code, [x for x in {excluded!r} if x in sys.modules]]))
+"""
+
+
+@pytest.mark.parametrize(
+    "args",
+    [["--version"], ["save"], ["default"], ["write", "1017=500"]],
+)
+def test_headless_imports(eds, channel, workdir, args):
+    (workdir / "config.toml").write_text(
+        f'[object_dictionary]\nfilename = "{eds}"\n'
+        f'[can]\ninterface = "virtual"\nchannel = "{channel}"\n'
+        "baudrate = 250\nnodeid = 1\n",
+        encoding="utf-8",
+    )
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            COMMAND.format(
+                yacc_dir=YACC_DIR,
+                eds=eds,
+                channel=channel,
+                args=args,
+                excluded=EXCLUDED,
+            ),
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    code, loaded = json.loads(result.stdout.splitlines()[-1])
+    if args == ["write", "1017=500"]:
+        assert code == 0, result.stdout
+    assert loaded == []
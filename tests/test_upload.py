@@ -0,0 +1,165 @@
+"""
+Tests of the dcf upload
+"""
+
+import os
+
+import canopen
+import pytest
+
+# local module
+from device import Device
+import idcache
+import odcache
+from simulator import Simulator
+
+
+def upload(device, filename="upload.dcf"):
+    """
+    upload a dcf from the device
+    """
+    for _ in device.upload_dcf(True, filename=filename):
+        pass
+
+
+# an object the upload must not read
+WRITE_ONLY_OBJECT = """
+[3200]
+ParameterName=Command
+ObjectType=0x7
+DataType=0x0006
+AccessType=wo
+PDOMapping=0
+"""
+
+
+@pytest.fixture(scope="module")
+def eds(eds, tmp_path_factory) -> str:
+    """
+    the sample object dictionary with a write only object
+    """
+    path = tmp_path_factory.mktemp("eds") / "sample.eds"
+    with open(eds, encoding="utf-8") as f:
+        path.write_text(f.read() + WRITE_ONLY_OBJECT, encoding="utf-8")
+    return str(path)
+
+
+def values(filename) -> dict[tuple[int, int], object]:
+    """
+    values of the entries of a dcf
+    """
+    result = {}
+    for obj in canopen.import_od(filename).values():
+        entries = (
+            obj.values()
+            if isinstance(obj, canopen.objectdictionary.ODRecord)
+            else [obj]
+        )
+        for entry in entries:
+            result[(entry.index, entry.subindex)] = entry.value
+    return result
+
+
+def test_upload_without_identity_cache(
+    simulator, device
+):  # pylint: disable=unused-argument
+    upload(device)
+    assert os.path.isfile("upload.dcf")
+    assert not os.path.exists(odcache.cache_dir("identity"))
+
+
+def test_upload_with_identity_cache(simulator, device):
+    device.set_identity_cache(True)
+    upload(device)
+    names = os.listdir(odcache.cache_dir("identity"))
+    assert len(names) == 1 and not names[0].startswith("None")
+    requests = simulator.sdo_requests[1]
+    upload(device, "again.dcf")
+    assert device.get_identity_cache_hits() > 0
+    assert simulator.sdo_requests[1] - requests < requests
+
+
+def test_store_refuses_missing_key():
+    with pytest.raises(ValueError):
+        idcache.store(None, {(0x1000, 0): b"\x00"})
+
+
+def test_dcf_round_trip(simulator, device):
+    simulator.nodes[1].set_data(0x2000, 0, (1234).to_bytes(2, "little"))
+    upload(device)
+    uploaded = values("upload.dcf")
+    assert uploaded[(0x2000, 0)] == 1234
+    simulator.nodes[1].set_data(0x2000, 0, (4321).to_bytes(2, "little"))
+    simulator.nodes[1].set_data(0x1017, 0, (777).to_bytes(2, "little"))
+    for _ in device.download_dcf("upload.dcf", True):
+        pass
+    upload(device, "again.dcf")
+    assert values("again.dcf") == uploaded
+
+
+def test_resume_after_abort(eds, channel):
+    sim = Simulator(eds, channel=channel, aborts=[(0x2005, 0)])
+    sim.start()
+    dev = Device(filename=eds, interface="virtual", channel=channel)
+    dev.connect()
+    try:
+        with pytest.raises(Exception, match="0x2005 0x00"):
+            upload(dev)
+        assert os.path.isfile(dev.get_upload_journal())
+        assert not os.path.exists("upload.dcf")
+        interrupted = sim.sdo_requests[1]
+        sim.stop()
+        sim = Simulator(eds, channel=channel)
+        sim.start()
+        for _ in dev.upload_dcf(True, filename="upload.dcf", resume=True):
+            pass
+        resumed = sim.sdo_requests[1]
+        assert not os.path.exists(dev.get_upload_journal())
+        upload(dev, "full.dcf")
+        full = sim.sdo_requests[1] - resumed
+        # the entries read before the abort are not read again, only the
+        # aborted one and the block transfer probe of the new connection
+        assert resumed <= full - interrupted + 5
+        assert values("upload.dcf") == values("full.dcf")
+    finally:
+        dev.disconnect()
+        sim.stop()
+
+
+def test_upload_plan(simulator, device, eds):
+    od = canopen.import_od(eds)
+    entries = [
+        entry
+        for obj in od.values()
+        for entry in (
+            obj.values()
+            if isinstance(obj, canopen.objectdictionary.ODRecord)
+            else [obj]
+        )
+    ]
+    const = [entry for entry in entries if entry.access_type == "const"]
+    assert const
+    requests = simulator.sdo_requests[1]
+    upload(device)
+    reads = len(entries) - len(const) - 1
+    assert device.get_objdict_elements(upload=True) == reads
+    assert "0x3200" not in device.get_metrics().to_dict()["nodes"]["1"]["upload"]
+    assert simulator.sdo_requests[1] - requests >= reads
+    uploaded = values("upload.dcf")
+    for entry in const:
+        assert uploaded[(entry.index, entry.subindex)] == entry.default
+
+
+def test_collect_aborts(eds, channel):
+    sim = Simulator(eds, channel=channel, aborts=[(0x2000, 0), (0x2001, 0)])
+    sim.start()
+    dev = Device(filename=eds, interface="virtual", channel=channel)
+    dev.connect()
+    try:
+        for _ in dev.upload_dcf(True, filename="upload.dcf", collect_aborts=True):
+            pass
+    finally:
+        dev.disconnect()
+        sim.stop()
+    assert dev.get_upload_aborts() == [(0x2000, 0, 0x08000000), (0x2001, 0, 0x08000000)]
+    assert os.path.isfile("upload.dcf")
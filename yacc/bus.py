@@ -0,0 +1,181 @@
+"""
+Module for the interaction with several devices on the same CAN bus
+"""
+
+import concurrent.futures
+import logging
+import time
+
+# local module
+from device import Device
+from metrics import Metrics
+
+
+def parse_nodeids(text: str) -> list[int]:
+    """
+    function to get the list of node ids from a string like "1,2,10-20"
+    """
+    nodeids = []
+    for item in text.split(","):
+        item = item.strip()
+        if item == "":
+            continue
+        if "-" in item:
+            first, last = item.split("-", 1)
+            nodeids.extend(range(int(first, 0), int(last, 0) + 1))
+        else:
+            nodeids.append(int(item, 0))
+    for nodeid in nodeids:
+        if not 1 <= nodeid <= 127:
+            raise ValueError(f"node id {nodeid} out of range")
+    return list(dict.fromkeys(nodeids))
+
+
+class Bus:
+    """
+    class to drive several devices sharing a single CAN network
+
+    Every device has its own worker thread, so there is one SDO transfer in
+    flight per node and the bus is not left idle waiting for a single node.
+    """
+
+    def __init__(self, nodeids: list[int] | None = None, **kwargs):
+        """
+        the keyword arguments are the Device ones, shared by all the nodes
+        """
+        if not nodeids:
+            nodeids = [1]
+        self.devices = {nodeid: Device(nodeid=nodeid, **kwargs) for nodeid in nodeids}
+        self.metrics = Metrics()
+        for device in self.devices.values():
+            device.set_metrics(self.metrics)
+
+    def connect(self):
+        """
+        connect all the devices to the same network
+        """
+        first, *others = self.devices.values()
+        first.connect()
+        try:
+            for device in others:
+                device.connect(first.get_network())
+        except Exception as err:
+            logging.debug(err)
+            first.disconnect()
+            raise err
+
+    def disconnect(self):
+        """
+        disconnect all the devices and then the network
+        """
+        first, *others = self.devices.values()
+        for device in others:
+            device.disconnect()
+        first.disconnect()
+
+    def get_objdict_elements(self, filename: str | None = None, upload=False):
+        """
+        function to get the number of elements handled for each node
+        """
+        return next(iter(self.devices.values())).get_objdict_elements(filename, upload)
+
+    def __run(self, operation, progress=None) -> dict[int, Exception | None]:
+        """
+        method to run the operation on all the devices concurrently
+        """
+
+        def worker(nodeid):
+            for _ in operation(self.devices[nodeid]):
+                if progress is not None:
+                    progress(nodeid)
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(self.devices)
+        ) as executor:
+            futures = {
+                nodeid: executor.submit(worker, nodeid) for nodeid in self.devices
+            }
+        results = {}
+        for nodeid, future in futures.items():
+            results[nodeid] = future.exception()
+            if results[nodeid] is not None:
+                logging.debug("node %d: %s", nodeid, results[nodeid])
+        return results
+
+    def upload_dcf(
+        self, progress=None, resume=False, collect_aborts=False
+    ) -> dict[int, Exception | None]:
+        """
+        function to upload a dcf file from every node
+
+        The progress callback is called with the node id after every entry;
+        the result is the exception raised by each node, None on success.
+        """
+        timestamp = time.strftime("%y%m%d-%H%M%S", time.localtime())
+        return self.__run(
+            lambda device: device.upload_dcf(
+                True,
+                filename=f"upload_{timestamp}_node{device.get_nodeid()}.dcf",
+                resume=resume,
+                collect_aborts=collect_aborts,
+            ),
+            progress,
+        )
+
+    def download_dcf(
+        self,
+        filename: str,
+        progress=None,
+        diff=False,
+        snapshot: str | None = None,
+        resume=False,
+        verify=False,
+        verify_attempts=2,
+    ) -> dict[int, Exception | None]:
+        """
+        function to download the same dcf file to every node
+
+        The progress callback is called with the node id after every entry;
+        the result is the exception raised by each node, None on success.
+        The {nodeid} of the snapshot file name is replaced by the node id,
+        e.g. upload_240101-120000_node{nodeid}.dcf.
+        """
+        return self.__run(
+            lambda device: device.download_dcf(
+                filename,
+                True,
+                diff=diff,
+                snapshot=(
+                    snapshot.replace("{nodeid}", str(device.get_nodeid()))
+                    if snapshot
+                    else snapshot
+                ),
+                resume=resume,
+                verify=verify,
+                verify_attempts=verify_attempts,
+            ),
+            progress,
+        )
+
+    def flash(
+        self,
+        filename: str,
+        progress=None,
+        program: int = 1,
+        software_id: int | None = None,
+    ) -> dict[int, Exception | None]:
+        """
+        function to flash the same firmware image to every node
+
+        The progress callback is called with the node id, the bytes written
+        and the image size; the result is the exception raised by each node,
+        None on success.
+        """
+
+        def operation(device):
+            for done, size in device.flash(filename, program, software_id):
+                if progress is not None:
+                    progress(device.get_nodeid(), done, size)
+                yield
+
+        return self.__run(operation)
@@ -2,13 +2,109 @@
 Module for device interaction
 """
 
+import array
+import asyncio
+import concurrent.futures
 import dataclasses
+import io
 import logging
+import mmap
+import os
+import queue
 import struct
+import threading
 import time
 
 # requirements
 import canopen
+from canopen.objectdictionary import DATA_TYPES, datatypes
+from canopen.sdo.constants import (
+    BLOCK_SIZE_SPECIFIED,
+    CRC_SUPPORTED,
+    EXPEDITED,
+    INITIATE_BLOCK_TRANSFER,
+    NO_MORE_DATA,
+    REQUEST_ABORTED,
+    REQUEST_BLOCK_UPLOAD,
+    REQUEST_DOWNLOAD,
+    REQUEST_SEGMENT_UPLOAD,
+    REQUEST_UPLOAD,
+    RESPONSE_ABORTED,
+    RESPONSE_BLOCK_UPLOAD,
+    RESPONSE_DOWNLOAD,
+    RESPONSE_SEGMENT_UPLOAD,
+    RESPONSE_UPLOAD,
+    SDO_STRUCT,
+    SIZE_SPECIFIED,
+    START_BLOCK_UPLOAD,
+    TOGGLE_BIT,
+)
+
+# local module
+import idcache
+from idcache import IDENTITY_INDEX
+import odcache
+from journal import Journal
+from lookup import Entry, ObjectTable
+from metrics import Metrics
+from policy import SdoPolicy
+
+# data types that are worth a block transfer when uploaded
+BLOCK_TRANSFER_TYPES = (
+    datatypes.VISIBLE_STRING,
+    datatypes.OCTET_STRING,
+    datatypes.UNICODE_STRING,
+    datatypes.DOMAIN,
+)
+# minimum size to download with a block transfer: segmented transfers of up to
+# 4 segments are not slower than initiate, block and end of a block transfer;
+# it is also the protocol switch threshold of the block uploads
+BLOCK_TRANSFER_MIN_SIZE = 28
+# single frame upload requests sent without waiting for the previous response
+PIPELINE_DEPTH = 8
+# bytes of a streamed transfer kept in memory, and between progress updates
+DOMAIN_CHUNK = 65536
+# response timeout of the program control commands (e.g. clear of the flash),
+# in seconds
+PROGRAM_CONTROL_TIMEOUT = 30.0
+# program control (0x1F51) commands
+PROGRAM_STOP = 0
+PROGRAM_START = 1
+PROGRAM_CLEAR = 3
+# maximum number of bits mapped in a PDO
+PDO_BITS = 64
+# minimum wait for a sample of a monitored TPDO, in seconds
+MONITOR_TIMEOUT = 1.0
+
+# NumPy types of the fixed size data types, decoded at once by DataBatch
+NUMPY_TYPES = {
+    datatypes.BOOLEAN: "?",
+    datatypes.INTEGER8: "i1",
+    datatypes.INTEGER16: "<i2",
+    datatypes.INTEGER32: "<i4",
+    datatypes.INTEGER64: "<i8",
+    datatypes.UNSIGNED8: "u1",
+    datatypes.UNSIGNED16: "<u2",
+    datatypes.UNSIGNED32: "<u4",
+    datatypes.UNSIGNED64: "<u8",
+    datatypes.REAL32: "<f4",
+    datatypes.REAL64: "<f8",
+}
+
+INTERFACES = ["peak", "kvaser", "ixxat", "virtual", "socketcan", "udp_multicast"]
+
+
+def can_interface(interface: str) -> tuple[str, str | int]:
+    """
+    function to get the python-can interface and its default channel
+    """
+    if interface == "peak":
+        return "pcan", "PCAN_USBBUS1"
+    if interface == "socketcan":
+        return "socketcan", "vcan0"
+    if interface == "udp_multicast":
+        return "udp_multicast", "239.74.163.2"
+    return interface, 0
 
 
 @dataclasses.dataclass
@@ -25,6 +121,227 @@ class Data:
     length: int = 1
 
 
+def decode(data_type: int, raw: bytes):
+    """
+    function to convert the raw value of an entry given its data type
+    """
+    struct_type = canopen.objectdictionary.ODVariable.STRUCT_TYPES.get(data_type)
+    if struct_type is not None and len(raw) == struct_type.size:
+        return struct_type.unpack(raw)[0]
+    if data_type == datatypes.VISIBLE_STRING:
+        return raw.rstrip(b"\x00").decode("ascii", errors="ignore")
+    if data_type == datatypes.UNICODE_STRING:
+        return raw.rstrip(b"\x00").decode("utf_16_le", errors="ignore")
+    return raw.hex()
+
+
+@dataclasses.dataclass
+class DataBatch:
+    """
+    class to have the raw values of many entries in a single buffer
+
+    Every column has an item per entry: the raw value of the entry is
+    buffer[offset:offset + length], the error is None if it has been read.
+    """
+
+    index: array.array = dataclasses.field(default_factory=lambda: array.array("H"))
+    subindex: array.array = dataclasses.field(default_factory=lambda: array.array("B"))
+    data_type: array.array = dataclasses.field(default_factory=lambda: array.array("H"))
+    offset: array.array = dataclasses.field(default_factory=lambda: array.array("I"))
+    length: array.array = dataclasses.field(default_factory=lambda: array.array("I"))
+    error: list = dataclasses.field(default_factory=list)
+    buffer: bytearray = dataclasses.field(default_factory=bytearray)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def append(self, index, subindex, data_type, raw: bytes, error=None):
+        """
+        method to add an entry, with an empty raw value if it has an error
+        """
+        self.index.append(index)
+        self.subindex.append(subindex)
+        self.data_type.append(data_type)
+        self.offset.append(len(self.buffer))
+        self.length.append(len(raw))
+        self.error.append(error)
+        self.buffer += raw
+
+    def raw(self, position: int) -> bytes:
+        """
+        method to get the raw value of an entry
+        """
+        offset = self.offset[position]
+        return bytes(self.buffer[offset : offset + self.length[position]])
+
+    def values(self) -> list:
+        """
+        method to get the decoded values, None for the entries with an error
+
+        With NumPy the entries of a fixed size type are decoded all at once,
+        one array operation per data type. NumPy is imported here, so that
+        the commands not decoding a batch do not load it.
+        """
+        try:
+            import numpy  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            numpy = None
+        values = [None] * len(self)
+        decoded = set()
+        if numpy is not None and len(self):
+            buffer = numpy.frombuffer(bytes(self.buffer), dtype=numpy.uint8)
+            data_type = numpy.asarray(self.data_type)
+            length = numpy.asarray(self.length)
+            offset = numpy.asarray(self.offset, dtype=numpy.int64)
+            for code, dtype in NUMPY_TYPES.items():
+                dtype = numpy.dtype(dtype)
+                positions = numpy.flatnonzero(
+                    (data_type == code) & (length == dtype.itemsize)
+                )
+                if not positions.size:
+                    continue
+                raws = buffer[offset[positions, None] + numpy.arange(dtype.itemsize)]
+                for position, value in zip(
+                    positions.tolist(), raws.view(dtype).ravel().tolist()
+                ):
+                    values[position] = value
+                decoded.update(positions.tolist())
+        for position in range(len(self)):
+            if position not in decoded and self.error[position] is None:
+                values[position] = decode(self.data_type[position], self.raw(position))
+        return values
+
+    def to_columns(self) -> dict[str, list]:
+        """
+        method to get the entries as columns of json-ready values
+        """
+        return {
+            "index": [f"0x{index:04X}" for index in self.index],
+            "subindex": [f"0x{subindex:02X}" for subindex in self.subindex],
+            "raw": [
+                None if error is not None else self.raw(position).hex()
+                for position, error in enumerate(self.error)
+            ],
+            "value": self.values(),
+            "error": list(self.error),
+        }
+
+
+class BlockUploadStream(canopen.sdo.client.BlockUploadStream):
+    """
+    block upload stream with a configurable block size and a protocol switch
+    threshold, so that the node can answer a short object with a regular upload
+
+    After such a switch the object is read segment by segment and switched is
+    true.
+    """
+
+    # the initiate of canopen sends a protocol switch threshold of 0
+    # pylint: disable-next=super-init-not-called
+    def __init__(self, sdo_client, index, subindex=0, blksize=127):
+        self.blksize = blksize
+        self.sdo_client = sdo_client
+        self.pos = 0
+        self._done = False
+        self._crc = sdo_client.crc_cls()
+        self._server_crc = None
+        self._ackseq = 0
+        self._error = False
+        self.switched = False
+        self.__index = index
+        self.__subindex = subindex
+        self.__toggle = 0
+        self.__expedited = None
+        request = struct.pack(
+            "<BHBBBxx",
+            REQUEST_BLOCK_UPLOAD | INITIATE_BLOCK_TRANSFER | CRC_SUPPORTED,
+            index,
+            subindex,
+            blksize,
+            BLOCK_TRANSFER_MIN_SIZE,
+        )
+        response = sdo_client.request_response(request)
+        res_command, res_index, res_subindex = SDO_STRUCT.unpack_from(response)
+        if res_index != index or res_subindex != subindex:
+            self._error = True
+            raise canopen.SdoCommunicationError(
+                f"node answered 0x{res_index:04X}:{res_subindex:02X} instead of "
+                f"0x{index:04X}:{subindex:02X}"
+            )
+        if res_command & 0xE0 == RESPONSE_UPLOAD:
+            self.switched = True
+            if res_command & SIZE_SPECIFIED:
+                (self.size,) = struct.unpack_from("<L", response, 4)
+            if res_command & EXPEDITED:
+                self.__expedited = response[4:8]
+                if res_command & SIZE_SPECIFIED:
+                    self.size = 4 - ((res_command >> 2) & 0x3)
+                    self.__expedited = self.__expedited[: self.size]
+            return
+        if res_command & 0xE0 != RESPONSE_BLOCK_UPLOAD:
+            self.__abort(0x05040001)
+            raise canopen.SdoCommunicationError(
+                f"unexpected response 0x{res_command:02X}"
+            )
+        if res_command & BLOCK_SIZE_SPECIFIED:
+            (self.size,) = struct.unpack_from("<L", response, 4)
+        self.crc_supported = bool(res_command & CRC_SUPPORTED)
+        request = bytearray(8)
+        request[0] = REQUEST_BLOCK_UPLOAD | START_BLOCK_UPLOAD
+        sdo_client.send_request(request)
+
+    def __abort(self, code: int):
+        """
+        method to abort the transfer of the entry
+        """
+        self._error = True
+        self.sdo_client.send_request(
+            struct.pack("<BHBL", REQUEST_ABORTED, self.__index, self.__subindex, code)
+        )
+
+    def read(self, size=-1) -> bytes:
+        """
+        method to read a segment, or all the data if size is negative
+        """
+        if not self.switched:
+            return super().read(size)
+        if self._done:
+            return b""
+        if size is None or size < 0:
+            return self.readall()
+        if self.__expedited is not None:
+            data = self.__expedited
+            self._done = True
+        else:
+            request = bytearray(8)
+            request[0] = REQUEST_SEGMENT_UPLOAD | self.__toggle
+            response = self.sdo_client.request_response(request)
+            res_command = response[0]
+            if res_command & 0xE0 != RESPONSE_SEGMENT_UPLOAD:
+                self.__abort(0x05040001)
+                raise canopen.SdoCommunicationError(
+                    f"unexpected response 0x{res_command:02X}"
+                )
+            if res_command & TOGGLE_BIT != self.__toggle:
+                self.__abort(0x05030000)
+                raise canopen.SdoCommunicationError("toggle bit mismatch")
+            data = response[1 : 8 - ((res_command >> 1) & 0x7)]
+            self.__toggle ^= TOGGLE_BIT
+            self._done = bool(res_command & NO_MORE_DATA)
+        self.pos += len(data)
+        return bytes(data)
+
+    def close(self):
+        """
+        method to end the transfer
+        """
+        if self.switched:
+            # a regular upload has no end of transfer
+            io.RawIOBase.close(self)
+        else:
+            super().close()
+
+
 class Device:
     """
     class to define the device
@@ -36,6 +353,13 @@ class Device:
         baudrate: int = 250,
         nodeid: int = 1,
         interface: str = "peak",
+        nmt_timeout: float = 2,
+        block_transfer: bool = True,
+        block_size: int = 127,
+        channel: str | int | None = None,
+        sdo_policy: dict | None = None,
+        identity_cache: bool = False,
+        pipeline_depth: int = PIPELINE_DEPTH,
     ):
 
         if filename == "":
@@ -44,17 +368,395 @@ class Device:
             self.__filename = filename
         self.__baudrate = baudrate
         self.__nodeid = nodeid
-        if interface not in ["peak", "kvaser", "ixxat"]:
+        if interface not in INTERFACES:
             raise Exception(  # pylint: disable=broad-exception-raised
                 "interface not available"
             )
         self.set_interface(interface)
+        if channel is not None:
+            self.set_channel(channel)
         self.__network = None
+        self.__network_owner = True
         self.__node = None
+        self.__lookup = None
+        # requests of the last pipelined batch not answered in time
+        self.__pipeline_unanswered = 0
+        self.__monitor_tpdo = None
+        self.__software_id = None
+        self.__nmt_timeout = nmt_timeout
+        self.__nmt_state = None
+        self.__nmt_update = threading.Condition()
+        self.__skipped_writes = 0
+        self.__download_journal = None
+        self.__upload_aborts = []
+        self.__identity_cache = identity_cache
+        self.__identity_cache_refresh = False
+        self.__identity_cache_hits = 0
+        self.__block_transfer = block_transfer
+        self.__block_size = block_size
+        self.__block_supported = None
+        self.__metrics = Metrics()
+        self.__transfer_retries = 0
+        self.__sdo_policy = SdoPolicy(**(sdo_policy or {}))
+        self.__pipeline_depth = pipeline_depth
+        self.__written = None
+        self.__verify_mismatches = []
 
-    def __pdo_enable(self, index):
+    def __on_heartbeat(self, state):
         """
-        method to enable the PDO, and return the previous state of the pdo
+        heartbeat callback to keep track of the NMT state of the node
+        """
+        if state == 0:
+            # boot-up, the node goes to PRE-OPERATIONAL automatically
+            state = 127
+        with self.__nmt_update:
+            self.__nmt_state = canopen.nmt.NMT_STATES.get(state, state)
+            self.__nmt_update.notify_all()
+
+    def __nmt_set_state(self, state):
+        """
+        method to bring the node to the NMT state, only if it is not already there
+        """
+        if self.__nmt_state == state:
+            return
+        with self.__nmt_update:
+            self.__nmt_state = None
+            self.__node.nmt.state = state
+            reached = self.__nmt_update.wait_for(
+                lambda: self.__nmt_state == state, timeout=self.__nmt_timeout
+            )
+        if not reached:
+            raise Exception(  # pylint: disable=broad-exception-raised
+                f"the node did not reach the {state} state in {self.__nmt_timeout} s"
+            )
+
+    def __nmt_current_state(self) -> str:
+        """
+        method to get the NMT state of the node, waiting for a heartbeat if
+        it is not known yet
+        """
+        with self.__nmt_update:
+            known = self.__nmt_update.wait_for(
+                lambda: self.__nmt_state is not None, timeout=self.__nmt_timeout
+            )
+            state = self.__nmt_state
+        if not known:
+            raise Exception(  # pylint: disable=broad-exception-raised
+                f"no heartbeat from the node in {self.__nmt_timeout} s, "
+                "its NMT state cannot be restored"
+            )
+        return state
+
+    def __block_transfer_failed(self, err):
+        """
+        method to fall back to segmented transfer when block transfer fails
+        """
+        logging.info("block transfer failed, falling back to segmented: %s", err)
+        self.__transfer_retries += 1
+        if isinstance(err, canopen.SdoCommunicationError) or (
+            isinstance(err, canopen.SdoAbortedError) and err.code == 0x05040001
+        ):
+            # the node does not support block transfer
+            if not self.__block_supported:
+                self.__block_supported = False
+
+    def __record_transfer(self, direction, index, subindex, start, size=0, err=None):
+        """
+        method to add a SDO transfer started at start to the metrics
+        """
+        self.__metrics.record(
+            self.__nodeid,
+            direction,
+            index,
+            subindex,
+            time.perf_counter() - start,
+            size,
+            self.__transfer_retries,
+            err.code if isinstance(err, canopen.SdoAbortedError) else None,
+            err is not None,
+        )
+
+    def __sdo_transfer(
+        self, index, subindex, data: bytes | None = None, slow=False, timeout=None
+    ):
+        """
+        method to read (data None) or write an entry, measuring the transfer
+        and repeating it as the SDO policy allows
+
+        A slow transfer (e.g. store parameters) always waits the maximum
+        timeout, or the given one, and is not taken as a round-trip time
+        sample.
+        """
+        slow = slow or timeout is not None
+        direction = "upload" if data is None else "download"
+        start = time.perf_counter()
+        self.__transfer_retries = 0
+        attempt = 0
+        while True:
+            if timeout is not None:
+                self.__node.sdo.RESPONSE_TIMEOUT = timeout
+            elif slow:
+                self.__node.sdo.RESPONSE_TIMEOUT = self.__sdo_policy.max_timeout
+            else:
+                self.__node.sdo.RESPONSE_TIMEOUT = self.__sdo_policy.timeout(
+                    self.__transfer_kind(index, subindex, data)
+                )
+            attempt_start = time.perf_counter()
+            try:
+                if data is None:
+                    result = self.__sdo_upload_transfer(index, subindex)
+                else:
+                    result = self.__sdo_download_transfer(index, subindex, data)
+            except Exception as err:
+                wait = None
+                if isinstance(
+                    err, (canopen.SdoAbortedError, canopen.SdoCommunicationError)
+                ):
+                    wait = self.__sdo_policy.retry(err, attempt)
+                if wait is None:
+                    self.__record_transfer(direction, index, subindex, start, err=err)
+                    raise
+                logging.info(
+                    "retrying 0x%04X 0x%02X in %.3f s: %s", index, subindex, wait, err
+                )
+                attempt += 1
+                self.__transfer_retries += 1
+                time.sleep(wait)
+                continue
+            self.__sdo_policy.answered()
+            size = len(result if data is None else data)
+            if attempt == 0 and size <= 4 and not slow:
+                # an expedited transfer is a single round trip
+                self.__sdo_policy.update(time.perf_counter() - attempt_start)
+            self.__record_transfer(direction, index, subindex, start, size)
+            return result
+
+    def __transfer_kind(self, index, subindex, data: bytes | None = None) -> str:
+        """
+        method to get the kind of a transfer, for its minimum timeout
+        """
+        block = self.__block_transfer and self.__block_supported is not False
+        if data is not None:
+            if len(data) <= 4:
+                return "write"
+            return (
+                "block"
+                if block and len(data) >= BLOCK_TRANSFER_MIN_SIZE
+                else "segmented"
+            )
+        var = self.__node.object_dictionary.get_variable(index, subindex)
+        if var is not None and block and var.data_type in BLOCK_TRANSFER_TYPES:
+            return "block"
+        if var is None or var.data_type in DATA_TYPES or len(var) > 32:
+            return "segmented"
+        return "read"
+
+    def __sdo_upload(self, index, subindex) -> bytes:
+        """
+        method to read an entry
+        """
+        return self.__sdo_transfer(index, subindex)
+
+    def __sdo_download(self, index, subindex, data: bytes, slow=False, timeout=None):
+        """
+        method to write an entry
+        """
+        self.__sdo_transfer(index, subindex, data, slow, timeout)
+
+    def __sdo_pipelined(self, direction, requests) -> dict[tuple[int, int], bytes]:
+        """
+        method to send many single frame requests, as (index, subindex, frame,
+        size of the data written), keeping up to pipeline_depth of them in
+        flight
+
+        The responses are matched by index and subindex; the aborted requests
+        and the ones not answered in time are missing from the result, to be
+        transferred again one at a time. After a timeout the late responses
+        are still taken for one more timeout, so that none is left to be
+        taken as the response of the next request.
+        """
+        sdo = self.__node.sdo
+        try:
+            while True:
+                sdo.responses.get_nowait()
+        except queue.Empty:
+            pass
+        self.__pipeline_unanswered = 0
+        results = {}
+        pending = {}
+        requests = iter(requests)
+
+        def send_next():
+            request = next(requests, None)
+            if request is not None:
+                index, subindex, frame, size = request
+                pending[(index, subindex)] = (time.perf_counter(), size)
+                sdo.send_request(frame)
+
+        for _ in range(max(self.__pipeline_depth, 1)):
+            send_next()
+        draining = False
+        while pending:
+            try:
+                response = sdo.responses.get(
+                    timeout=self.__sdo_policy.timeout(
+                        "read" if direction == "upload" else "write"
+                    )
+                )
+            except queue.Empty:
+                if draining:
+                    break
+                logging.info("%d pipelined %ss not answered", len(pending), direction)
+                self.__pipeline_unanswered = len(pending)
+                draining = True
+                continue
+            self.__sdo_policy.answered()
+            command, index, subindex = struct.unpack_from("<BHB", response)
+            if (index, subindex) not in pending:
+                continue
+            start, size = pending.pop((index, subindex))
+            rtt = time.perf_counter() - start
+            if command == RESPONSE_ABORTED:
+                code = struct.unpack_from("<L", response, 4)[0]
+                self.__metrics.record(
+                    self.__nodeid, direction, index, subindex, rtt, 0, 0, code, True
+                )
+            elif command & 0xE0 == RESPONSE_UPLOAD and not command & EXPEDITED:
+                # a segmented upload is not continued, it is read again later
+                sdo.send_request(
+                    struct.pack("<BHBL", REQUEST_ABORTED, index, subindex, 0x08000000)
+                )
+            else:
+                if command & 0xE0 == RESPONSE_UPLOAD:
+                    size = 4
+                    if command & SIZE_SPECIFIED:
+                        size -= (command >> 2) & 0x3
+                results[(index, subindex)] = response
+                self.__metrics.record(
+                    self.__nodeid, direction, index, subindex, rtt, size
+                )
+            if not draining:
+                send_next()
+        return results
+
+    def __sdo_upload_pipelined(self, keys) -> dict[tuple[int, int], bytes]:
+        """
+        method to read many single frame entries (up to 4 bytes), keeping up
+        to pipeline_depth requests in flight
+
+        The entries that are not answered with an expedited upload in time
+        are missing from the result, to be read one at a time.
+        """
+        responses = self.__sdo_pipelined(
+            "upload",
+            (
+                (
+                    index,
+                    subindex,
+                    struct.pack("<BHB4x", REQUEST_UPLOAD, index, subindex),
+                    0,
+                )
+                for index, subindex in keys
+            ),
+        )
+        od = self.__node.object_dictionary
+        results = {}
+        for key, response in responses.items():
+            command = response[0]
+            if command & 0xE0 == RESPONSE_UPLOAD:
+                size = 4
+                if command & SIZE_SPECIFIED:
+                    size -= (command >> 2) & 0x3
+                var = od.get_variable(*key)
+                if var is not None and var.data_type not in DATA_TYPES:
+                    # as SdoClient.upload, some devices send 4 bytes for any type
+                    size = min(size, len(var) // 8)
+                results[key] = response[4 : 4 + size]
+        return results
+
+    def __sdo_download_pipelined(self, entries) -> set[tuple[int, int]]:
+        """
+        method to write many entries of 1 to 4 bytes, as (index, subindex,
+        data), keeping up to pipeline_depth requests in flight
+
+        The written entries are returned, the others are to be written one
+        at a time.
+        """
+        responses = self.__sdo_pipelined(
+            "download",
+            (
+                (
+                    index,
+                    subindex,
+                    struct.pack(
+                        "<BHB",
+                        REQUEST_DOWNLOAD
+                        | EXPEDITED
+                        | SIZE_SPECIFIED
+                        | ((4 - len(data)) << 2),
+                        index,
+                        subindex,
+                    )
+                    + data.ljust(4, b"\x00"),
+                    len(data),
+                )
+                for index, subindex, data in entries
+            ),
+        )
+        return {
+            key
+            for key, response in responses.items()
+            if response[0] == RESPONSE_DOWNLOAD
+        }
+
+    def __sdo_upload_transfer(self, index, subindex) -> bytes:
+        """
+        method to read an entry, with a block transfer for large objects
+        """
+        var = self.__node.object_dictionary.get_variable(index, subindex)
+        if (
+            self.__block_transfer
+            and self.__block_supported is not False
+            and var is not None
+            and var.data_type in BLOCK_TRANSFER_TYPES
+        ):
+            try:
+                with BlockUploadStream(
+                    self.__node.sdo, index, subindex, blksize=self.__block_size
+                ) as stream:
+                    data = stream.read()
+            except (canopen.SdoAbortedError, canopen.SdoCommunicationError) as err:
+                self.__block_transfer_failed(err)
+            else:
+                if not stream.switched:
+                    self.__block_supported = True
+                return data
+        return self.__node.sdo.upload(index, subindex)
+
+    def __sdo_download_transfer(self, index, subindex, data: bytes):
+        """
+        method to write an entry, with a block transfer for large objects
+        """
+        if (
+            self.__block_transfer
+            and self.__block_supported is not False
+            and len(data) >= BLOCK_TRANSFER_MIN_SIZE
+        ):
+            try:
+                with self.__node.sdo.open(
+                    index, subindex, "wb", size=len(data), block_transfer=True
+                ) as fp:
+                    fp.write(data)
+            except (canopen.SdoAbortedError, canopen.SdoCommunicationError) as err:
+                self.__block_transfer_failed(err)
+            else:
+                self.__block_supported = True
+                return
+        self.__node.sdo.download(index, subindex, data)
+
+    def __pdo_communication_idx(self, index):
+        """
+        method to get the communication parameter index of a PDO record
         """
         major = index & 0xFF00
         minor = index & 0x00FF
@@ -62,15 +764,19 @@ class Device:
             transmission_idx = 0x1400
         elif major in [0x1800, 0x1A00]:
             transmission_idx = 0x1800
-        transmission_idx += minor
-        self.__node.nmt.state = "PRE-OPERATIONAL"
-        self.__node.nmt.wait_for_heartbeat()
-        assert self.__node.nmt.state == "PRE-OPERATIONAL"
-        cobid = self.__node.sdo.upload(transmission_idx, 0x01)
+        return transmission_idx + minor
+
+    def __pdo_enable(self, index):
+        """
+        method to enable the PDO, and return the previous state of the pdo
+        """
+        transmission_idx = self.__pdo_communication_idx(index)
+        self.__nmt_set_state("PRE-OPERATIONAL")
+        cobid = self.__sdo_upload(transmission_idx, 0x01)
         cobid_int = int(cobid.hex(), 16)
         if cobid_int & 0x80:
             cobid_enabled = (int(cobid.hex(), 16) & 0xFFFFFF7F).to_bytes(4, "big")
-            cobid = self.__node.sdo.download(transmission_idx, 0x01, cobid_enabled)
+            cobid = self.__sdo_download(transmission_idx, 0x01, cobid_enabled)
             return False
         return True
 
@@ -78,40 +784,30 @@ class Device:
         """
         method to disable the PDO, and return the previous state of the pdo
         """
-        major = index & 0xFF00
-        minor = index & 0x00FF
-        if major in [0x1400, 0x1600]:
-            transmission_idx = 0x1400
-        elif major in [0x1800, 0x1A00]:
-            transmission_idx = 0x1800
-        transmission_idx += minor
-        self.__node.nmt.state = "PRE-OPERATIONAL"
-        self.__node.nmt.wait_for_heartbeat()
-        assert self.__node.nmt.state == "PRE-OPERATIONAL"
-        cobid = self.__node.sdo.upload(transmission_idx, 0x01)
+        transmission_idx = self.__pdo_communication_idx(index)
+        self.__nmt_set_state("PRE-OPERATIONAL")
+        cobid = self.__sdo_upload(transmission_idx, 0x01)
         cobid_int = int(cobid.hex(), 16)
         if not cobid_int & 0x80:
             cobid_disabled = (int(cobid.hex(), 16) | 0x80).to_bytes(4, "big")
-            cobid = self.__node.sdo.download(transmission_idx, 0x01, cobid_disabled)
+            cobid = self.__sdo_download(transmission_idx, 0x01, cobid_disabled)
             return True
         return False
 
     def __pdo_mapping_disable(self, index):
         """
-        method to disable the PDO, and return the previous state of the pdo
+        method to disable the PDO mapping, and return the previous number of
+        mapped objects
         """
         major = index & 0xFF00
         minor = index & 0x00FF
         transmission_idx = major + minor
-        self.__node.nmt.state = "PRE-OPERATIONAL"
-        self.__node.nmt.wait_for_heartbeat()
-        assert self.__node.nmt.state == "PRE-OPERATIONAL"
-        mapped_elements = self.__node.sdo.upload(transmission_idx, 0x00)
+        self.__nmt_set_state("PRE-OPERATIONAL")
+        mapped_elements = self.__sdo_upload(transmission_idx, 0x00)
         mapped_elements_int = int(mapped_elements.hex(), 16)
         if mapped_elements_int:
-            cobid = self.__node.sdo.download(transmission_idx, 0x00, b"\x00")
-            return True
-        return False
+            self.__sdo_download(transmission_idx, 0x00, b"\x00")
+        return mapped_elements_int
 
     def set_objdict(self, objdict):
         """
@@ -133,43 +829,117 @@ class Device:
         """
         self.__nodeid = nodeid
 
+    def set_nmt_timeout(self, nmt_timeout):
+        """
+        method to set the maximum wait for an NMT state transition
+        """
+        self.__nmt_timeout = nmt_timeout
+
+    def set_block_transfer(self, block_transfer: bool, block_size: int = 127):
+        """
+        method to enable the SDO block transfer and to set its block size
+        """
+        self.__block_transfer = block_transfer
+        self.__block_size = block_size
+
+    def set_identity_cache(self, identity_cache: bool, refresh=False):
+        """
+        method to take the read only values of the upload from the cache of
+        the devices with the same identity (0x1018); with refresh the values
+        are read anyway and the cache is updated
+        """
+        self.__identity_cache = identity_cache
+        self.__identity_cache_refresh = refresh
+
+    def set_sdo_policy(self, **kwargs):
+        """
+        method to set the SDO timeout and retry policy, see SdoPolicy
+        """
+        self.__sdo_policy = SdoPolicy(**kwargs)
+
+    def set_metrics(self, metrics: Metrics):
+        """
+        method to set the collector of the SDO metrics, e.g. to share it
+        """
+        self.__metrics = metrics
+
+    def get_metrics(self) -> Metrics:
+        """
+        get the collector of the SDO metrics
+        """
+        return self.__metrics
+
     def set_interface(self, interface):
         """
         method to set the interface
         """
-        if interface == "peak":
-            self.__interface = "pcan"
-            self.__channel = "PCAN_USBBUS1"
-        else:
-            self.__interface = interface
-            self.__channel = 0
+        self.__interface, self.__channel = can_interface(interface)
 
-    def connect(self):
+    def set_channel(self, channel):
+        """
+        method to set the channel of the interface
+        """
+        self.__channel = channel
+
+    def connect(self, network: canopen.Network | None = None):
         """
         connecting function
+
+        If a network is given the node is added to it, so that several
+        devices can share the same CAN bus.
         """
-        try:
-            self.__network = canopen.Network()
-            self.__network.connect(
-                channel=self.__channel,
-                interface=self.__interface,
-                bitrate=self.__baudrate * 1000,
-            )
-        except Exception as err:
-            logging.debug(err)
-            raise err
+        if network is None:
+            try:
+                self.__network = canopen.Network()
+                self.__network.connect(
+                    channel=self.__channel,
+                    interface=self.__interface,
+                    bitrate=self.__baudrate * 1000,
+                )
+            except Exception as err:
+                logging.debug(err)
+                raise err
+            self.__network_owner = True
+        else:
+            self.__network = network
+            self.__network_owner = False
+        if self.__filename:
+            object_dictionary = odcache.import_od(self.__filename, self.__nodeid)
+        else:
+            object_dictionary = None
         self.__node = self.__network.add_node(
-            node=self.__nodeid, object_dictionary=self.__filename
+            node=self.__nodeid, object_dictionary=object_dictionary
         )
         self.__node.object_dictionary.node_id = self.__nodeid
         self.__node.object_dictionary.bitrate = self.__baudrate * 1000
-        self.__node.sdo.RESPONSE_TIMEOUT = 1
+        # the lookup tables are of the object dictionary of the previous node
+        self.__lookup = None
+        self.__sdo_policy.reset()
+        self.__nmt_state = None
+        self.__block_supported = None
+        self.__node.nmt.add_heartbeat_callback(self.__on_heartbeat)
 
     def disconnect(self):
         """
         disconnect the network
         """
-        self.__network.disconnect()
+        if self.__network_owner:
+            self.__network.disconnect()
+        else:
+            del self.__network[self.__nodeid]
+        self.__nmt_state = None
+
+    def get_network(self) -> canopen.Network:
+        """
+        get the network the device is connected to
+        """
+        return self.__network
+
+    def get_nodeid(self) -> int:
+        """
+        get the node id of the device
+        """
+        return self.__nodeid
 
     def read_entry(self, index: int, subindex: int) -> Data:
         """
@@ -178,7 +948,7 @@ class Device:
         logging.info("index = %d, subindex = %d", index, subindex)
         data = Data()
         try:
-            data.bytes = self.__node.sdo.upload(index=index, subindex=subindex)
+            data.bytes = self.__sdo_upload(index, subindex)
         except Exception as err:
             logging.debug(err)
             raise err
@@ -197,148 +967,970 @@ class Device:
         write entry method
         """
         try:
-            self.__node.sdo.download(index, subindex, data)
+            self.__sdo_download(index, subindex, data)
         except Exception as err:
             raise err
 
+    def read_entries(self, entries: list[tuple[int, int]]) -> DataBatch:
+        """
+        read many entries, with the single frame ones pipelined
+
+        An aborted entry has its error set, the other errors are raised.
+        """
+        entries = list(entries)
+        table = self.__table()
+        data_types = []
+        pipelined = {}
+        for key in entries:
+            try:
+                entry = table.entry(*key)
+            except KeyError:
+                entry = None
+            data_types.append(0 if entry is None else entry.data_type)
+            if entry is None or entry.length is not None and entry.length <= 4:
+                pipelined[key] = None
+        raws = self.__sdo_upload_pipelined(pipelined)
+        batch = DataBatch()
+        for (index, subindex), data_type in zip(entries, data_types):
+            raw = raws.get((index, subindex))
+            error = None
+            if raw is None:
+                try:
+                    raw = self.__sdo_upload(index, subindex)
+                except canopen.SdoAbortedError as err:
+                    logging.debug(err)
+                    raw = b""
+                    error = str(err)
+            batch.append(index, subindex, data_type, raw, error)
+        return batch
+
+    def write_entries(self, entries: list[tuple[int, int, bytes]]) -> list[str | None]:
+        """
+        write many entries, as (index, subindex, data), with the single frame
+        ones pipelined, and get the error of every entry (None if written)
+
+        The requests are sent in order, but without waiting for the previous
+        response: entries that depend on each other (e.g. a PDO mapping) are
+        to be written with write_entry. An entry repeated is written once at
+        a time.
+        """
+        entries = list(entries)
+        keys = [(index, subindex) for index, subindex, _data in entries]
+        repeated = {key for key in keys if keys.count(key) > 1}
+        written = self.__sdo_download_pipelined(
+            entry
+            for entry in entries
+            if 1 <= len(entry[2]) <= 4 and entry[:2] not in repeated
+        )
+        errors = []
+        for index, subindex, data in entries:
+            error = None
+            if (index, subindex) not in written or (index, subindex) in repeated:
+                try:
+                    self.__sdo_download(index, subindex, data)
+                except canopen.SdoAbortedError as err:
+                    logging.debug(err)
+                    error = str(err)
+            errors.append(error)
+        return errors
+
+    def __open_domain(self, index, subindex, mode, size=None):
+        """
+        method to open the unbuffered SDO stream of a streamed transfer, a
+        block transfer when the node supports it
+        """
+        sdo = self.__node.sdo
+        # the node may take its time to prepare or store a large object
+        sdo.RESPONSE_TIMEOUT = self.__sdo_policy.max_timeout
+        if self.__block_transfer and self.__block_supported is not False:
+            try:
+                if mode == "rb":
+                    stream = BlockUploadStream(
+                        sdo, index, subindex, blksize=self.__block_size
+                    )
+                else:
+                    stream = sdo.open(
+                        index,
+                        subindex,
+                        mode,
+                        buffering=0,
+                        size=size,
+                        block_transfer=True,
+                    )
+            except (canopen.SdoAbortedError, canopen.SdoCommunicationError) as err:
+                self.__block_transfer_failed(err)
+            else:
+                if not getattr(stream, "switched", False):
+                    self.__block_supported = True
+                return stream
+        return sdo.open(index, subindex, mode, buffering=0, size=size)
+
+    def __abort_stream(self, stream, index, subindex, err: BaseException):
+        """
+        method to abort a streamed transfer that failed or was interrupted
+
+        The abort is sent (unless the node aborted it) and the stream is only
+        marked as closed, so that closing it does not send the end of the
+        transfer and the node does not take the partial data as complete.
+        """
+        if not isinstance(err, canopen.SdoAbortedError):
+            self.__node.sdo.send_request(
+                struct.pack("<BHBL", REQUEST_ABORTED, index, subindex, 0x08000000)
+            )
+        # the segmented download ends on close unless done
+        stream._done = True  # pylint: disable=protected-access
+        io.RawIOBase.close(stream)
+
+    def read_domain(self, index: int, subindex: int, filename: str):
+        """
+        generator streaming an entry (e.g. a DOMAIN) to a file, yielding the
+        bytes read and the size (None if not told by the node) at every
+        DOMAIN_CHUNK bytes and at the end
+
+        Only a chunk is in memory at a time. Closing the generator before the
+        end aborts the transfer.
+        """
+        self.__transfer_retries = 0
+        start = time.perf_counter()
+        done = 0
+        stream = self.__open_domain(index, subindex, "rb")
+        try:
+            with open(filename, "wb") as f:
+                chunk = memoryview(bytearray(DOMAIN_CHUNK))
+                while True:
+                    filled = 0
+                    read = None
+                    # a segment is up to 7 bytes
+                    while read != 0 and filled <= DOMAIN_CHUNK - 7:
+                        read = stream.readinto(chunk[filled:])
+                        filled += read
+                    f.write(chunk[:filled])
+                    done += filled
+                    if read == 0:
+                        break
+                    yield done, stream.size
+            stream.close()
+        except BaseException as err:
+            if not stream.closed:
+                self.__abort_stream(stream, index, subindex, err)
+            if isinstance(err, Exception):
+                self.__record_transfer("upload", index, subindex, start, done, err)
+            raise
+        self.__record_transfer("upload", index, subindex, start, done)
+        yield done, done
+
+    def write_domain(self, index: int, subindex: int, filename: str):
+        """
+        generator streaming a file to an entry (e.g. a DOMAIN), yielding the
+        bytes written and the size at every DOMAIN_CHUNK bytes and at the end
+
+        The file is memory mapped, so it is not loaded in memory. Closing the
+        generator before the end aborts the transfer, the node does not get
+        the end of it.
+        """
+        size = os.path.getsize(filename)
+        if size == 0:
+            raise Exception(  # pylint: disable=broad-exception-raised
+                f"{filename} is empty"
+            )
+        with (
+            open(filename, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data,
+        ):
+            if size <= 4:
+                self.__sdo_download(index, subindex, data[:])
+                yield size, size
+                return
+            self.__transfer_retries = 0
+            start = time.perf_counter()
+            done = 0
+            stream = self.__open_domain(index, subindex, "wb", size)
+            try:
+                while True:
+                    end = min(done + DOMAIN_CHUNK, size)
+                    while done < end:
+                        # a segment is up to 7 bytes, the slice is a copy
+                        done += stream.write(data[done : done + 7])
+                    if done == size:
+                        break
+                    yield done, size
+                stream.close()
+            except BaseException as err:
+                if not stream.closed:
+                    self.__abort_stream(stream, index, subindex, err)
+                if isinstance(err, Exception):
+                    self.__record_transfer(
+                        "download", index, subindex, start, done, err
+                    )
+                raise
+            self.__record_transfer("download", index, subindex, start, done)
+        yield size, size
+
+    def flash(self, filename: str, program: int = 1, software_id: int | None = None):
+        """
+        generator flashing a firmware image, yielding the bytes written and
+        the size as write_domain does
+
+        The program is stopped and cleared with the program control (0x1F51),
+        the image is streamed to the program data (0x1F50) and the program is
+        started again. When the object dictionary has the program software
+        identification (0x1F56) it is read back and, if software_id is given,
+        compared with it. If the image is not completely written (error or
+        generator closed) the transfer is aborted and the program is left
+        stopped and cleared.
+        """
+        self.__software_id = None
+        self.__program_control(program, PROGRAM_STOP)
+        self.__program_control(program, PROGRAM_CLEAR)
+        try:
+            yield from self.write_domain(0x1F50, program, filename)
+        except Exception as err:
+            # the transfer is aborted, the program is not started on a partial image
+            raise Exception(  # pylint: disable=broad-exception-raised
+                f"program {program} left stopped and cleared, the image was not"
+                f" completely written: {err}"
+            ) from err
+        self.__program_control(program, PROGRAM_START)
+        try:
+            self.__table().entry(0x1F56, program)
+        except KeyError:
+            return
+        self.__software_id = int.from_bytes(
+            self.__sdo_upload(0x1F56, program), "little"
+        )
+        if software_id is not None and self.__software_id != software_id:
+            raise Exception(  # pylint: disable=broad-exception-raised
+                f"the software identification is 0x{self.__software_id:08X}"
+                f" instead of 0x{software_id:08X}"
+            )
+
+    def __program_control(self, program, command):
+        """
+        method to send a command to the program control
+        """
+        logging.info("program %d control: %d", program, command)
+        self.__sdo_download(
+            0x1F51, program, bytes([command]), timeout=PROGRAM_CONTROL_TIMEOUT
+        )
+
+    def get_software_id(self) -> int | None:
+        """
+        get the program software identification read after the last flash,
+        None if the device does not have it
+        """
+        return self.__software_id
+
+    def __table(self) -> ObjectTable:
+        """
+        method to get the lookup tables of the object dictionary, built on
+        the first lookup after the dictionary is set
+        """
+        if self.__lookup is None:
+            self.__lookup = ObjectTable(self.__node.object_dictionary)
+            logging.debug("lookup tables of %d objects", len(self.__lookup))
+        return self.__lookup
+
     def get_group_from_idx(self, idx: int) -> str:
         """
         get the group name from the index ref
         """
         group = ""
         try:
-            name = self.__node.object_dictionary[idx].name
-        except Exception as err:  # pylint: disable=broad-exception-caught
+            group = self.__table().name(idx)
+        except KeyError as err:
             logging.debug(err)
-        else:
-            group = name
         return group
 
     def get_group_name_list(self):
         """
         get the list of the index name of the object dictionary
         """
-        names = []
-        self.__node.object_dictionary.values()
-        for obj in self.__node.object_dictionary.values():
-            names.append(obj.name)
-        return names
+        return [name for _index, name, _entries in self.__table().objects]
+
+    def get_objects(self) -> list[tuple[int, str, bool]]:
+        """
+        get the index, name and if it has subindexes of every object of the
+        object dictionary
+        """
+        return self.__table().objects
+
+    def get_entries(self, index: int) -> list[tuple[int, str]]:
+        """
+        get the subindex and name of the entries of an object
+        """
+        return self.__table().entries(index)
+
+    def get_entry(self, index: int, subindex: int) -> Entry:
+        """
+        get the name, data type, length and access type of an entry
+        """
+        return self.__table().entry(index, subindex)
+
+    def search_objects(self, text: str, limit: int | None = None) -> list[int]:
+        """
+        get the indexes of the objects matching an index prefix or a name,
+        best first
+        """
+        return self.__table().search(text, limit)
 
     def get_subidx_names(self, idx_name: str):
         """
         get the list of the subindex name of the object dictionary
         """
-        names = []
-        obj = self.__node.object_dictionary[idx_name]
-        logging.info("%s %s", idx_name, obj)
-        if isinstance(obj, canopen.objectdictionary.ODRecord):
-            for subobj in obj.values():
-                names.append(subobj.name)
-        return names
+        table = self.__table()
+        return [name for _subindex, name in table.entries(table.index(idx_name))]
 
     def idx_from_name(self, name: str) -> str:
         """
         get index from name reference
         """
-        obj = self.__node.object_dictionary[name]
-        return f"{obj.index:X}"
+        return f"{self.__table().index(name):X}"
 
     def get_sub(self, group_name: str, entry_name: str) -> str:
         """
         get the subindex of an entry given the name
         """
-        obj = self.__node.object_dictionary[group_name][entry_name]
-        return f"{obj.subindex:X}"
+        table = self.__table()
+        return f"{table.subindex(table.index(group_name), entry_name):X}"
 
     def get_datatype(self, group_name: str, entry_name: str) -> str:
         """
         get the datatype of an entry given the name
         """
-        obj = self.__node.object_dictionary[group_name]
-        if isinstance(obj, canopen.objectdictionary.ODRecord):
-            obj = obj[entry_name]
-        return obj.data_type
+        table = self.__table()
+        index = table.index(group_name)
+        subindex = table.subindex(index, entry_name) if table.entries(index) else 0
+        return table.entry(index, subindex).data_type
 
-    def download_dcf(self, filename: str, generate_iterator=False):
+    def parse_entry(self, text: str) -> tuple[int, int]:
         """
-        function to download a dcf file
+        get the index and subindex of an entry written as INDEX[:SUBINDEX] in
+        hex or as object name[:entry name], the subindex defaults to 0
+        """
+        table = self.__table()
+        name, _, entry = text.strip().partition(":")
+        try:
+            try:
+                index = table.index(name)
+            except KeyError:
+                index = int(name, 16)
+            if not entry:
+                return index, 0
+            try:
+                return index, table.subindex(index, entry)
+            except KeyError:
+                return index, int(entry, 16)
+        except ValueError as err:
+            raise Exception(  # pylint: disable=broad-exception-raised
+                f"unknown entry {text}"
+            ) from err
+
+    def encode_value(self, index: int, subindex: int, text: str) -> bytes:
+        """
+        get the raw value of an entry from its text: a number (0x... for
+        hex), a string, or hex bytes for the octet strings and domains
+        """
+        var = self.__node.object_dictionary.get_variable(index, subindex)
+        if var is None:
+            raise Exception(  # pylint: disable=broad-exception-raised
+                f"0x{index:04X} 0x{subindex:02X} not in the object dictionary"
+            )
+        try:
+            if var.data_type in datatypes.INTEGER_TYPES:
+                value = int(text, 0)
+            elif var.data_type in datatypes.FLOAT_TYPES:
+                value = float(text)
+            elif var.data_type in [datatypes.VISIBLE_STRING, datatypes.UNICODE_STRING]:
+                value = text
+            else:
+                value = bytes.fromhex(text)
+            return var.encode_raw(value)
+        except Exception as err:
+            raise Exception(  # pylint: disable=broad-exception-raised
+                f"wrong value {text} of 0x{index:04X} 0x{subindex:02X}: {err}"
+            ) from err
+
+    def __decoder(self, index, subindex):
+        """
+        method to get the function converting the raw value of an entry
+        """
+        var = self.__node.object_dictionary.get_variable(index, subindex)
+        if var is None:
+            return bytes.hex
+        return var.decode_raw
+
+    def __monitor_mapping(self, entries) -> list[int] | None:
+        """
+        method to get the TPDO mapping of the entries, None if they cannot
+        be mapped in a single PDO
+        """
+        mapping = []
+        bits = 0
+        for index, subindex in entries:
+            try:
+                entry = self.__table().entry(index, subindex)
+            except KeyError:
+                return None
+            if (
+                not entry.pdo_mappable
+                or entry.length is None
+                or entry.data_type == datatypes.BOOLEAN
+            ):
+                return None
+            bits += entry.length * 8
+            mapping.append((index << 16) | (subindex << 8) | (entry.length * 8))
+        if bits > PDO_BITS:
+            return None
+        return mapping
+
+    def __spare_tpdo(self, tpdo: int | None = None) -> int | None:
+        """
+        method to get the number (from 0) of the TPDO to borrow for the
+        monitor: the given one (from 1), else the first disabled one
+        """
+        od = self.__node.object_dictionary
+        if tpdo:
+            if 0x1800 + tpdo - 1 not in od or 0x1A00 + tpdo - 1 not in od:
+                raise Exception(  # pylint: disable=broad-exception-raised
+                    f"TPDO {tpdo} not in the object dictionary"
+                )
+            return tpdo - 1
+        for number in range(512):
+            if 0x1800 + number not in od or 0x1A00 + number not in od:
+                continue
+            try:
+                cobid = self.__sdo_upload(0x1800 + number, 0x01)
+            except (canopen.SdoAbortedError, canopen.SdoCommunicationError) as err:
+                logging.debug(err)
+                continue
+            if int.from_bytes(cobid, "little") & 0x80000000:
+                return number
+        return None
+
+    def __monitor_pdo(self, entries, number, mapping, period):
+        """
+        generator of the samples of the entries mapped in a TPDO sent on the
+        SYNC produced every period, restoring the TPDO at the end
+        """
+        communication_idx = 0x1800 + number
+        mapping_idx = 0x1A00 + number
+        previous_state = self.__nmt_current_state()
+        cobid_raw = self.__sdo_upload(communication_idx, 0x01)
+        transmission_raw = self.__sdo_upload(communication_idx, 0x02)
+        count_raw = self.__sdo_upload(mapping_idx, 0x00)
+        mapped_raw = [
+            self.__sdo_upload(mapping_idx, subindex)
+            for subindex in range(1, int.from_bytes(count_raw, "little") + 1)
+        ]
+        cobid = int.from_bytes(cobid_raw, "little")
+        can_id = cobid & 0x7FF
+        decoders = [self.__decoder(index, subindex) for index, subindex in entries]
+        lengths = [(value & 0xFF) // 8 for value in mapping]
+        samples = queue.Queue()
+
+        def on_pdo(_can_id, data, timestamp):
+            samples.put((timestamp, bytes(data)))
+
+        logging.info("monitor with the TPDO %d (0x%03X)", number + 1, can_id)
+        self.__nmt_set_state("PRE-OPERATIONAL")
+        try:
+            self.__sdo_download(
+                communication_idx, 0x01, (cobid | 0x80000000).to_bytes(4, "little")
+            )
+            self.__sdo_download(mapping_idx, 0x00, b"\x00")
+            for subindex, value in enumerate(mapping, 1):
+                self.__sdo_download(mapping_idx, subindex, value.to_bytes(4, "little"))
+            self.__sdo_download(mapping_idx, 0x00, bytes([len(mapping)]))
+            # synchronous, sent at every SYNC
+            self.__sdo_download(communication_idx, 0x02, b"\x01")
+            self.__sdo_download(
+                communication_idx, 0x01, (cobid & 0x7FFFFFFF).to_bytes(4, "little")
+            )
+            self.__network.subscribe(can_id, on_pdo)
+            self.__nmt_set_state("OPERATIONAL")
+            self.__network.sync.start(period)
+            while True:
+                try:
+                    timestamp, data = samples.get(
+                        timeout=max(MONITOR_TIMEOUT, 10 * period)
+                    )
+                except queue.Empty:
+                    raise Exception(  # pylint: disable=broad-exception-raised
+                        f"no TPDO {number + 1} from the node"
+                    ) from None
+                values = []
+                offset = 0
+                for decoder, length in zip(decoders, lengths):
+                    values.append(decoder(data[offset : offset + length]))
+                    offset += length
+                yield timestamp, values
+        finally:
+            self.__network.sync.stop()
+            self.__network.unsubscribe(can_id, on_pdo)
+            self.__nmt_set_state("PRE-OPERATIONAL")
+            self.__sdo_download(
+                communication_idx, 0x01, (cobid | 0x80000000).to_bytes(4, "little")
+            )
+            self.__sdo_download(mapping_idx, 0x00, b"\x00")
+            for subindex, raw in enumerate(mapped_raw, 1):
+                self.__sdo_download(mapping_idx, subindex, raw)
+            self.__sdo_download(mapping_idx, 0x00, count_raw)
+            self.__sdo_download(communication_idx, 0x02, transmission_raw)
+            self.__sdo_download(communication_idx, 0x01, cobid_raw)
+            if previous_state != "PRE-OPERATIONAL":
+                self.__nmt_set_state(previous_state)
+            logging.info("TPDO %d restored", number + 1)
+
+    def __monitor_sdo(self, entries, period):
+        """
+        generator of the samples of the entries read every period, with all
+        the requests in flight at once
+
+        Once a sample loses answers the entries are read one at a time, as the
+        node (or the bus) does not keep up with the pipelined requests.
+        """
+        decoders = [self.__decoder(index, subindex) for index, subindex in entries]
+        logging.info("monitor with SDO polling")
+        pipelined = True
+        deadline = time.monotonic()
+        while True:
+            timestamp = time.time()
+            raws = self.__sdo_upload_pipelined(entries) if pipelined else {}
+            if pipelined and self.__pipeline_unanswered:
+                logging.info("answers lost, monitor with serial SDO polling")
+                pipelined = False
+            values = []
+            for key, decoder in zip(entries, decoders):
+                if key not in raws:
+                    try:
+                        raws[key] = self.__sdo_upload(*key)
+                    except canopen.SdoAbortedError as err:
+                        logging.debug(err)
+                        values.append(None)
+                        continue
+                values.append(decoder(raws[key]))
+            yield timestamp, values
+            deadline += period
+            wait = deadline - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                deadline = time.monotonic()
+
+    def monitor(
+        self,
+        entries: list[tuple[int, int]],
+        period: float = 0.01,
+        tpdo: int | None = None,
+        pdo: bool = True,
+    ):
+        """
+        generator of the samples of the entries, as (timestamp, values)
+
+        The entries are mapped in a TPDO, the given one (from 1) or the first
+        disabled one, sent at every SYNC produced every period (in seconds);
+        the TPDO and the NMT state, known from the heartbeat (waited for up to
+        the NMT timeout), are restored when the generator is closed. When the
+        entries cannot be mapped, there is no spare TPDO or pdo is False, the
+        entries are read with SDO requests every period.
+        """
+        entries = list(entries)
+        mapping = self.__monitor_mapping(entries) if pdo else None
+        number = None
+        if mapping is not None:
+            number = self.__spare_tpdo(tpdo)
+        self.__monitor_tpdo = None if number is None else number + 1
+        if number is None:
+            yield from self.__monitor_sdo(entries, period)
+        else:
+            yield from self.__monitor_pdo(entries, number, mapping, period)
+
+    def get_monitor_tpdo(self) -> int | None:
+        """
+        get the TPDO (from 1) of the last monitor, None for SDO polling
+        """
+        return self.__monitor_tpdo
+
+    def __encode_entry(self, obj, reason=""):
+        """
+        method to get the raw value of an entry of a dcf file
+        """
+        try:
+            return obj.encode_raw(obj.value)
+        except Exception as err:
+            raise Exception(  # pylint: disable=broad-exception-raised
+                f"problem with the value of 0x{obj.index:04X} 0x{obj.subindex:02X}{reason}: {err}"
+            ) from err
+
+    def __download_entry(self, obj, raw=None, reason=""):
+        """
+        method to write a single entry of a dcf file
+        """
+        if raw is None:
+            raw = self.__encode_entry(obj, reason)
+        try:
+            self.__sdo_download(obj.index, obj.subindex, raw)
+        except Exception as err:
+            message = f"problem writing {raw} to 0x{obj.index:04X} 0x{obj.subindex:02X} {obj.name}{reason}: {err}"
+            raise Exception(message) from err  # pylint: disable=broad-exception-raised
+        if self.__download_journal is not None:
+            self.__download_journal.write({"write": [obj.index, obj.subindex]})
+        if self.__written is not None:
+            self.__written[(obj.index, obj.subindex)] = raw
+
+    def __entry_changed(self, obj, snapshot=None) -> bool:
+        """
+        method to check if the value of an entry differs from the device one
+
+        The device value is taken from the snapshot, if available, or read.
         """
-        od = canopen.import_od(filename)
+        raw = self.__encode_entry(obj)
+        if snapshot is not None:
+            current = snapshot.get((obj.index, obj.subindex))
+        else:
+            try:
+                current = self.__sdo_upload(obj.index, obj.subindex)
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                logging.debug(err)
+                current = None
+        if current == raw:
+            self.__skipped_writes += 1
+            return False
+        return True
+
+    def __read_snapshot(self, filename: str) -> dict:
+        """
+        method to get the raw values of an uploaded dcf file
+        """
+        snapshot = {}
+        od = odcache.import_od(filename)
         for obj in od.values():
-            idx = obj.index
             if isinstance(obj, canopen.objectdictionary.ODRecord):
-                for subobj in obj.values():
-                    subidx = subobj.subindex
-                    if subobj.access_type == "rw":
-                        pdo_was_enabled = False
-                        mapping_was_enabled = False
-                        if (idx & 0xFF00) in [0x1400, 0x1600, 0x1800, 0x1A00]:
-                            pdo_was_enabled = self.__pdo_disable(idx)
-                        if (idx & 0xFF00) in [0x1600, 0x1A00]:
-                            mapping_was_enabled = self.__pdo_mapping_disable(idx)
-                        value = od[idx][subidx].value
-                        try:
-                            raw = od[idx][subidx].encode_raw(value)
-                        except Exception as err:
-                            raise Exception(  # pylint: disable=broad-exception-raised
-                                f"problem with the value of 0x{idx:04X} 0x{subidx:02X}: {err}"
-                            ) from err
-                        try:
-                            self.__node.sdo.download(idx, subidx, raw)
-                        except Exception as err:
-                            message = f"problem writing {raw} to 0x{idx:04X} 0x{subidx:02X} {subobj.name}: {err}"
-                            raise Exception(  # pylint: disable=broad-exception-raised
-                                message
-                            ) from err
-                        if mapping_was_enabled:
-                            try:
-                                value = od[idx][0].value
-                                raw = od[idx][0].encode_raw(value)
-                            except Exception as err:
-                                raise Exception(  # pylint: disable=broad-exception-raised
-                                    f"problem with the value of 0x{idx:04X} 0x00 to ri-enable the PDO mapping: {err}"
-                                ) from err
-                            try:
-                                self.__node.sdo.download(idx, 0, raw)
-                            except Exception as err:
-                                message = f"problem writing {raw} to 0x{idx:04X} 0x00 {subobj.name} to ri-enable the PDO mapping: {err}"
-                                raise Exception(  # pylint: disable=broad-exception-raised
-                                    message
-                                ) from err
-                        if pdo_was_enabled:
-                            self.__pdo_enable(idx)
+                entries = obj.values()
+            elif isinstance(obj, canopen.objectdictionary.ODVariable):
+                entries = [obj]
+            else:
+                continue
+            for entry in entries:
+                if entry.value is None:
+                    continue
+                try:
+                    snapshot[(entry.index, entry.subindex)] = entry.encode_raw(
+                        entry.value
+                    )
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    logging.debug(err)
+        return snapshot
+
+    def __download_pdo(self, records, entries, generate_iterator=False):
+        """
+        method to write the communication and mapping records of a single PDO
+
+        The PDO and its mapping are disabled once, the entries are written
+        and then the mapping count and the COB-ID valid bit are restored once.
+        The PDO is left enabled if the COB-ID written is valid or, when the
+        COB-ID is not written, if it was enabled. Nothing is touched if there
+        are no entries to write.
+        """
+        comm_idx = self.__pdo_communication_idx(records[0].index)
+        if not entries:
+            for obj in records:
+                for _ in obj.values():
                     if generate_iterator:
                         yield
+            return
 
-            if isinstance(obj, canopen.objectdictionary.ODVariable):
-                subidx = obj.subindex
-                if obj.access_type == "rw":
-                    value = od[idx].value
-                    try:
-                        raw = od[idx].encode_raw(value)
-                    except Exception as err:
-                        raise Exception(  # pylint: disable=broad-exception-raised
-                            f"problem with the value of 0x{idx:04X} 0x{subidx:02X}: {err}"
-                        ) from err
-                    try:
-                        self.__node.sdo.download(idx, subidx, raw)
-                    except Exception as err:
-                        message = f"problem writing 0x{idx:04X} 0x{subidx:02X} {obj.name}: {err}"
-                        raise Exception(  # pylint: disable=broad-exception-raised
-                            message
-                        ) from err
+        pdo_was_enabled = self.__pdo_disable(comm_idx)
+        self.__download_journal.write({"pdo": comm_idx, "enabled": pdo_was_enabled})
+        pdo_enable = pdo_was_enabled
+        mapping_counts = []
+        for obj in records:
+            is_mapping = (obj.index & 0xFF00) in [0x1600, 0x1A00]
+            if is_mapping and any(key[0] == obj.index for key in entries):
+                mapping_was_enabled = self.__pdo_mapping_disable(obj.index)
+                if mapping_was_enabled:
+                    self.__download_journal.write(
+                        {"mapping": obj.index, "count": mapping_was_enabled}
+                    )
+                if 0 in obj and (mapping_was_enabled or (obj.index, 0) in entries):
+                    mapping_counts.append(obj[0])
+            for subobj in obj.values():
+                if is_mapping and subobj.subindex == 0:
+                    # the mapping count is written after the mapped objects
+                    pass
+                elif (subobj.index, subobj.subindex) in entries:
+                    if obj.index == comm_idx and subobj.subindex == 1:
+                        # keep the PDO disabled until all the entries are written
+                        cobid = self.__encode_entry(subobj)
+                        cobid_int = int.from_bytes(cobid, "little")
+                        # the valid bit of the dcf decides the final state
+                        pdo_enable = not cobid_int & 0x80000000
+                        cobid_disabled = (cobid_int | 0x80000000).to_bytes(
+                            len(cobid), "little"
+                        )
+                        self.__download_entry(subobj, cobid_disabled)
+                        if self.__written is not None:
+                            # verified against the dcf value, not the one written
+                            self.__written[(comm_idx, 1)] = cobid
+                    else:
+                        self.__download_entry(subobj)
                 if generate_iterator:
                     yield
 
-    def get_objdict_elements(self, filename: str | None = None):
+        for subobj in mapping_counts:
+            self.__download_entry(subobj, reason=" to ri-enable the PDO mapping")
+        if pdo_enable:
+            self.__pdo_enable(comm_idx)
+        self.__download_journal.write({"pdo": comm_idx, "done": True})
+
+    def __resume_download(self, journal) -> set:
+        """
+        method to restore the PDOs left disabled by an interrupted download,
+        and to return the entries already written
+
+        The writes of a PDO that was not completed are not taken as done:
+        the whole PDO is downloaded again once its state is restored.
+        """
+        written = set()
+        open_pdos = {}
+        for record in journal:
+            if "write" in record:
+                index, subindex = record["write"]
+                comm_idx = None
+                if (index & 0xFF00) in [0x1400, 0x1600, 0x1800, 0x1A00]:
+                    comm_idx = self.__pdo_communication_idx(index)
+                if comm_idx in open_pdos:
+                    open_pdos[comm_idx]["written"].add((index, subindex))
+                else:
+                    written.add((index, subindex))
+            elif "mapping" in record:
+                comm_idx = self.__pdo_communication_idx(record["mapping"])
+                open_pdos[comm_idx]["mappings"][record["mapping"]] = record["count"]
+            elif "enabled" in record:
+                open_pdos[record["pdo"]] = {
+                    "enabled": record["enabled"],
+                    "mappings": {},
+                    "written": set(),
+                }
+            elif record.get("done"):
+                written |= open_pdos.pop(record["pdo"])["written"]
+            elif record.get("restored"):
+                open_pdos.pop(record["pdo"])
+
+        for comm_idx, pdo in open_pdos.items():
+            logging.info("restoring the state of the PDO 0x%04X", comm_idx)
+            for index, count in pdo["mappings"].items():
+                self.__nmt_set_state("PRE-OPERATIONAL")
+                self.__sdo_download(index, 0x00, count.to_bytes(1, "little"))
+            if pdo["enabled"]:
+                self.__pdo_enable(comm_idx)
+            journal.write({"pdo": comm_idx, "restored": True})
+        return written
+
+    def get_download_journal(self) -> str:
         """
-        function to get the number of elemnts present in the obj file
+        get the name of the journal of the download
+        """
+        return f"download_node{self.__nodeid}.journal"
+
+    def __verify(self, expected: dict, attempts: int) -> list[dict]:
+        """
+        method to read back the written entries, to write again the ones that
+        differ up to attempts times, and to return the entries left different
+
+        The PDO entries are not written again, as the PDO must be disabled.
+        """
+        to_check = list(expected)
+        for attempt in range(attempts + 1):
+            actual = self.__sdo_upload_pipelined(
+                [key for key in to_check if len(expected[key]) <= 4]
+            )
+            mismatches = {}
+            for key in to_check:
+                if key not in actual:
+                    try:
+                        actual[key] = self.__sdo_upload(*key)
+                    except Exception as err:  # pylint: disable=broad-exception-caught
+                        mismatches[key] = str(err)
+                        continue
+                if actual[key][: len(expected[key])] != expected[key]:
+                    mismatches[key] = None
+            logging.info("verification %d: %d mismatches", attempt, len(mismatches))
+            if not mismatches or attempt == attempts:
+                break
+            to_check = []
+            for index, subindex in mismatches:
+                if (index & 0xFF00) in [0x1400, 0x1600, 0x1800, 0x1A00]:
+                    continue
+                try:
+                    self.__sdo_download(index, subindex, expected[(index, subindex)])
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    logging.debug(err)
+                to_check.append((index, subindex))
+            if not to_check:
+                break
+        return [
+            {
+                "index": f"0x{index:04X}",
+                "subindex": f"0x{subindex:02X}",
+                "expected": expected[(index, subindex)].hex(),
+                "actual": (
+                    actual[(index, subindex)].hex()
+                    if (index, subindex) in actual
+                    else None
+                ),
+                "error": error,
+            }
+            for (index, subindex), error in mismatches.items()
+        ]
+
+    def get_verify_mismatches(self) -> list[dict]:
+        """
+        get the entries that differ from the dcf after the last verified
+        download
+        """
+        return self.__verify_mismatches
+
+    def get_skipped_writes(self) -> int:
+        """
+        get the number of writes skipped by the last diff download
+        """
+        return self.__skipped_writes
+
+    def download_dcf(
+        self,
+        filename: str,
+        generate_iterator=False,
+        diff=False,
+        snapshot: str | None = None,
+        resume=False,
+        verify=False,
+        verify_attempts=2,
+    ):
+        """
+        function to download a dcf file
+
+        With diff only the entries that differ from the device are written;
+        the device values are read or taken from an uploaded dcf snapshot.
+        Every write and PDO state change is recorded in a journal: with resume
+        the PDO state is restored and only the missing entries are written.
+        With verify the entries written are read back at the end and the ones
+        that differ are written again, up to verify_attempts times.
+        """
+        od = odcache.import_od(filename)
+        self.__skipped_writes = 0
+        self.__written = {} if verify else None
+        self.__verify_mismatches = []
+        if diff and snapshot:
+            snapshot = self.__read_snapshot(snapshot)
+        else:
+            snapshot = None
+        header = {
+            "operation": "download",
+            "nodeid": self.__nodeid,
+            "dcf": odcache.file_hash(filename),
+        }
+        with Journal(self.get_download_journal(), header, resume) as journal:
+            written = set()
+            if resume:
+                written = self.__resume_download(journal)
+                logging.info("%d entries already downloaded", len(written))
+
+            def to_write(obj):
+                if obj.access_type != "rw":
+                    return False
+                if (obj.index, obj.subindex) in written:
+                    return False
+                return not diff or self.__entry_changed(obj, snapshot)
+
+            pdo_records = {}
+            for obj in od.values():
+                if isinstance(obj, canopen.objectdictionary.ODRecord) and (
+                    obj.index & 0xFF00
+                ) in [0x1400, 0x1600, 0x1800, 0x1A00]:
+                    comm_idx = self.__pdo_communication_idx(obj.index)
+                    pdo_records.setdefault(comm_idx, []).append(obj)
+
+            self.__download_journal = journal
+            try:
+                for obj in od.values():
+                    idx = obj.index
+                    if isinstance(obj, canopen.objectdictionary.ODRecord):
+                        if (idx & 0xFF00) in [0x1400, 0x1600, 0x1800, 0x1A00]:
+                            # a PDO is downloaded at the first of its records
+                            records = pdo_records.pop(
+                                self.__pdo_communication_idx(idx), []
+                            )
+                            if records:
+                                entries = {
+                                    (subobj.index, subobj.subindex)
+                                    for record in records
+                                    for subobj in record.values()
+                                    if to_write(subobj)
+                                }
+                                yield from self.__download_pdo(
+                                    records, entries, generate_iterator
+                                )
+                            continue
+                        for subobj in obj.values():
+                            if to_write(subobj):
+                                self.__download_entry(subobj)
+                            if generate_iterator:
+                                yield
+
+                    if isinstance(obj, canopen.objectdictionary.ODVariable):
+                        if to_write(obj):
+                            self.__download_entry(obj)
+                        if generate_iterator:
+                            yield
+            finally:
+                self.__download_journal = None
+        journal.remove()
+        if verify:
+            written, self.__written = self.__written, None
+            self.__verify_mismatches = self.__verify(written, verify_attempts)
+            if self.__verify_mismatches:
+                raise Exception(  # pylint: disable=broad-exception-raised
+                    f"{len(self.__verify_mismatches)} entries differ from {filename} after the verification"
+                )
+
+    def __upload_plan(self, od) -> tuple[list, list]:
+        """
+        method to get the entries an upload reads and the const entries whose
+        value is taken from the object dictionary; write only entries are skipped
+        """
+        reads = []
+        constants = []
+        for obj in od.values():
+            if isinstance(obj, canopen.objectdictionary.ODRecord):
+                entries = obj.values()
+            elif isinstance(obj, canopen.objectdictionary.ODVariable):
+                entries = [obj]
+            else:
+                continue
+            for entry in entries:
+                if entry.access_type == "wo":
+                    continue
+                if entry.access_type == "const" and (
+                    entry.value is not None or entry.default is not None
+                ):
+                    constants.append(entry)
+                else:
+                    reads.append(entry)
+        return reads, constants
+
+    def get_objdict_elements(self, filename: str | None = None, upload=False):
+        """
+        function to get the number of elemnts present in the obj file,
+        or the number of entries an upload reads
         """
         number_of_elements = 0
         if filename:
-            od = canopen.import_od(filename)
+            od = odcache.import_od(filename)
         else:
             od = self.__node.object_dictionary
+        if upload:
+            return len(self.__upload_plan(od)[0])
         for obj in od.values():
             if isinstance(obj, canopen.objectdictionary.ODRecord):
                 number_of_elements += len(obj.keys())
@@ -348,58 +1940,323 @@ class Device:
 
         return number_of_elements
 
-    def upload_dcf(self, generate_iterator=False):
+    def get_upload_journal(self) -> str:
+        """
+        get the name of the checkpoint journal of the upload
+        """
+        return f"upload_node{self.__nodeid}.journal"
+
+    def __identity_cache_key(self) -> str | None:
+        """
+        method to get the identity cache key of the node, None if the node
+        has no complete identity object
+        """
+        try:
+            vendor, product, revision = (
+                int.from_bytes(self.__sdo_upload(IDENTITY_INDEX, subindex), "little")
+                for subindex in [0x01, 0x02, 0x03]
+            )
+        except (canopen.SdoAbortedError, canopen.SdoCommunicationError) as err:
+            logging.info("identity cache not used: %s", err)
+            return None
+        return idcache.identity_key(
+            vendor, product, revision, odcache.file_hash(self.__filename)
+        )
+
+    def get_identity_cache_hits(self) -> int:
+        """
+        get the number of values the last upload took from the identity cache
+        """
+        return self.__identity_cache_hits
+
+    def get_upload_aborts(self) -> list[tuple[int, int, int]]:
+        """
+        get the (index, subindex, abort code) of the entries the last upload
+        could not read, when the aborts are collected
+        """
+        return self.__upload_aborts
+
+    def upload_dcf(
+        self,
+        generate_iterator=False,
+        filename: str | None = None,
+        resume=False,
+        collect_aborts=False,
+    ):
         """
         function to upload a dcf file
+
+        Write only entries are skipped and const entries are taken from the
+        object dictionary, when it has their value; only the other entries
+        are read, with collect_aborts an aborted read does not stop the upload.
+        Every value is saved in a checkpoint journal as soon as it is read:
+        with resume only the entries missing from the journal are read.
+        The dcf file is assembled from the journal at the end.
         """
-        for obj in self.__node.object_dictionary.values():
-            logging.debug("0x%X %s", obj.index, obj.name)
-            if isinstance(obj, canopen.objectdictionary.ODRecord):
-                for subobj in obj.values():
+        if filename is None:
+            filename = f"upload_{time.strftime('%y%m%d-%H%M%S', time.localtime())}.dcf"
+        header = {
+            "operation": "upload",
+            "nodeid": self.__nodeid,
+            "objdict": odcache.file_hash(self.__filename),
+        }
+        reads, constants = self.__upload_plan(self.__node.object_dictionary)
+        logging.info("%d entries to read, %d const", len(reads), len(constants))
+        for entry in constants:
+            if entry.value is None:
+                entry.value = entry.default
+        self.__upload_aborts = []
+        self.__identity_cache_hits = 0
+        with Journal(self.get_upload_journal(), header, resume) as journal:
+            done = set()
+            if resume:
+                done = {(record["index"], record["subindex"]) for record in journal}
+                logging.info("%d entries already uploaded", len(done))
+            cache_key = None
+            cached = {}
+            if self.__identity_cache:
+                cache_key = self.__identity_cache_key()
+            if cache_key is not None and not self.__identity_cache_refresh:
+                cached = idcache.load(cache_key)
+            read_cacheable = False
+            for entry in reads:
+                key = (entry.index, entry.subindex)
+                if key in done:
+                    pass
+                elif key in cached and idcache.cacheable(entry):
+                    self.__identity_cache_hits += 1
+                    journal.write(
+                        {
+                            "index": entry.index,
+                            "subindex": entry.subindex,
+                            "data": cached[key].hex(),
+                        }
+                    )
+                else:
                     try:
-                        value = self.__node.sdo.upload(obj.index, subobj.subindex)
+                        value = self.__sdo_upload(entry.index, entry.subindex)
                     except Exception as err:
-                        raise Exception(  # pylint: disable=broad-exception-raised
-                            f"problem with 0x{obj.index:04X} 0x{subobj.subindex:02X}: {err}"
-                        ) from err
-                    value = self.__node.object_dictionary[obj.index][
-                        subobj.subindex
-                    ].decode_raw(value)
-                    self.__node.object_dictionary[obj.index][
-                        subobj.subindex
-                    ].value_raw = value
-                    if generate_iterator:
-                        yield
-
-            if isinstance(obj, canopen.objectdictionary.ODVariable):
-                try:
-                    value = self.__node.sdo.upload(obj.index, obj.subindex)
-                except Exception as err:
-                    raise Exception(  # pylint: disable=broad-exception-raised
-                        f"problem with 0x{obj.index:04X} 0x{obj.subindex:02X}: {err}"
-                    ) from err
-                value = self.__node.object_dictionary[obj.index].decode_raw(value)
-                self.__node.object_dictionary[obj.index].value_raw = value
+                        if collect_aborts and isinstance(err, canopen.SdoAbortedError):
+                            logging.info(
+                                "0x%04X 0x%02X not read: %s",
+                                entry.index,
+                                entry.subindex,
+                                err,
+                            )
+                            self.__upload_aborts.append(
+                                (entry.index, entry.subindex, err.code)
+                            )
+                        else:
+                            raise Exception(  # pylint: disable=broad-exception-raised
+                                f"problem with 0x{entry.index:04X} 0x{entry.subindex:02X}: {err}"
+                            ) from err
+                    else:
+                        read_cacheable = read_cacheable or idcache.cacheable(entry)
+                        journal.write(
+                            {
+                                "index": entry.index,
+                                "subindex": entry.subindex,
+                                "data": value.hex(),
+                            }
+                        )
                 if generate_iterator:
                     yield
+            if cached:
+                logging.info(
+                    "%d values taken from the identity cache",
+                    self.__identity_cache_hits,
+                )
+
+            # the journal is read back one record at a time
+            values = {}
+            for record in journal:
+                var = self.__node.object_dictionary.get_variable(
+                    record["index"], record["subindex"]
+                )
+                data = bytes.fromhex(record["data"])
+                var.value_raw = var.decode_raw(data)
+                if cache_key is not None and idcache.cacheable(var):
+                    values[(var.index, var.subindex)] = data
+            if read_cacheable and cache_key is not None:
+                idcache.store(cache_key, values)
 
         canopen.objectdictionary.export_od(
             self.__node.object_dictionary,
-            f"upload_{time.strftime('%y%m%d-%H%M%S', time.localtime())}.dcf",
+            filename,
             "dcf",
         )
+        journal.remove()
 
     def save(self):
         """
         save request
         """
-        self.__node.sdo.download(0x1010, 0x01, b"save")
+        self.__sdo_download(0x1010, 0x01, b"save", slow=True)
 
     def default(self):
         """
         load default request
         """
-        self.__node.sdo.download(0x1011, 0x01, b"load")
+        self.__sdo_download(0x1011, 0x01, b"load", slow=True)
+
+
+class AsyncDevice:
+    """
+    class to use a device from asyncio
+
+    The canopen SDO client is blocking, so every SDO access runs on a thread
+    dedicated to the node: the event loop is never blocked, there is one
+    transfer in flight per node and the transfers of different nodes run
+    concurrently. The upload/download advance one entry at a time, so they
+    can be cancelled or timed out between two entries, leaving the journal
+    ready for a resume.
+    """
+
+    def __init__(
+        self, device: Device | None = None, timeout: float | None = None, **kwargs
+    ):
+        """
+        the keyword arguments are the Device ones, used if no device is given;
+        the timeout is the default one of every operation, in seconds
+        """
+        if device is None:
+            device = Device(**kwargs)
+        self.device = device
+        self.timeout = timeout
+        self.__executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="yacc-device"
+        )
+
+    async def __call(self, function, *args, timeout=None):
+        """
+        method to run a blocking call on the node thread
+        """
+        if timeout is None:
+            timeout = self.timeout
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.__executor, function, *args)
+        return await asyncio.wait_for(future, timeout)
+
+    async def __iterate(self, generator, progress=None, timeout=None):
+        """
+        method to run a generator based operation, one entry at a time
+        """
+
+        async def steps():
+            loop = asyncio.get_running_loop()
+            done = object()
+            try:
+                while True:
+                    step = loop.run_in_executor(self.__executor, next, generator, done)
+                    try:
+                        result = await asyncio.shield(step)
+                    except asyncio.CancelledError:
+                        # the entry in progress is completed before stopping
+                        await asyncio.wait([step])
+                        raise
+                    if result is done:
+                        break
+                    if progress is not None:
+                        progress()
+            finally:
+                generator.close()
+
+        if timeout is None:
+            timeout = self.timeout
+        await asyncio.wait_for(steps(), timeout)
+
+    async def connect(self, network: canopen.Network | None = None, timeout=None):
+        """
+        connecting function
+        """
+        await self.__call(self.device.connect, network, timeout=timeout)
+
+    async def disconnect(self, timeout=None):
+        """
+        disconnect the network
+        """
+        await self.__call(self.device.disconnect, timeout=timeout)
+
+    async def read_entry(self, index: int, subindex: int, timeout=None) -> Data:
+        """
+        read entry method
+        """
+        return await self.__call(
+            self.device.read_entry, index, subindex, timeout=timeout
+        )
+
+    async def write_entry(self, index: int, subindex: int, data: bytes, timeout=None):
+        """
+        write entry method
+        """
+        await self.__call(
+            self.device.write_entry, index, subindex, data, timeout=timeout
+        )
+
+    async def upload_dcf(
+        self,
+        filename: str | None = None,
+        resume=False,
+        progress=None,
+        timeout=None,
+        collect_aborts=False,
+    ):
+        """
+        function to upload a dcf file, progress is called after every entry
+        """
+        await self.__iterate(
+            self.device.upload_dcf(
+                True, filename=filename, resume=resume, collect_aborts=collect_aborts
+            ),
+            progress,
+            timeout,
+        )
+
+    async def download_dcf(
+        self,
+        filename: str,
+        diff=False,
+        snapshot: str | None = None,
+        resume=False,
+        progress=None,
+        timeout=None,
+        verify=False,
+        verify_attempts=2,
+    ):
+        """
+        function to download a dcf file, progress is called after every entry
+        """
+        await self.__iterate(
+            self.device.download_dcf(
+                filename,
+                True,
+                diff=diff,
+                snapshot=snapshot,
+                resume=resume,
+                verify=verify,
+                verify_attempts=verify_attempts,
+            ),
+            progress,
+            timeout,
+        )
+
+    async def save(self, timeout=None):
+        """
+        save request
+        """
+        await self.__call(self.device.save, timeout=timeout)
+
+    async def default(self, timeout=None):
+        """
+        load default request
+        """
+        await self.__call(self.device.default, timeout=timeout)
+
+    def close(self):
+        """
+        method to release the node thread
+        """
+        self.__executor.shutdown(wait=False)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,250 @@
+"""
+Module to drive several CAN buses at once, one process per bus
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import re
+import threading
+import time
+
+try:
+    import tomllib
+except ImportError:
+    import tomli as tomllib
+
+# local module
+from bus import Bus, parse_nodeids
+from device import INTERFACES, can_interface
+
+# minimum period of the progress events sent by a worker, in seconds
+PROGRESS_PERIOD = 0.1
+
+
+def load_manifest(filename: str) -> list[dict]:
+    """
+    function to get the buses of a fleet manifest, a TOML file like
+
+        [[bus]]
+        interface = "peak"
+        channel = "PCAN_USBBUS2"
+        baudrate = 250
+        nodes = "1-10"
+        file = "line2.dcf"
+
+    The file is relative to the manifest, the channel defaults to the one of
+    the interface.
+    """
+    with open(filename, "rb") as f:
+        manifest = tomllib.load(f)
+    folder = os.path.dirname(os.path.abspath(filename))
+    buses = []
+    for item in manifest.get("bus", []):
+        interface = item.get("interface", "peak")
+        if interface not in INTERFACES:
+            raise Exception(  # pylint: disable=broad-exception-raised
+                f"interface {interface} not available"
+            )
+        nodes = item.get("nodes", "1")
+        if isinstance(nodes, int):
+            nodes = str(nodes)
+        elif not isinstance(nodes, str):
+            nodes = ",".join(str(nodeid) for nodeid in nodes)
+        if "file" not in item:
+            raise Exception(  # pylint: disable=broad-exception-raised
+                f"missing file of the bus {len(buses) + 1} in {filename}"
+            )
+        buses.append(
+            {
+                "interface": interface,
+                "channel": item.get("channel", can_interface(interface)[1]),
+                "baudrate": int(item.get("baudrate", 250)),
+                "nodeids": parse_nodeids(nodes),
+                "file": os.path.join(folder, item["file"]),
+            }
+        )
+    if not buses:
+        raise Exception(  # pylint: disable=broad-exception-raised
+            f"no bus in {filename}"
+        )
+    return buses
+
+
+def bus_label(bus: dict) -> str:
+    """
+    function to get the name of a bus, usable as a folder name
+    """
+    return re.sub(r"[^A-Za-z0-9.]+", "-", f"{bus['interface']}-{bus['channel']}")
+
+
+def _worker(number, bus, operation, settings, options, events):
+    """
+    function running the operation on the nodes of a bus, in its own process
+
+    The journals, the uploaded files and the metrics of the bus are written
+    in a folder named after the bus, so that the workers do not collide. A
+    spawned process does not inherit the logging of the CLI: it is set up
+    again from the log_level option, disabled if None.
+    """
+    if options.get("log_level") is None:
+        logging.disable(logging.CRITICAL)
+    else:
+        logging.basicConfig(level=options["log_level"])
+    folder = bus_label(bus)
+    os.makedirs(folder, exist_ok=True)
+    os.chdir(folder)
+    devices = Bus(
+        nodeids=bus["nodeids"],
+        filename=bus["file"],
+        interface=bus["interface"],
+        baudrate=bus["baudrate"],
+        channel=bus["channel"],
+        **settings,
+    )
+    for device in devices.devices.values():
+        device.set_identity_cache(
+            options.get("identity_cache", False)
+            or options.get("refresh_identity_cache", False),
+            options.get("refresh_identity_cache", False),
+        )
+    total = devices.get_objdict_elements(bus["file"], operation == "upload")
+    events.put(("total", number, total * len(bus["nodeids"])))
+    try:
+        devices.connect()
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        events.put(("failed", number, str(err)))
+        return
+
+    lock = threading.Lock()
+    pending = {"count": 0, "time": time.monotonic()}
+
+    def progress(_nodeid):
+        with lock:
+            pending["count"] += 1
+            now = time.monotonic()
+            if now - pending["time"] >= PROGRESS_PERIOD:
+                events.put(("progress", number, pending["count"]))
+                pending["count"] = 0
+                pending["time"] = now
+
+    report = {}
+    try:
+        if operation == "upload":
+            results = devices.upload_dcf(
+                progress,
+                resume=options.get("resume", False),
+                collect_aborts=options.get("collect_aborts", False),
+            )
+        else:
+            results = devices.download_dcf(
+                bus["file"],
+                progress,
+                diff=options.get("diff", False),
+                snapshot=options.get("snapshot"),
+                resume=options.get("resume", False),
+                verify=options.get("verify", False),
+                verify_attempts=options.get("verify_attempts", 2),
+            )
+        events.put(("progress", number, pending["count"]))
+        for nodeid, err in results.items():
+            device = devices.devices[nodeid]
+            if err is None and operation == "download" and options.get("save"):
+                try:
+                    device.save()
+                except Exception as save_err:  # pylint: disable=broad-exception-caught
+                    err = save_err
+            report[nodeid] = {
+                "error": None if err is None else str(err),
+                "skipped": device.get_skipped_writes(),
+                "aborts": len(device.get_upload_aborts()),
+                "mismatches": device.get_verify_mismatches(),
+            }
+    finally:
+        devices.disconnect()
+        if options.get("metrics"):
+            extension = "json" if options["metrics"] == "json" else "prom"
+            devices.metrics.save(f"{operation}_metrics.{extension}", options["metrics"])
+    events.put(("done", number, report))
+
+
+class Fleet:
+    """
+    class to run the same operation on several CAN buses at once
+
+    Every bus has its own process (and CAN adapter), so the buses do not
+    share the interpreter lock and the throughput scales with the adapters.
+    """
+
+    def __init__(self, buses: list[dict], settings: dict | None = None):
+        """
+        the buses are the load_manifest ones, the settings are the Device
+        keyword arguments shared by all the buses
+        """
+        self.buses = buses
+        self.settings = {
+            key: value
+            for key, value in (settings or {}).items()
+            if key not in ["interface", "baudrate", "channel"]
+        }
+
+    def labels(self) -> list[str]:
+        """
+        get the names of the buses
+        """
+        return [bus_label(bus) for bus in self.buses]
+
+    def run(self, operation: str, progress=None, **options) -> dict[str, dict]:
+        """
+        function to upload or download all the buses
+
+        The progress callback is called with the bus number, the number of
+        entries done since the last call and the total of the bus (None if
+        not changed). The result of every bus has the error of the bus, if
+        any, and the error of every node (None on success).
+        """
+        context = multiprocessing.get_context("spawn")
+        events = context.Queue()
+        processes = [
+            context.Process(
+                target=_worker,
+                args=(number, bus, operation, self.settings, options, events),
+                daemon=True,
+            )
+            for number, bus in enumerate(self.buses)
+        ]
+        results = {label: {"error": None, "nodes": {}} for label in self.labels()}
+        running = set(range(len(processes)))
+        try:
+            for process in processes:
+                process.start()
+            while running:
+                try:
+                    kind, number, payload = events.get(timeout=0.5)
+                except queue.Empty:
+                    for number in list(running):
+                        if not processes[number].is_alive():
+                            label = self.labels()[number]
+                            results[label][
+                                "error"
+                            ] = f"worker exited with code {processes[number].exitcode}"
+                            running.discard(number)
+                    continue
+                label = self.labels()[number]
+                if kind == "total" and progress is not None:
+                    progress(number, 0, payload)
+                elif kind == "progress" and progress is not None:
+                    progress(number, payload, None)
+                elif kind == "failed":
+                    results[label]["error"] = payload
+                    running.discard(number)
+                elif kind == "done":
+                    results[label]["nodes"] = payload
+                    running.discard(number)
+        finally:
+            for process in processes:
+                if process.is_alive() and running:
+                    process.terminate()
+                process.join()
+        return results
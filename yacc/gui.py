@@ -4,11 +4,18 @@ Module for Graphical User Interface
 
 import logging
 import os
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import filedialog as fd
 from tkinter import ttk
 import struct
 
+try:
+    import tomllib
+except ImportError:
+    import tomli as tomllib
 
 # requirements
 from canopen.objectdictionary import datatypes
@@ -17,6 +24,13 @@ import tomli_w
 # local module
 from device import Device
 
+# period of the progress updates of the upload/download window, in seconds
+PROGRESS_PERIOD = 0.05
+# number of rows added to the object browser per idle callback
+BROWSER_BATCH = 200
+# delay between the last key press and the object browser search, in ms
+SEARCH_DELAY = 150
+
 
 class Gui(tk.Frame):
     """
@@ -54,8 +68,12 @@ class Gui(tk.Frame):
         self.value_hex_text = None
         self.value_float_text = None
         self.length_text = None
-        self.element_opt = None
-        self.group_opt = None
+        self.browser = None
+        self.search_text = None
+        self.__objects = []
+        self.__sort = ("index", False)
+        self.__render_job = None
+        self.__search_job = None
         self.value_unsigned_entry = None
         self.value_signed_entry = None
         self.value_float_entry = None
@@ -156,46 +174,137 @@ class Gui(tk.Frame):
         self.config_window.destroy()
         self.parent.destroy()
 
-    def __callback_ele(self, *args):
+    def __matching_objects(self) -> list[tuple[int, str, bool]]:
         """
-        callback for element selection
+        function to get the objects matching the search, in the sort order
+
+        The search matches the beginning of the index (with or without 0x)
+        or any part of the name, ignoring the case, else the closest names.
         """
-        element = self.variable_ele.get()
-        if element != "":
-            self.sub_text.set(self.device.get_sub(self.variable_grp.get(), element))
+        objects = self.__objects
+        if self.search_text.get().strip():
+            found = set(self.device.search_objects(self.search_text.get()))
+            objects = [obj for obj in objects if obj[0] in found]
+        else:
+            objects = list(objects)
+        column, reverse = self.__sort
+        if column == "index":
+            objects.sort(key=lambda obj: obj[0], reverse=reverse)
+        else:
+            objects.sort(key=lambda obj: obj[1].lower(), reverse=reverse)
+        return objects
 
-    def __callback_grp(self, *args):
+    def __render_browser(self):
         """
-        callback for group selection
+        function to redraw the object browser
+
+        The rows are added BROWSER_BATCH at a time from the event loop, so a
+        large object dictionary does not freeze the window; a new search or
+        sort drops the rows still to add.
         """
-        group = self.variable_grp.get()
-        if group != "":
-            sub = self.device.get_subidx_names(group)
-            logging.info(sub)
-            menu = self.element_opt["menu"]
-            menu.delete(0, "end")
-            if not sub:
-                self.sub_text.set("0")
+        if self.__render_job is not None:
+            self.browser.after_cancel(self.__render_job)
+            self.__render_job = None
+        self.browser.delete(*self.browser.get_children())
+        objects = self.__matching_objects()
+
+        def insert(start):
+            for index, name, has_entries in objects[start : start + BROWSER_BATCH]:
+                iid = f"{index:04X}"
+                self.browser.insert("", "end", iid=iid, text=f"0x{iid}", values=(name,))
+                if has_entries:
+                    # placeholder replaced by the entries on the first expand
+                    self.browser.insert(iid, "end", iid=f"{iid}.")
+            if start + BROWSER_BATCH < len(objects):
+                self.__render_job = self.browser.after(1, insert, start + BROWSER_BATCH)
             else:
-                for string in sub:
-                    menu.add_command(
-                        label=string,
-                        command=lambda value=string: self.variable_ele.set(value),
-                    )
-                    self.element_opt.option_clear()
-                self.sub_text.set("")
-
-            idx = self.device.idx_from_name(self.variable_grp.get())
-            self.idx_text.set(idx)
+                self.__render_job = None
+
+        insert(0)
+
+    def __load_browser(self):
+        """
+        function to show the objects of the device in the object browser
+        """
+        self.__objects = self.device.get_objects()
+        logging.debug("%d objects", len(self.__objects))
+        self.__render_browser()
+
+    def __sort_browser(self, column: str):
+        """
+        callback for the browser headings, a second click reverses the order
+        """
+        current, reverse = self.__sort
+        self.__sort = (column, not reverse if column == current else False)
+        self.__render_browser()
+
+    def __search_typing(self, *args):
+        """
+        search typing reaction, the search runs when the typing pauses
+        """
+        if self.__search_job is not None:
+            self.browser.after_cancel(self.__search_job)
+        self.__search_job = self.browser.after(SEARCH_DELAY, self.__search)
+
+    def __search(self):
+        """
+        function to filter the object browser with the search
+        """
+        self.__search_job = None
+        self.__render_browser()
+
+    def __browser_open(self, *args):
+        """
+        callback for the expansion of an object, it loads its entries
+        """
+        iid = self.browser.focus()
+        if not self.browser.exists(f"{iid}."):
+            return
+        self.browser.delete(f"{iid}.")
+        for subindex, name in self.device.get_entries(int(iid, 16)):
+            self.browser.insert(
+                iid,
+                "end",
+                iid=f"{iid}.{subindex:02X}",
+                text=f"0x{subindex:02X}",
+                values=(name,),
+            )
+
+    def __browser_select(self, *args):
+        """
+        callback for the selection of an object or entry
+        """
+        selection = self.browser.selection()
+        if not selection or selection[0].endswith("."):
+            return
+        iid = selection[0]
+        parent = self.browser.parent(iid)
+        if parent:
+            self.variable_grp.set(self.browser.set(parent, "name"))
+            self.variable_ele.set(self.browser.set(iid, "name"))
+            self.idx_text.set(f"{int(parent, 16):X}")
+            self.sub_text.set(f"{int(iid.split('.')[1], 16):X}")
+        else:
+            self.variable_grp.set(self.browser.set(iid, "name"))
             self.variable_ele.set("")
+            self.idx_text.set(f"{int(iid, 16):X}")
+            self.sub_text.set("" if self.browser.get_children(iid) else "0")
 
     def __idx_enter(self, *args):
         """
-        index enter reaction
+        index enter reaction, it shows the object in the browser
         """
-        self.variable_grp.set(
-            self.device.get_group_from_idx(int(self.idx_text.get(), 16))
-        )
+        try:
+            iid = f"{int(self.idx_text.get(), 16):04X}"
+        except ValueError:
+            return
+        self.search_text.set(iid)
+        # the search runs now rather than when the typing pauses
+        self.browser.after_cancel(self.__search_job)
+        self.__search()
+        if self.browser.exists(iid):
+            self.browser.selection_set(iid)
+            self.browser.see(iid)
 
     def __idx_typing(self, *args):
         """
@@ -203,9 +312,9 @@ class Gui(tk.Frame):
         """
         logging.info("entry: idx %s sub %s", self.idx_text.get(), self.sub_text.get())
         self.variable_grp.set("")
-        menu = self.element_opt["menu"]
-        menu.delete(0, "end")
         self.variable_ele.set("")
+        if self.browser.selection():
+            self.browser.selection_remove(*self.browser.selection())
 
     def __sub_typing(self, *args):
         """
@@ -353,16 +462,7 @@ class Gui(tk.Frame):
                 logging.debug(err)
                 tk.messagebox.showerror("connect", "I can't connect to the device")
             else:
-                config = {
-                    "object_dictionary": {"filename": self.file_str_entry.get()},
-                    "can": {
-                        "interface": self.interface_variable.get(),
-                        "baudrate": int(self.variable_br.get()),
-                        "nodeid": int(self.variable_node.get()),
-                    },
-                }
-                with open("config.toml", "wb") as f:
-                    tomli_w.dump(config, f)
+                self.__save_config()
                 logging.info(
                     "interface = %s | baudrate = %s | node-id = %s | eds = %s",
                     self.interface_variable.get(),
@@ -374,19 +474,38 @@ class Gui(tk.Frame):
                 self.config_window.withdraw()
                 self.parent.deiconify()
 
+                self.variable_grp.set("")
+                self.variable_ele.set("")
+                self.search_text.set("")
                 if os.path.exists(self.file_str_entry.get()):
-                    group_list = self.device.get_group_name_list()
-                    logging.debug(group_list)
-                    self.variable_ele.set("")
-                    menu = self.group_opt["menu"]
-                    menu.delete(0, "end")
-                    for string in group_list:
-                        menu.add_command(
-                            label=string,
-                            command=lambda value=string: self.variable_grp.set(value),
-                        )
+                    self.__load_browser()
                 else:
                     logging.info("no file")
+                    self.__objects = []
+                    self.__render_browser()
+
+    def __save_config(self):
+        """
+        update the keys of the configuration set in the GUI, keeping the
+        others (e.g. the channel and the [sdo] section)
+        """
+        config = {}
+        try:
+            with open("config.toml", "rb") as f:
+                config = tomllib.load(f)
+        except (OSError, tomllib.TOMLDecodeError) as err:
+            logging.debug(err)
+        filename = self.file_str_entry.get()
+        config.setdefault("object_dictionary", {})["filename"] = filename
+        config.setdefault("can", {}).update(
+            {
+                "interface": self.interface_variable.get(),
+                "baudrate": int(self.variable_br.get()),
+                "nodeid": int(self.variable_node.get()),
+            }
+        )
+        with open("config.toml", "wb") as f:
+            tomli_w.dump(config, f)
 
     def __license(self):
         message = "Copyright 2024 setteZ\nSPDX-License-Identifier: Apache-2.0"
@@ -396,29 +515,102 @@ class Gui(tk.Frame):
         message = f"version: {self.__version}"
         tk.messagebox.showinfo("info", message)
 
-    def __upload_dcf(self):
-        wait_msg = tk.Tk()
+    def __run_transfer(self, title, text, iteration, generator, on_done):
+        """
+        function to run an upload/download on a worker thread
+
+        The worker posts its progress to a queue at most every PROGRESS_PERIOD
+        and the window polls the queue at the same rate, so the transfer is
+        not slowed down by the redraws and the window stays responsive.
+        Cancel stops the transfer between two entries, keeping its journal.
+        """
+        events = queue.Queue()
+        cancel = threading.Event()
+
+        def worker():
+            count = 0
+            last = time.monotonic()
+            try:
+                for _ in generator:
+                    count += 1
+                    if cancel.is_set():
+                        generator.close()
+                        events.put(("cancelled", None))
+                        return
+                    now = time.monotonic()
+                    if now - last >= PROGRESS_PERIOD:
+                        events.put(("progress", count))
+                        last = now
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                logging.debug(err)
+                events.put(("error", err))
+            else:
+                events.put(("done", None))
+
+        wait_msg = tk.Toplevel(self.parent)
         wait_msg.title("")
         wait_msg.iconbitmap(self.icon)
-        wait_label = tk.Label(wait_msg, text="Uploading...")
+        wait_msg.protocol("WM_DELETE_WINDOW", cancel.set)
+        wait_label = tk.Label(wait_msg, text=text)
         wait_label.grid(column=0, row=0)
-        iteration = self.device.get_objdict_elements(None)
         pb = ttk.Progressbar(
-            wait_msg, orient=tk.HORIZONTAL, length=iteration, mode="determinate"
+            wait_msg,
+            orient=tk.HORIZONTAL,
+            length=300,
+            maximum=max(iteration, 1),
+            mode="determinate",
         )
         pb.grid(column=0, row=1)
-        try:
-            for _ in self.device.upload_dcf(True):
-                wait_msg.update_idletasks()
-                pb["value"] += 1
-                pb.update()
-            self.device.upload_dcf()
-        except Exception as err:  # pylint: disable=broad-exception-caught
-            tk.messagebox.showerror("dcf upload", err)
-        else:
-            tk.messagebox.showinfo("dcf upload", "done")
-        finally:
+
+        def cancel_action():
+            cancel.set()
+            cancel_button.config(state=tk.DISABLED)
+            wait_label.config(text="Cancelling...")
+
+        cancel_button = tk.Button(wait_msg, text="cancel", command=cancel_action)
+        cancel_button.grid(column=0, row=2)
+        wait_msg.grab_set()
+
+        def poll():
+            result = None
+            try:
+                while True:
+                    kind, payload = events.get_nowait()
+                    if kind == "progress":
+                        pb["value"] = payload
+                    else:
+                        result = (kind, payload)
+            except queue.Empty:
+                pass
+            if result is None:
+                wait_msg.after(int(PROGRESS_PERIOD * 1000), poll)
+                return
+            wait_msg.grab_release()
             wait_msg.destroy()
+            kind, payload = result
+            if kind == "error":
+                tk.messagebox.showerror(title, payload)
+            elif kind == "cancelled":
+                tk.messagebox.showinfo(title, "cancelled, it can be resumed")
+            else:
+                on_done()
+
+        threading.Thread(target=worker, name="yacc-gui-transfer", daemon=True).start()
+        wait_msg.after(int(PROGRESS_PERIOD * 1000), poll)
+
+    def __upload_dcf(self):
+        resume = False
+        if os.path.isfile(self.device.get_upload_journal()):
+            resume = tk.messagebox.askyesno(
+                "dcf upload", "resume the interrupted upload?"
+            )
+        self.__run_transfer(
+            "dcf upload",
+            "Uploading...",
+            self.device.get_objdict_elements(None, upload=True),
+            self.device.upload_dcf(True, resume=resume),
+            lambda: tk.messagebox.showinfo("dcf upload", "done"),
+        )
 
     def __load_default(self):
         try:
@@ -440,31 +632,31 @@ class Gui(tk.Frame):
         filename = fd.askopenfilename(
             title="Select .dcf file", initialdir=os.getcwd(), filetypes=filetypes
         )
-        wait_msg = tk.Tk()
-        wait_msg.title("")
-        wait_msg.iconbitmap(self.icon)
-        wait_label = tk.Label(wait_msg, text="Downloading...")
-        wait_label.grid(column=0, row=0)
-        iteration = self.device.get_objdict_elements(filename)
-        pb = ttk.Progressbar(
-            wait_msg, orient=tk.HORIZONTAL, length=iteration, mode="determinate"
-        )
-        pb.grid(column=0, row=1)
-        try:
-            for _ in self.device.download_dcf(filename, True):
-                wait_msg.update_idletasks()
-                pb["value"] += 1
-                pb.update()
-        except Exception as err:  # pylint: disable=broad-exception-caught
-            tk.messagebox.showerror("dcf download", err)
-        else:
+        if not filename:
+            return
+        resume = False
+        if os.path.isfile(self.device.get_download_journal()):
+            resume = tk.messagebox.askyesno(
+                "dcf download", "resume the interrupted download?"
+            )
+
+        def done():
             answer = tk.messagebox.askquestion(
                 "dcf download", "done, do you wanna save?"
             )
             if answer == tk.messagebox.YES:
-                self.device.save()
-        finally:
-            wait_msg.destroy()
+                try:
+                    self.device.save()
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    tk.messagebox.showerror("dcf download", err)
+
+        self.__run_transfer(
+            "dcf download",
+            "Downloading...",
+            self.device.get_objdict_elements(filename),
+            self.device.download_dcf(filename, True, resume=resume),
+            done,
+        )
 
     def __populate_parent(self):
         """
@@ -519,25 +711,40 @@ class Gui(tk.Frame):
         # entry frame
         entry_frame = tk.Frame(self.parent)
         entry_frame.grid(column=0, row=0)
-        ## element
-        element_frame = tk.LabelFrame(entry_frame, text="element")
-        element_frame.grid(column=1, row=0)
-        self.variable_ele = tk.StringVar(element_frame)
+        ## object browser
+        browser_frame = tk.LabelFrame(entry_frame, text="object dictionary")
+        browser_frame.grid(column=0, row=0, columnspan=2)
+        self.variable_grp = tk.StringVar(browser_frame)
+        self.variable_grp.set("")
+        self.variable_ele = tk.StringVar(browser_frame)
         self.variable_ele.set("")
-        self.element_opt = tk.OptionMenu(element_frame, self.variable_ele, *[""])
-        self.element_opt.pack()
 
-        self.variable_ele.trace("w", self.__callback_ele)
+        self.search_text = tk.StringVar(browser_frame)
+        search_entry = tk.Entry(browser_frame, textvariable=self.search_text)
+        search_entry.grid(column=0, row=0, columnspan=2, sticky="ew")
 
-        ## group
-        group_frame = tk.LabelFrame(entry_frame, text="group")
-        group_frame.grid(column=0, row=0)
-        self.variable_grp = tk.StringVar(group_frame)
-        self.variable_grp.set("")
-        self.group_opt = tk.OptionMenu(group_frame, self.variable_grp, *[""])
-        self.group_opt.pack()
+        self.search_text.trace("w", self.__search_typing)
+
+        self.browser = ttk.Treeview(
+            browser_frame, columns=("name",), height=15, selectmode="browse"
+        )
+        self.browser.heading(
+            "#0", text="index", command=lambda: self.__sort_browser("index")
+        )
+        self.browser.heading(
+            "name", text="name", command=lambda: self.__sort_browser("name")
+        )
+        self.browser.column("#0", width=90, stretch=False)
+        self.browser.column("name", width=260)
+        self.browser.grid(column=0, row=1)
+        browser_scrollbar = ttk.Scrollbar(
+            browser_frame, orient=tk.VERTICAL, command=self.browser.yview
+        )
+        browser_scrollbar.grid(column=1, row=1, sticky="ns")
+        self.browser.config(yscrollcommand=browser_scrollbar.set)
 
-        self.variable_grp.trace("w", self.__callback_grp)
+        self.browser.bind("<<TreeviewOpen>>", self.__browser_open)
+        self.browser.bind("<<TreeviewSelect>>", self.__browser_select)
 
         ## idx
         idx_frame = tk.LabelFrame(entry_frame, text="index [0x]")
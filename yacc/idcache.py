@@ -0,0 +1,107 @@
+"""
+Module for the cache of the read only values of the devices of the same type
+"""
+
+import json
+import logging
+import os
+
+# local module
+import odcache
+
+# number of device identities kept on disk
+CACHE_SIZE = 64
+# bump to invalidate the cached values
+CACHE_FORMAT = 1
+
+IDENTITY_INDEX = 0x1018
+# read only objects whose value changes at run time or from unit to unit
+VOLATILE_OBJECTS = {
+    0x1001,  # error register
+    0x1002,  # manufacturer status register
+    0x1003,  # pre-defined error field
+}
+VOLATILE_ENTRIES = {
+    (IDENTITY_INDEX, 0x04),  # serial number
+}
+
+
+def cacheable(var) -> bool:
+    """
+    function to check if the value of an entry is the same on every device
+    with the same identity: read only, not mappable and not volatile
+    """
+    if var.access_type not in ["ro", "const"] or var.pdo_mappable:
+        return False
+    if var.index in VOLATILE_OBJECTS:
+        return False
+    return (var.index, var.subindex) not in VOLATILE_ENTRIES
+
+
+def identity_key(vendor: int, product: int, revision: int, objdict: str) -> str:
+    """
+    function to get the cache key of a device identity and object dictionary
+    hash, the identity first so that it can be invalidated
+    """
+    return f"{vendor:08X}_{product:08X}_{revision:08X}_{objdict[:16]}_{CACHE_FORMAT}"
+
+
+def load(key: str) -> dict[tuple[int, int], bytes]:
+    """
+    function to get the cached values of an identity, empty if missing
+    """
+    path = os.path.join(odcache.cache_dir("identity"), f"{key}.json")
+    try:
+        data = odcache.load_file(path)
+        records = json.loads(data) if data is not None else []
+    except (OSError, ValueError) as err:
+        logging.debug("no cached values for %s: %s", key, err)
+        return {}
+    return {(index, subindex): bytes.fromhex(data) for index, subindex, data in records}
+
+
+def store(key: str, values: dict[tuple[int, int], bytes]):
+    """
+    function to save the values of an identity, evicting the least used ones
+    """
+    if key is None:
+        # without the identity the values cannot be shared with other devices
+        raise ValueError("missing the identity cache key")
+    records = [
+        [index, subindex, data.hex()]
+        for (index, subindex), data in sorted(values.items())
+    ]
+    try:
+        odcache.store_file(
+            odcache.cache_dir("identity"),
+            f"{key}.json",
+            json.dumps(records).encode("utf-8"),
+            CACHE_SIZE,
+        )
+    except OSError as err:
+        logging.debug("identity cache not saved: %s", err)
+
+
+def invalidate(
+    vendor: int | None = None, product: int | None = None, revision: int | None = None
+) -> int:
+    """
+    function to delete the cached values of the matching identities, all of
+    them if nothing is given, and to return how many were deleted
+    """
+    folder = odcache.cache_dir("identity")
+    if not os.path.isdir(folder):
+        return 0
+    removed = 0
+    for name in os.listdir(folder):
+        if not name.endswith(".json"):
+            continue
+        fields = name.split("_")
+        if (
+            (vendor is None or fields[0] == f"{vendor:08X}")
+            and (product is None or fields[1] == f"{product:08X}")
+            and (revision is None or fields[2] == f"{revision:08X}")
+        ):
+            os.remove(os.path.join(folder, name))
+            removed += 1
+    return removed
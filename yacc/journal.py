@@ -0,0 +1,91 @@
+"""
+Module for the checkpoint journals of the long operations
+"""
+
+import json
+import logging
+import os
+
+
+class Journal:
+    """
+    class to keep a journal of an operation, one JSON record per line
+
+    The first line is a header identifying the operation: a journal can be
+    resumed only with the same header. Every record is flushed as soon as it
+    is written, so the journal survives a crash of the operation.
+    """
+
+    def __init__(self, filename: str, header: dict, resume=False):
+        self.filename = filename
+        if resume and os.path.isfile(filename):
+            with open(filename, "r", encoding="utf-8") as f:
+                try:
+                    journal_header = json.loads(f.readline())
+                except json.JSONDecodeError:
+                    journal_header = None
+                f.seek(0, os.SEEK_END)
+                complete = f.tell() == 0 or self.__ends_with_newline()
+            if journal_header != header:
+                raise Exception(  # pylint: disable=broad-exception-raised
+                    f"{filename} belongs to a different operation"
+                )
+            self.__file = open(  # pylint: disable=consider-using-with
+                filename, "a", encoding="utf-8"
+            )
+            if not complete:
+                # isolate the record truncated by the interruption
+                self.__file.write("\n")
+        else:
+            self.__file = open(  # pylint: disable=consider-using-with
+                filename, "w", encoding="utf-8"
+            )
+            self.__file.write(json.dumps(header) + "\n")
+        self.__file.flush()
+
+    def __ends_with_newline(self) -> bool:
+        """
+        method to check if the last record of the journal is complete
+        """
+        with open(self.filename, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        """
+        iterate over the records, skipping the incomplete ones
+        """
+        with open(self.filename, "r", encoding="utf-8") as f:
+            f.readline()
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logging.debug("%s: skipped record %s", self.filename, line)
+
+    def write(self, record: dict):
+        """
+        method to add a record to the journal
+        """
+        self.__file.write(json.dumps(record) + "\n")
+        self.__file.flush()
+
+    def close(self):
+        """
+        method to close the journal, keeping it for a later resume
+        """
+        if not self.__file.closed:
+            self.__file.close()
+
+    def remove(self):
+        """
+        method to delete the journal once the operation is completed
+        """
+        self.close()
+        os.remove(self.filename)
@@ -0,0 +1,152 @@
+"""
+Module for the lookup tables of an object dictionary
+"""
+
+import bisect
+import dataclasses
+import difflib
+
+# requirements
+import canopen
+
+# minimum similarity of a name found by the fuzzy search, from 0 to 1
+FUZZY_CUTOFF = 0.6
+
+
+@dataclasses.dataclass(frozen=True)
+class Entry:
+    """
+    description of an entry of the object dictionary
+    """
+
+    name: str
+    data_type: int | None
+    # size in bytes, None for the strings and domains
+    length: int | None
+    access_type: str
+    pdo_mappable: bool
+
+
+class ObjectTable:
+    """
+    class with the lookup tables of an object dictionary
+
+    The tables are built once from the dictionary, so that the name, index
+    and data type lookups are plain dict accesses, and the searches do not
+    walk the dictionary. The simple variables have the single entry 0.
+    """
+
+    def __init__(self, od: canopen.ObjectDictionary):
+        # (index, name, has subindexes) in the order of the dictionary
+        self.objects = []
+        self.__indexes = {}
+        self.__names = {}
+        self.__subindexes = {}
+        self.__entry_names = {}
+        self.__entries = {}
+        for obj in od.values():
+            self.__indexes[obj.name] = obj.index
+            self.__names[obj.index] = obj.name
+            if isinstance(obj, canopen.objectdictionary.ODVariable):
+                variables = [obj]
+                self.objects.append((obj.index, obj.name, False))
+            else:
+                variables = list(obj.values())
+                self.objects.append((obj.index, obj.name, True))
+                self.__entry_names[obj.index] = [
+                    (var.subindex, var.name) for var in variables
+                ]
+            for var in variables:
+                self.__subindexes[(obj.index, var.name)] = var.subindex
+                struct = canopen.objectdictionary.ODVariable.STRUCT_TYPES.get(
+                    var.data_type
+                )
+                self.__entries[(obj.index, var.subindex)] = Entry(
+                    name=var.name,
+                    data_type=var.data_type,
+                    length=None if struct is None else struct.size,
+                    access_type=var.access_type,
+                    pdo_mappable=var.pdo_mappable,
+                )
+        # lowercase names in alphabetical order, for the prefix search
+        self.__sorted_names = sorted(
+            (name.lower(), index) for index, name in self.__names.items()
+        )
+        self.__lower_names = [
+            (name.lower(), index) for index, name in self.__names.items()
+        ]
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def index(self, name: str) -> int:
+        """
+        method to get the index of an object given the name
+        """
+        return self.__indexes[name]
+
+    def name(self, index: int) -> str:
+        """
+        method to get the name of an object given the index
+        """
+        return self.__names[index]
+
+    def entries(self, index: int) -> list[tuple[int, str]]:
+        """
+        method to get the subindex and name of the entries of an object,
+        empty for a simple variable
+        """
+        return self.__entry_names.get(index, [])
+
+    def subindex(self, index: int, name: str) -> int:
+        """
+        method to get the subindex of an entry given the name, a simple
+        variable has the name of its object
+        """
+        return self.__subindexes[(index, name)]
+
+    def entry(self, index: int, subindex: int) -> Entry:
+        """
+        method to get the description of an entry
+        """
+        return self.__entries[(index, subindex)]
+
+    def search(self, text: str, limit: int | None = None) -> list[int]:
+        """
+        method to get the indexes of the objects matching a text, best first
+
+        The matches are the objects whose index starts with the text (with
+        or without 0x), then the names starting with it, then the names
+        containing it, ignoring the case. When nothing matches the closest
+        names are returned, so that a typo still finds the object.
+        """
+        text = text.strip().lower()
+        found = {}
+        prefix = text.removeprefix("0x")
+        try:
+            int(prefix, 16)
+        except ValueError:
+            pass
+        else:
+            for index, _name, _entries in self.objects:
+                if f"{index:04x}".startswith(prefix):
+                    found[index] = None
+        start = bisect.bisect_left(self.__sorted_names, (text,))
+        for name, index in self.__sorted_names[start:]:
+            if not name.startswith(text):
+                break
+            found[index] = None
+        for name, index in self.__lower_names:
+            if text in name:
+                found[index] = None
+        if not found and text:
+            names = difflib.get_close_matches(
+                text,
+                [name for name, _index in self.__lower_names],
+                n=limit or 10,
+                cutoff=FUZZY_CUTOFF,
+            )
+            lower_indexes = {name: index for name, index in self.__lower_names}
+            found = {lower_indexes[name]: None for name in names}
+        indexes = list(found)
+        return indexes if limit is None else indexes[:limit]
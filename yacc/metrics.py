@@ -0,0 +1,210 @@
+"""
+Module to collect and export the SDO transfer metrics
+"""
+
+import bisect
+import json
+import math
+import threading
+
+# upper bounds of the round-trip time histogram buckets, in seconds
+BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+# number of the slowest entries kept in the summary
+SLOWEST = 10
+
+FORMATS = ["json", "prometheus"]
+
+
+def index_range(index: int) -> str:
+    """
+    function to get the range, 0x100 indexes wide, an index belongs to
+    """
+    return f"0x{index & 0xFF00:04X}"
+
+
+class Histogram:
+    """
+    class to aggregate the SDO transfers of a node, direction and index range
+    """
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.bytes = 0
+        self.retries = 0
+        self.errors = 0
+        self.aborts = {}
+
+    def add(self, rtt: float, size: int, retries: int, abort_code: int | None, error):
+        """
+        method to add a transfer
+        """
+        self.buckets[bisect.bisect_left(BUCKETS, rtt)] += 1
+        self.count += 1
+        self.sum += rtt
+        self.max = max(self.max, rtt)
+        self.bytes += size
+        self.retries += retries
+        if abort_code is not None:
+            self.aborts[abort_code] = self.aborts.get(abort_code, 0) + 1
+        elif error:
+            self.errors += 1
+
+    def cumulative(self) -> list[int]:
+        """
+        method to get the cumulative bucket counts, the last one is +Inf
+        """
+        counts = []
+        total = 0
+        for count in self.buckets:
+            total += count
+            counts.append(total)
+        return counts
+
+    def to_dict(self) -> dict:
+        """
+        method to get the summary of the histogram
+        """
+        return {
+            "count": self.count,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "errors": self.errors,
+            "aborts": {f"0x{code:08X}": n for code, n in sorted(self.aborts.items())},
+            "mean_s": round(self.sum / self.count, 6) if self.count else None,
+            "max_s": round(self.max, 6),
+            "histogram": {
+                ("+Inf" if math.isinf(le) else str(le)): count
+                for le, count in zip(BUCKETS + (math.inf,), self.cumulative())
+            },
+        }
+
+
+class Metrics:
+    """
+    class to collect the round-trip time, size, retries and abort code of
+    every SDO transfer
+
+    The transfers are aggregated in histograms by node, direction and index
+    range; a Metrics can be shared by the devices of a bus.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__histograms = {}
+        self.__slowest = []
+
+    def record(
+        self,
+        nodeid: int,
+        direction: str,
+        index: int,
+        subindex: int,
+        rtt: float,
+        size: int = 0,
+        retries: int = 0,
+        abort_code: int | None = None,
+        error=False,
+    ):
+        """
+        method to record a SDO transfer, the round-trip time is in seconds
+        """
+        key = (nodeid, direction, index_range(index))
+        with self.__lock:
+            if key not in self.__histograms:
+                self.__histograms[key] = Histogram()
+            self.__histograms[key].add(rtt, size, retries, abort_code, error)
+            entry = (rtt, nodeid, direction, index, subindex)
+            if len(self.__slowest) < SLOWEST:
+                bisect.insort(self.__slowest, entry)
+            elif rtt > self.__slowest[0][0]:
+                self.__slowest.pop(0)
+                bisect.insort(self.__slowest, entry)
+
+    def reset(self):
+        """
+        method to drop the recorded transfers
+        """
+        with self.__lock:
+            self.__histograms = {}
+            self.__slowest = []
+
+    def to_dict(self) -> dict:
+        """
+        method to get the summary of the recorded transfers
+        """
+        summary = {"buckets_s": list(BUCKETS), "nodes": {}, "slowest": []}
+        with self.__lock:
+            for (nodeid, direction, irange), hist in sorted(self.__histograms.items()):
+                node = summary["nodes"].setdefault(str(nodeid), {})
+                node.setdefault(direction, {})[irange] = hist.to_dict()
+            for rtt, nodeid, direction, index, subindex in reversed(self.__slowest):
+                summary["slowest"].append(
+                    {
+                        "node": nodeid,
+                        "direction": direction,
+                        "index": f"0x{index:04X}",
+                        "subindex": f"0x{subindex:02X}",
+                        "rtt_s": round(rtt, 6),
+                    }
+                )
+        return summary
+
+    def to_prometheus(self) -> str:
+        """
+        method to get the recorded transfers in the Prometheus text format
+        """
+        with self.__lock:
+            items = sorted(self.__histograms.items())
+        lines = [
+            "# HELP yacc_sdo_rtt_seconds SDO transfer round-trip time",
+            "# TYPE yacc_sdo_rtt_seconds histogram",
+        ]
+        for (nodeid, direction, irange), hist in items:
+            labels = f'node="{nodeid}",direction="{direction}",range="{irange}"'
+            for le, count in zip(BUCKETS + (math.inf,), hist.cumulative()):
+                le = "+Inf" if math.isinf(le) else le
+                lines.append(
+                    f'yacc_sdo_rtt_seconds_bucket{{{labels},le="{le}"}} {count}'
+                )
+            lines.append(f"yacc_sdo_rtt_seconds_sum{{{labels}}} {hist.sum:.6f}")
+            lines.append(f"yacc_sdo_rtt_seconds_count{{{labels}}} {hist.count}")
+        counters = [
+            ("bytes", "SDO payload bytes", "bytes"),
+            ("retries", "SDO transfer retries", "retries"),
+            ("errors", "SDO transfers failed without abort", "errors"),
+        ]
+        for name, text, attribute in counters:
+            lines.append(f"# HELP yacc_sdo_{name}_total {text}")
+            lines.append(f"# TYPE yacc_sdo_{name}_total counter")
+            for (nodeid, direction, irange), hist in items:
+                labels = f'node="{nodeid}",direction="{direction}",range="{irange}"'
+                lines.append(
+                    f"yacc_sdo_{name}_total{{{labels}}} {getattr(hist, attribute)}"
+                )
+        lines.append("# HELP yacc_sdo_aborts_total SDO transfers aborted, by code")
+        lines.append("# TYPE yacc_sdo_aborts_total counter")
+        for (nodeid, direction, irange), hist in items:
+            for code, count in sorted(hist.aborts.items()):
+                labels = (
+                    f'node="{nodeid}",direction="{direction}",range="{irange}",'
+                    f'code="0x{code:08X}"'
+                )
+                lines.append(f"yacc_sdo_aborts_total{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, filename: str, fmt: str = "json"):
+        """
+        method to write the summary to a file, as json or prometheus text
+        """
+        if fmt not in FORMATS:
+            raise Exception(  # pylint: disable=broad-exception-raised
+                f"unknown metrics format {fmt}"
+            )
+        with open(filename, "w", encoding="utf-8") as f:
+            if fmt == "json":
+                json.dump(self.to_dict(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
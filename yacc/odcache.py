@@ -0,0 +1,215 @@
+"""
+Module for the object dictionary parsing, with an in-process and on-disk cache
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import platform
+import stat
+import threading
+import time
+
+# requirements
+import canopen
+from canopen.objectdictionary import eds
+
+# number of parsed object dictionaries kept on disk
+CACHE_SIZE = 32
+# bump to invalidate the cached object dictionaries
+CACHE_FORMAT = 2
+# the cache is private, unpickling a file of another user would run their code
+CACHE_DIR_MODE = 0o700
+CACHE_FILE_MODE = 0o600
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def cache_dir(name: str = "objdict") -> str:
+    """
+    function to get the folder of an on-disk cache
+    """
+    if "YACC_CACHE_DIR" in os.environ:
+        return os.path.join(os.environ["YACC_CACHE_DIR"], name)
+    if platform.system() == "Windows":
+        base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+    else:
+        base = os.environ.get(
+            "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+        )
+    return os.path.join(base, "yacc", name)
+
+
+def file_hash(filename: str) -> str:
+    """
+    function to get the hash of the content of a file
+    """
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _cache_key(filename: str) -> str:
+    """
+    function to get the cache key from the content of the file
+    """
+    key = f"{file_hash(filename)}|{canopen.__version__}|{CACHE_FORMAT}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _trusted(status: os.stat_result) -> bool:
+    """
+    function to check that a cached file is owned by the current user and not
+    writable by the others (always true where there are no owners)
+    """
+    if not hasattr(os, "getuid"):
+        return True
+    return status.st_uid == os.getuid() and not status.st_mode & (
+        stat.S_IWGRP | stat.S_IWOTH
+    )
+
+
+def load_file(path: str) -> bytes | None:
+    """
+    function to read a file of an on-disk cache, None if it is not private to
+    the user; an OSError is raised if it cannot be read
+    """
+    with open(path, "rb") as f:
+        if not _trusted(os.fstat(f.fileno())):
+            logging.warning("%s not loaded: not private to the user", path)
+            return None
+        data = f.read()
+    # the modification time is the last use for the LRU eviction
+    os.utime(path)
+    return data
+
+
+def store_file(folder: str, name: str, data: bytes, size: int):
+    """
+    function to save a file of an on-disk cache, private to the user, keeping
+    the size most recently used files with the same extension; an OSError is
+    raised if it cannot be saved
+    """
+    os.makedirs(folder, mode=CACHE_DIR_MODE, exist_ok=True)
+    path = os.path.join(folder, name)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, CACHE_FILE_MODE)
+    with open(fd, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    extension = os.path.splitext(name)[1]
+    entries = [
+        os.path.join(folder, entry)
+        for entry in os.listdir(folder)
+        if entry.endswith(extension)
+    ]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for old_path in entries[size:]:
+        os.remove(old_path)
+
+
+def _load(key: str) -> bytes | None:
+    """
+    function to get a pickled object dictionary from the disk cache
+    """
+    try:
+        return load_file(os.path.join(cache_dir(), f"{key}.pickle"))
+    except OSError:
+        return None
+
+
+def _store(key: str, blob: bytes):
+    """
+    function to save a pickled object dictionary to the disk cache
+    """
+    try:
+        store_file(cache_dir(), f"{key}.pickle", blob, CACHE_SIZE)
+    except OSError as err:
+        logging.debug("object dictionary cache not saved: %s", err)
+
+
+def _apply_node_id(od, node_id: int | None):
+    """
+    function to set the values relative to the node id ($NODEID) of an object
+    dictionary parsed without a node id
+    """
+    # as canopen does, the node id of a dcf is used when none is given
+    node_id = node_id or od.node_id
+    if node_id is None:
+        return
+    for obj in od.values():
+        if isinstance(obj, canopen.objectdictionary.ODVariable):
+            variables = [obj]
+        else:
+            variables = obj.values()
+        for var in variables:
+            for raw, attribute in [("default_raw", "default"), ("value_raw", "value")]:
+                text = getattr(var, raw, None)
+                if text is None or "$NODEID" not in text.upper():
+                    continue
+                try:
+                    setattr(
+                        var,
+                        attribute,
+                        eds._convert_variable(  # pylint: disable=protected-access
+                            node_id, var.data_type, text
+                        ),
+                    )
+                except ValueError:
+                    pass
+
+
+def import_od(filename: str, node_id: int | None = None):
+    """
+    function to parse an eds/dcf file, parsing it at most once per run
+
+    The file is parsed without a node id and the values relative to the node
+    id are set on each copy, so a bus of nodes sharing a file parses it once.
+    Every call returns a new object dictionary, so it can be freely modified.
+    """
+    start = time.perf_counter()
+    key = _cache_key(filename)
+    with _memo_lock:
+        blob = _memo.get(key)
+    source = "memory"
+    if blob is None:
+        blob = _load(key)
+        source = "disk cache"
+    if blob is not None:
+        try:
+            od = pickle.loads(blob)
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            logging.debug("invalid cached object dictionary: %s", err)
+            blob = None
+    if blob is None:
+        od = canopen.import_od(filename)
+        blob = pickle.dumps(od, protocol=pickle.HIGHEST_PROTOCOL)
+        _store(key, blob)
+        source = "file"
+    with _memo_lock:
+        _memo[key] = blob
+    _apply_node_id(od, node_id)
+    logging.info(
+        "%s loaded from %s in %.1f ms",
+        filename,
+        source,
+        (time.perf_counter() - start) * 1000,
+    )
+    return od
+
+
+def clear_cache():
+    """
+    function to empty the in-process and the on-disk cache
+    """
+    with _memo_lock:
+        _memo.clear()
+    folder = cache_dir()
+    if not os.path.isdir(folder):
+        return
+    for name in os.listdir(folder):
+        if name.endswith(".pickle"):
+            os.remove(os.path.join(folder, name))
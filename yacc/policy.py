@@ -0,0 +1,153 @@
+"""
+Module for the timeout and retry policy of the SDO transfers
+"""
+
+import threading
+
+# requirements
+import canopen
+
+# abort codes that can be caused by a transient condition of the node or bus;
+# the general error (0x08000000) and data cannot be transferred or stored
+# (0x08000020) are usually a deterministic refusal, to be added in config.toml
+RETRYABLE_ABORTS = (
+    0x05040000,  # SDO protocol timed out
+    0x06060000,  # access failed due to a hardware error
+    0x08000021,  # data cannot be transferred because of local control
+    0x08000022,  # data cannot be transferred because of the device state
+)
+# kinds of transfer, with their own minimum timeout: the round-trip time is
+# measured on the expedited ones, a write may have to store the value and a
+# block transfer waits a whole block before the response
+TRANSFER_KINDS = ("read", "write", "segmented", "block")
+
+
+class SdoPolicy:
+    """
+    class to decide the SDO response timeout and when to retry a transfer
+
+    The timeout follows the round-trip time measured on the single frame
+    transfers (smoothed mean plus four times the mean deviation, as TCP does),
+    bounded by the minimum of the kind of transfer and timeout, and it is
+    doubled after every timeout. A transfer that times out, or that is
+    aborted with a retryable code, is repeated up to retries times, waiting
+    backoff, 2 * backoff, ...
+
+    Until the node answers for the first time the timeout is probe_timeout
+    and a timeout is not repeated, so that a missing node is reported fast.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 1.0,
+        min_timeout: float = 0.05,
+        min_write_timeout: float = 0.2,
+        min_segmented_timeout: float = 0.1,
+        min_block_timeout: float = 0.5,
+        probe_timeout: float = 0.5,
+        adaptive: bool = True,
+        retries: int = 2,
+        backoff: float = 0.02,
+        retryable_aborts: list[int | str] | None = None,
+    ):
+        """
+        the timeouts and the backoff are in seconds, the timeout is also the
+        one used before any round-trip time is measured; min_timeout is the
+        minimum of the expedited reads
+        """
+        self.max_timeout = float(timeout)
+        self.min_timeout = min(float(min_timeout), self.max_timeout)
+        self.min_timeouts = {
+            kind: min(float(value), self.max_timeout)
+            for kind, value in zip(
+                TRANSFER_KINDS,
+                [
+                    min_timeout,
+                    min_write_timeout,
+                    min_segmented_timeout,
+                    min_block_timeout,
+                ],
+            )
+        }
+        self.probe_timeout = min(float(probe_timeout), self.max_timeout)
+        self.adaptive = adaptive
+        self.retries = int(retries)
+        self.backoff = float(backoff)
+        if retryable_aborts is None:
+            retryable_aborts = RETRYABLE_ABORTS
+        self.retryable_aborts = {
+            int(code, 16) if isinstance(code, str) else int(code)
+            for code in retryable_aborts
+        }
+        self.__lock = threading.Lock()
+        self.__srtt = None
+        self.__rttvar = None
+        self.__timeout = self.max_timeout
+        self.__answered = False
+
+    def reset(self):
+        """
+        method to forget the measured round-trip time and that the node
+        answered
+        """
+        with self.__lock:
+            self.__srtt = None
+            self.__rttvar = None
+            self.__timeout = self.max_timeout
+            self.__answered = False
+
+    def answered(self):
+        """
+        method to note that the node answered a request
+        """
+        self.__answered = True
+
+    def timeout(self, kind: str = "read") -> float:
+        """
+        method to get the response timeout of the next request of a kind of
+        transfer
+        """
+        if not self.__answered:
+            return max(self.probe_timeout, self.min_timeouts[kind])
+        return max(self.__timeout, self.min_timeouts[kind])
+
+    def update(self, rtt: float):
+        """
+        method to add the round-trip time of a single frame transfer
+        """
+        self.__answered = True
+        if not self.adaptive:
+            return
+        with self.__lock:
+            if self.__srtt is None:
+                self.__srtt = rtt
+                self.__rttvar = rtt / 2
+            else:
+                self.__rttvar = 0.75 * self.__rttvar + 0.25 * abs(self.__srtt - rtt)
+                self.__srtt = 0.875 * self.__srtt + 0.125 * rtt
+            self.__timeout = min(
+                max(self.__srtt + 4 * self.__rttvar, self.min_timeout),
+                self.max_timeout,
+            )
+
+    def retry(self, err: Exception, attempt: int) -> float | None:
+        """
+        method to get the wait before repeating a failed transfer,
+        None if the error is fatal or there are no more retries
+        """
+        if isinstance(err, canopen.SdoAbortedError):
+            self.__answered = True
+        if isinstance(err, canopen.SdoCommunicationError):
+            if not self.__answered:
+                # the node never answered, it is likely missing
+                return None
+            with self.__lock:
+                self.__timeout = min(2 * self.__timeout, self.max_timeout)
+        elif not (
+            isinstance(err, canopen.SdoAbortedError)
+            and err.code in self.retryable_aborts
+        ):
+            return None
+        if attempt >= self.retries:
+            return None
+        return self.backoff * 2**attempt
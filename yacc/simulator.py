@@ -0,0 +1,255 @@
+"""
+Module to simulate CANopen devices on a (virtual) CAN bus
+"""
+
+import heapq
+import itertools
+import logging
+import random
+import struct
+import threading
+import time
+
+# requirements
+import canopen
+from canopen.sdo.constants import REQUEST_DOWNLOAD, REQUEST_UPLOAD, RESPONSE_ABORTED
+
+# local module
+from device import can_interface
+import odcache
+
+
+class DelayedDispatcher(threading.Thread):
+    """
+    thread calling the callbacks after a delay, in order of due time
+
+    A single thread serves all the simulated nodes, so a response delay does
+    not serialize the nodes as a sleep in the receiving thread would do.
+    """
+
+    def __init__(self):
+        super().__init__(name="yacc-simulator", daemon=True)
+        self.__queue = []
+        self.__counter = itertools.count()
+        self.__condition = threading.Condition()
+        self.__running = True
+
+    def schedule(self, delay: float, callback, *args):
+        """
+        method to call the callback after the delay, in seconds
+        """
+        with self.__condition:
+            heapq.heappush(
+                self.__queue,
+                (time.monotonic() + delay, next(self.__counter), callback, args),
+            )
+            self.__condition.notify()
+
+    def stop(self):
+        """
+        method to stop the thread, dropping the pending callbacks
+        """
+        with self.__condition:
+            self.__running = False
+            self.__condition.notify()
+        self.join()
+
+    def run(self):
+        while True:
+            with self.__condition:
+                while self.__running and (
+                    not self.__queue or self.__queue[0][0] > time.monotonic()
+                ):
+                    if self.__queue:
+                        self.__condition.wait(self.__queue[0][0] - time.monotonic())
+                    else:
+                        self.__condition.wait()
+                if not self.__running:
+                    return
+                _, _, callback, args = heapq.heappop(self.__queue)
+            try:
+                callback(*args)
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                logging.debug(err)
+
+
+class Simulator:
+    """
+    class to serve an object dictionary as one or many virtual nodes
+
+    Every node answers the SDO requests after the configured delay, sends
+    its heartbeat and, when OPERATIONAL, its synchronous TPDOs at every SYNC.
+    The SDO requests are counted, one per round trip.
+    Aborts can be injected on given entries and/or at random.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        nodeids: list[int] | None = None,
+        interface: str = "virtual",
+        channel: str | int | None = None,
+        baudrate: int = 250,
+        delay: float = 0.0,
+        heartbeat: int = 100,
+        aborts: list[tuple[int, int | None]] | None = None,
+        abort_rate: float = 0.0,
+        abort_code: int = 0x08000000,
+    ):
+        """
+        the delay is in seconds, the heartbeat period in ms (0 to disable);
+        aborts are (index, subindex) pairs, a None subindex for all of them,
+        abort_rate is the probability of aborting any other transfer
+        """
+        self.__filename = filename
+        self.__nodeids = nodeids if nodeids else [1]
+        self.__interface, default_channel = can_interface(interface)
+        self.__channel = default_channel if channel is None else channel
+        self.__baudrate = baudrate
+        self.__delay = delay
+        self.__heartbeat = heartbeat
+        self.__aborts = set(aborts) if aborts else set()
+        self.__abort_rate = abort_rate
+        self.__abort_code = abort_code
+        self.__random = random.Random()
+        self.__network = None
+        self.__dispatcher = None
+        self.__lock = threading.Lock()
+        self.__syncs = 0
+        self.__tpdos = {}
+        self.nodes = {}
+        self.sdo_requests = {}
+        self.injected_aborts = {}
+
+    def __to_abort(self, index, subindex) -> bool:
+        """
+        method to decide if a transfer has to be aborted
+        """
+        if (index, subindex) in self.__aborts or (index, None) in self.__aborts:
+            return True
+        return self.__abort_rate > 0 and self.__random.random() < self.__abort_rate
+
+    def __on_sdo_request(self, node, can_id, data, timestamp):
+        """
+        callback of the SDO requests of a node
+        """
+        callback = node.sdo.on_request
+        args = (can_id, bytes(data), timestamp)
+        with self.__lock:
+            self.sdo_requests[node.id] += 1
+            if (data[0] & 0xE0) in [REQUEST_UPLOAD, REQUEST_DOWNLOAD]:
+                _, index, subindex = struct.unpack_from("<BHB", data)
+                if self.__to_abort(index, subindex):
+                    self.injected_aborts[node.id] += 1
+                    callback = self.__network.send_message
+                    args = (
+                        node.sdo.tx_cobid,
+                        struct.pack(
+                            "<BHBL",
+                            RESPONSE_ABORTED,
+                            index,
+                            subindex,
+                            self.__abort_code,
+                        ),
+                    )
+        if self.__delay > 0:
+            self.__dispatcher.schedule(self.__delay, callback, *args)
+        else:
+            callback(*args)
+
+    def __on_sync(self, can_id, data, timestamp):
+        """
+        callback of the SYNC, sending the mapped values of the synchronous
+        TPDOs of the OPERATIONAL nodes
+        """
+        self.__syncs += 1
+        for node in list(self.nodes.values()):
+            if node.nmt.state != "OPERATIONAL":
+                continue
+            for number in self.__tpdos[node.id]:
+                cobid = int.from_bytes(node.get_data(0x1800 + number, 1), "little")
+                transmission = node.get_data(0x1800 + number, 2)[0]
+                if cobid & 0x80000000 or not 1 <= transmission <= 240:
+                    continue
+                if self.__syncs % transmission:
+                    continue
+                pdo = b""
+                for subindex in range(1, node.get_data(0x1A00 + number, 0)[0] + 1):
+                    value = int.from_bytes(
+                        node.get_data(0x1A00 + number, subindex), "little"
+                    )
+                    pdo += node.get_data(value >> 16, (value >> 8) & 0xFF)[
+                        : (value & 0xFF) // 8
+                    ]
+                self.__network.send_message(cobid & 0x7FF, pdo)
+
+    def start(self):
+        """
+        method to connect to the bus and to start the nodes
+        """
+        self.__network = canopen.Network()
+        self.__network.connect(
+            channel=self.__channel,
+            interface=self.__interface,
+            bitrate=self.__baudrate * 1000,
+        )
+        if self.__delay > 0:
+            self.__dispatcher = DelayedDispatcher()
+            self.__dispatcher.start()
+        self.__network.subscribe(self.__network.sync.cob_id, self.__on_sync)
+        for nodeid in self.__nodeids:
+            node = canopen.LocalNode(nodeid, odcache.import_od(self.__filename, nodeid))
+            self.__network.add_node(node)
+            self.__network.unsubscribe(node.sdo.rx_cobid)
+            self.__network.subscribe(
+                node.sdo.rx_cobid,
+                lambda can_id, data, timestamp, node=node: self.__on_sdo_request(
+                    node, can_id, data, timestamp
+                ),
+            )
+            node.nmt.state = "PRE-OPERATIONAL"
+            if self.__heartbeat:
+                node.nmt.start_heartbeat(self.__heartbeat)
+            self.__tpdos[nodeid] = [
+                number
+                for number in range(512)
+                if 0x1800 + number in node.object_dictionary
+                and 0x1A00 + number in node.object_dictionary
+            ]
+            self.nodes[nodeid] = node
+            self.sdo_requests[nodeid] = 0
+            self.injected_aborts[nodeid] = 0
+
+    def stop(self):
+        """
+        method to stop the nodes and to disconnect from the bus
+        """
+        for node in self.nodes.values():
+            node.nmt.stop_heartbeat()
+        if self.__dispatcher is not None:
+            self.__dispatcher.stop()
+            self.__dispatcher = None
+        self.__network.disconnect()
+        self.nodes = {}
+
+    def serve(self):
+        """
+        method to run the nodes until interrupted (Ctrl+C)
+        """
+        self.start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def reset_counters(self):
+        """
+        method to reset the SDO request and injected abort counters
+        """
+        with self.__lock:
+            for nodeid in self.sdo_requests:
+                self.sdo_requests[nodeid] = 0
+                self.injected_aborts[nodeid] = 0
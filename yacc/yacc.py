@@ -3,11 +3,13 @@ Yet another CANopen configurator
 """
 
 import argparse
+import contextlib
+import csv
+import json
 import logging
-import platform
 import os
 import sys
-import tkinter as tk
+import time
 
 try:
     import tomllib
@@ -19,12 +21,539 @@ except ImportError:
         sys.exit(1)
 
 # local module
-from gui import Gui
-from device import Device
+from metrics import FORMATS as METRICS_FORMATS
 from __init__ import __version__ as VERSION
 
-# dependancies
-from tqdm import tqdm
+# the GUI, the progress bars and the CAN stack are imported by the commands
+# using them, so that a command starts without loading what it does not need
+
+# keys of the [sdo] section of config.toml for the SDO timeout and retry policy
+SDO_POLICY_KEYS = [
+    "timeout",
+    "min_timeout",
+    "min_write_timeout",
+    "min_segmented_timeout",
+    "min_block_timeout",
+    "probe_timeout",
+    "adaptive",
+    "retries",
+    "backoff",
+    "retryable_aborts",
+]
+
+
+def save_metrics(args, metrics):
+    """
+    write the summary of the SDO transfers, if requested
+    """
+    if not args.metrics:
+        return
+    extension = "json" if args.metrics == "json" else "prom"
+    timestamp = time.strftime("%y%m%d-%H%M%S", time.localtime())
+    filename = f"{args.command}_{timestamp}_metrics.{extension}"
+    try:
+        metrics.save(filename, args.metrics)
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        print(f"error: {err}")
+    else:
+        print(f"metrics saved to {filename}")
+
+
+def report_mismatches(mismatches, nodeid, prefix=""):
+    """
+    print the entries that differ after a verified download and save them
+    """
+    for mismatch in mismatches:
+        actual = mismatch["actual"] if mismatch["error"] is None else mismatch["error"]
+        print(
+            f"{prefix}  {mismatch['index']} {mismatch['subindex']}: "
+            f"expected {mismatch['expected']}, read {actual}"
+        )
+    timestamp = time.strftime("%y%m%d-%H%M%S", time.localtime())
+    filename = f"verify_{timestamp}_node{nodeid}.json"
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(mismatches, f, indent=2)
+    print(f"{prefix}mismatches saved to {filename}")
+
+
+def print_aborts(aborts, prefix=""):
+    """
+    print the entries an upload could not read
+    """
+    print(f"{prefix}{len(aborts)} entries not read")
+    for index, subindex, code in aborts:
+        print(f"{prefix}  0x{index:04X} 0x{subindex:02X}: abort code 0x{code:08X}")
+
+
+def multi_node(args, settings):
+    """
+    upload/download of several nodes sharing the same bus
+    """
+    from bus import Bus, parse_nodeids  # pylint: disable=import-outside-toplevel
+    from tqdm import tqdm  # pylint: disable=import-outside-toplevel
+
+    if not os.path.isfile(args.file):
+        print(f"{args.file} does not exist")
+        sys.exit(1)
+    try:
+        nodeids = parse_nodeids(args.nodes)
+    except ValueError as err:
+        print(f"error: {err}")
+        sys.exit(1)
+    bus = Bus(nodeids=nodeids, filename=args.file, **settings)
+    for device in bus.devices.values():
+        device.set_identity_cache(
+            args.identity_cache or args.refresh_identity_cache,
+            args.refresh_identity_cache,
+        )
+    try:
+        bus.connect()
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        logging.debug(err)
+        print("I can't connect to the devices")
+        sys.exit(1)
+
+    if args.command == "upload":
+        print(f"uploading from {len(nodeids)} devices...")
+    else:
+        print(f"downloading to {len(nodeids)} devices...")
+    iteration = bus.get_objdict_elements(args.file, args.command == "upload")
+    pbars = {
+        nodeid: tqdm(total=iteration, desc=f"node {nodeid:3d}", position=position)
+        for position, nodeid in enumerate(nodeids)
+    }
+    failed = 0
+    try:
+        if args.command == "upload":
+            results = bus.upload_dcf(
+                lambda nodeid: pbars[nodeid].update(1),
+                resume=args.resume,
+                collect_aborts=args.collect_aborts,
+            )
+        else:
+            results = bus.download_dcf(
+                args.file,
+                lambda nodeid: pbars[nodeid].update(1),
+                diff=args.diff,
+                snapshot=args.snapshot,
+                resume=args.resume,
+                verify=args.verify,
+                verify_attempts=args.verify_attempts,
+            )
+        for pbar in pbars.values():
+            pbar.close()
+        for nodeid, err in results.items():
+            if err is not None:
+                print(f"node {nodeid}: error: {err}")
+                failed += 1
+                mismatches = bus.devices[nodeid].get_verify_mismatches()
+                if mismatches:
+                    report_mismatches(mismatches, nodeid, f"node {nodeid}: ")
+                else:
+                    print(f"node {nodeid}: use --resume to continue the {args.command}")
+            elif args.command == "download" and args.save:
+                try:
+                    bus.devices[nodeid].save()
+                except Exception as save_err:  # pylint: disable=broad-exception-caught
+                    print(f"node {nodeid}: error: {save_err}")
+                    failed += 1
+                else:
+                    print(f"node {nodeid}: done and saved")
+            else:
+                print(f"node {nodeid}: done")
+            if err is None and args.command == "upload" and args.identity_cache:
+                hits = bus.devices[nodeid].get_identity_cache_hits()
+                print(f"node {nodeid}: {hits} values from the identity cache")
+            if err is None and args.command == "upload" and args.collect_aborts:
+                print_aborts(
+                    bus.devices[nodeid].get_upload_aborts(), f"node {nodeid}: "
+                )
+            if err is None and args.command == "download" and args.diff:
+                skipped = bus.devices[nodeid].get_skipped_writes()
+                print(f"node {nodeid}: {skipped} writes skipped")
+    finally:
+        bus.disconnect()
+        save_metrics(args, bus.metrics)
+    print(f"{len(nodeids) - failed}/{len(nodeids)} nodes done")
+    if args.command == "download" and not args.save:
+        print("remember to save (if needed)")
+    sys.exit(1 if failed else 0)
+
+
+def flash(args, nodeid, settings):
+    """
+    firmware flashing of one or several nodes sharing the same bus
+    """
+    from bus import Bus, parse_nodeids  # pylint: disable=import-outside-toplevel
+    from tqdm import tqdm  # pylint: disable=import-outside-toplevel
+
+    if not os.path.isfile(args.file):
+        print(f"{args.file} does not exist")
+        sys.exit(1)
+    if len(args.entries) != 1 or not os.path.isfile(args.entries[0]):
+        print("error: flash takes a single existing firmware image")
+        sys.exit(1)
+    image = args.entries[0]
+    try:
+        nodeids = parse_nodeids(args.nodes) if args.nodes else [nodeid]
+    except ValueError as err:
+        print(f"error: {err}")
+        sys.exit(1)
+    bus = Bus(nodeids=nodeids, filename=args.file, **settings)
+    try:
+        bus.connect()
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        logging.debug(err)
+        print("I can't connect to the devices")
+        sys.exit(1)
+
+    print(f"flashing {image} to {len(nodeids)} devices...")
+    pbars = {
+        nodeid: tqdm(
+            total=os.path.getsize(image),
+            desc=f"node {nodeid:3d}",
+            position=position,
+            unit="B",
+            unit_scale=True,
+        )
+        for position, nodeid in enumerate(nodeids)
+    }
+
+    def progress(nodeid, done, _size):
+        pbars[nodeid].update(done - pbars[nodeid].n)
+
+    failed = 0
+    try:
+        results = bus.flash(image, progress, args.program, args.software_id)
+        for pbar in pbars.values():
+            pbar.close()
+        for nodeid, err in results.items():
+            if err is not None:
+                print(f"node {nodeid}: error: {err}")
+                failed += 1
+                continue
+            software_id = bus.devices[nodeid].get_software_id()
+            if software_id is None:
+                print(f"node {nodeid}: done")
+            else:
+                print(
+                    f"node {nodeid}: done, software identification 0x{software_id:08X}"
+                )
+    finally:
+        bus.disconnect()
+        save_metrics(args, bus.metrics)
+    print(f"{len(nodeids) - failed}/{len(nodeids)} nodes flashed")
+    sys.exit(1 if failed else 0)
+
+
+def log_level(args) -> int | None:
+    """
+    function to get the logging level of the --info and --debug options,
+    None if the logging is disabled
+    """
+    if args.info:
+        return logging.INFO
+    if args.debug:
+        return logging.DEBUG
+    return None
+
+
+def fleet(args, settings):
+    """
+    upload/download of several buses, one process per bus
+    """
+    from fleet import Fleet, load_manifest  # pylint: disable=import-outside-toplevel
+    from tqdm import tqdm  # pylint: disable=import-outside-toplevel
+
+    try:
+        buses = load_manifest(args.fleet)
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        print(f"error: {err}")
+        sys.exit(1)
+    runner = Fleet(buses, settings)
+    nodes = sum(len(bus["nodeids"]) for bus in buses)
+    print(f"{args.command} of {nodes} devices on {len(buses)} buses...")
+    pbars = [
+        tqdm(total=0, desc=label, position=position)
+        for position, label in enumerate(runner.labels())
+    ]
+
+    def progress(number, count, total):
+        if total is not None:
+            pbars[number].total = total
+            pbars[number].refresh()
+        pbars[number].update(count)
+
+    results = runner.run(
+        args.command,
+        progress,
+        diff=args.diff,
+        snapshot=args.snapshot,
+        resume=args.resume,
+        save=args.save,
+        verify=args.verify,
+        verify_attempts=args.verify_attempts,
+        collect_aborts=args.collect_aborts,
+        identity_cache=args.identity_cache,
+        refresh_identity_cache=args.refresh_identity_cache,
+        metrics=args.metrics,
+        log_level=log_level(args),
+    )
+    for pbar in pbars:
+        pbar.close()
+    done = 0
+    for label, result in results.items():
+        if result["error"] is not None:
+            print(f"{label}: error: {result['error']}")
+        for nodeid, node in result["nodes"].items():
+            if node["error"] is not None:
+                print(f"{label} node {nodeid}: error: {node['error']}")
+            else:
+                done += 1
+    print(f"{done}/{nodes} nodes done, the files are in the folder of each bus")
+    if done < nodes:
+        print("use --resume to continue the interrupted nodes")
+    sys.exit(0 if done == nodes else 1)
+
+
+def simulate(args, nodeid, settings):
+    """
+    virtual devices serving the object dictionary
+    """
+    from bus import parse_nodeids  # pylint: disable=import-outside-toplevel
+    from simulator import Simulator  # pylint: disable=import-outside-toplevel
+
+    if not os.path.isfile(args.file):
+        print(f"{args.file} does not exist")
+        sys.exit(1)
+    try:
+        nodeids = parse_nodeids(args.nodes) if args.nodes else [nodeid]
+        aborts = []
+        for entry in args.abort:
+            index, _, subindex = entry.partition(":")
+            aborts.append((int(index, 16), int(subindex, 16) if subindex else None))
+    except ValueError as err:
+        print(f"error: {err}")
+        sys.exit(1)
+    simulator = Simulator(
+        args.file,
+        nodeids=nodeids,
+        interface=settings["interface"],
+        channel=settings.get("channel"),
+        baudrate=settings["baudrate"],
+        delay=args.delay / 1000,
+        heartbeat=args.heartbeat,
+        aborts=aborts,
+        abort_rate=args.abort_rate,
+        abort_code=args.abort_code,
+    )
+    print(f"simulating {len(nodeids)} devices, Ctrl+C to stop")
+    try:
+        simulator.serve()
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        logging.debug(err)
+        print(f"error: {err}")
+        sys.exit(1)
+    for nodeid, requests in simulator.sdo_requests.items():
+        print(
+            f"node {nodeid}: {requests} SDO requests, "
+            f"{simulator.injected_aborts[nodeid]} injected aborts"
+        )
+    sys.exit(0)
+
+
+def monitor(args, device):
+    """
+    live sampling of entries, to a csv file or to the standard output
+    """
+    if not os.path.isfile(args.file):
+        print(f"{args.file} does not exist")
+        sys.exit(1)
+    if not args.entries:
+        print("error: missing the entries to monitor")
+        sys.exit(1)
+    try:
+        device.connect()
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        logging.debug(err)
+        print("I can't connect to the device")
+        sys.exit(1)
+
+    # the samples go to the standard output if there is no output file
+    status = sys.stderr if not args.output else sys.stdout
+    f = open(args.output, "w", newline="", encoding="utf-8") if args.output else None
+    count = 0
+    start = None
+    try:
+        entries = [device.parse_entry(entry) for entry in args.entries]
+        writer = csv.writer(f if f is not None else sys.stdout)
+        writer.writerow(
+            ["time_s"]
+            + [f"0x{index:04X}:{subindex:02X}" for index, subindex in entries]
+        )
+        samples = device.monitor(
+            entries, args.period / 1000, tpdo=args.tpdo, pdo=not args.sdo_polling
+        )
+        try:
+            for timestamp, values in samples:
+                if start is None:
+                    start = timestamp
+                    tpdo = device.get_monitor_tpdo()
+                    mode = "SDO polling" if tpdo is None else f"TPDO {tpdo}"
+                    print(f"monitoring with {mode}, Ctrl+C to stop", file=status)
+                writer.writerow([f"{timestamp - start:.6f}"] + values)
+                count += 1
+                if args.duration and timestamp - start >= args.duration:
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            samples.close()
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        print(f"error: {err}", file=status)
+        sys.exit(1)
+    finally:
+        if f is not None:
+            f.close()
+        device.disconnect()
+    if count > 1:
+        elapsed = timestamp - start
+        print(
+            f"{count} samples in {elapsed:.1f} s ({count / elapsed:.0f} Hz)",
+            file=status,
+        )
+    sys.exit(0)
+
+
+def write_columns(columns, fmt, filename=""):
+    """
+    write columns of values as json or csv, to a file or the standard output
+    """
+    f = open(filename, "w", newline="", encoding="utf-8") if filename else sys.stdout
+    try:
+        if fmt == "json":
+            json.dump(columns, f, indent=2)
+            f.write("\n")
+        else:
+            writer = csv.writer(f)
+            writer.writerow(columns.keys())
+            writer.writerows(zip(*columns.values()))
+    finally:
+        if filename:
+            f.close()
+
+
+def read_write(args, device):
+    """
+    read/write of many entries, the result as json or csv
+    """
+    if not os.path.isfile(args.file):
+        print(f"{args.file} does not exist")
+        sys.exit(1)
+    if not args.entries:
+        print(f"error: missing the entries to {args.command}")
+        sys.exit(1)
+    try:
+        device.connect()
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        logging.debug(err)
+        print("I can't connect to the device")
+        sys.exit(1)
+
+    try:
+        if args.command == "read":
+            entries = [device.parse_entry(entry) for entry in args.entries]
+            columns = device.read_entries(entries).to_columns()
+        else:
+            entries = []
+            for entry in args.entries:
+                name, separator, value = entry.partition("=")
+                if not separator:
+                    raise Exception(  # pylint: disable=broad-exception-raised
+                        f"missing the value of {entry}, use ENTRY=VALUE"
+                    )
+                index, subindex = device.parse_entry(name)
+                entries.append(
+                    (index, subindex, device.encode_value(index, subindex, value))
+                )
+            columns = {
+                "index": [f"0x{index:04X}" for index, _, _ in entries],
+                "subindex": [f"0x{subindex:02X}" for _, subindex, _ in entries],
+                "error": device.write_entries(entries),
+            }
+            if args.save and not any(columns["error"]):
+                device.save()
+                print("saved", file=sys.stderr)
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        print(f"error: {err}")
+        sys.exit(1)
+    finally:
+        device.disconnect()
+        save_metrics(args, device.get_metrics())
+    write_columns(columns, args.format, args.output)
+    sys.exit(1 if any(columns["error"]) else 0)
+
+
+def domain(args, device):
+    """
+    streamed read/write of a (DOMAIN) entry from/to a file
+    """
+    from tqdm import tqdm  # pylint: disable=import-outside-toplevel
+
+    if not os.path.isfile(args.file):
+        print(f"{args.file} does not exist")
+        sys.exit(1)
+    if len(args.entries) != 1:
+        print(f"error: {args.command} takes a single entry")
+        sys.exit(1)
+    if args.command == "read-domain":
+        entry = args.entries[0]
+        filename = args.output
+        if not filename:
+            print("error: missing the output file, use -o FILE")
+            sys.exit(1)
+    else:
+        entry, separator, filename = args.entries[0].partition("=")
+        if not separator or not os.path.isfile(filename):
+            print(f"error: use ENTRY=FILE with an existing file, not {args.entries[0]}")
+            sys.exit(1)
+    try:
+        device.connect()
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        logging.debug(err)
+        print("I can't connect to the device")
+        sys.exit(1)
+
+    try:
+        index, subindex = device.parse_entry(entry)
+        if args.command == "read-domain":
+            transfer = device.read_domain(index, subindex, filename)
+        else:
+            transfer = device.write_domain(index, subindex, filename)
+        # closed before the disconnect, so that an interrupt aborts the transfer
+        with contextlib.closing(transfer), tqdm(unit="B", unit_scale=True) as pbar:
+            for done, total in transfer:
+                pbar.total = total
+                pbar.update(done - pbar.n)
+        if args.command == "write-domain" and args.save:
+            device.save()
+            print("saved")
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        print(f"error: {err}")
+        sys.exit(1)
+    finally:
+        device.disconnect()
+        save_metrics(args, device.get_metrics())
+    sys.exit(0)
+
+
+def find_eds(directory: str) -> str:
+    """
+    function to get the .EDS file of a directory, empty if there is not a
+    single one
+    """
+    eds_files = [x for x in os.listdir(directory) if x.endswith(".EDS")]
+    return eds_files[0] if len(eds_files) == 1 else ""
 
 
 def main():
@@ -33,29 +562,186 @@ def main():
     """
     parser = argparse.ArgumentParser()
     parser.add_argument(
-        "command", choices=["upload", "download", "save", "default"], nargs="?"
+        "command",
+        choices=[
+            "upload",
+            "download",
+            "save",
+            "default",
+            "simulate",
+            "monitor",
+            "read",
+            "write",
+            "read-domain",
+            "write-domain",
+            "flash",
+        ],
+        nargs="?",
+    )
+    parser.add_argument(
+        "entries",
+        nargs="*",
+        metavar="ENTRY",
+        help="entry to monitor/read, INDEX[:SUBINDEX] in hex or name[:entry name]"
+        ", ENTRY=VALUE to write, ENTRY=FILE to write-domain, the firmware image"
+        " to flash",
     )
     parser.add_argument("-f", "--file", default="")
     parser.add_argument(
-        "--save", action="store_true", help="save request after download/default"
+        "-n",
+        "--nodes",
+        default="",
+        help="upload/download/simulate/flash several nodes, e.g. 1,2,10-20",
+    )
+    parser.add_argument(
+        "--fleet",
+        default="",
+        metavar="MANIFEST",
+        help="upload/download several buses at once, as listed in a TOML manifest",
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="save request after download/default/write/write-domain",
+    )
+    parser.add_argument(
+        "--diff",
+        action="store_true",
+        help="download only the entries that differ from the device",
+    )
+    parser.add_argument(
+        "--snapshot",
+        default="",
+        help="uploaded dcf to compare with instead of reading the device (--diff), "
+        "{nodeid} is replaced by the node id with --nodes/--fleet",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="read back the entries after download and write again the different ones",
+    )
+    parser.add_argument(
+        "--verify-attempts",
+        type=int,
+        default=2,
+        help="maximum number of rewrites of the different entries (--verify)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted upload/download from its journal",
+    )
+    parser.add_argument(
+        "--collect-aborts",
+        action="store_true",
+        help="upload the other entries when an entry is aborted, and list them",
+    )
+    parser.add_argument(
+        "--identity-cache",
+        action="store_true",
+        help="upload the read only values from the cache of the same device type",
+    )
+    parser.add_argument(
+        "--refresh-identity-cache",
+        action="store_true",
+        help="upload all the values and update the cache of the device type",
+    )
+    parser.add_argument(
+        "--metrics",
+        choices=METRICS_FORMATS,
+        help="write a summary of the SDO transfers at the end of upload/download",
+    )
+    parser.add_argument(
+        "--delay", type=float, default=0.0, help="simulated SDO response delay [ms]"
+    )
+    parser.add_argument(
+        "--heartbeat", type=int, default=1000, help="simulated heartbeat [ms]"
+    )
+    parser.add_argument(
+        "--abort",
+        action="append",
+        default=[],
+        metavar="INDEX[:SUBINDEX]",
+        help="simulated entry that always aborts (hex)",
+    )
+    parser.add_argument(
+        "--abort-rate",
+        type=float,
+        default=0.0,
+        help="probability of aborting any other simulated transfer",
+    )
+    parser.add_argument(
+        "--abort-code",
+        type=lambda x: int(x, 16),
+        default=0x08000000,
+        help="abort code of the simulated aborts (hex)",
+    )
+    parser.add_argument(
+        "--period", type=float, default=10.0, help="monitor sampling period [ms]"
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=0.0,
+        help="monitor duration [s], until Ctrl+C if 0",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="",
+        help="monitor/read/write output file, standard output if empty"
+        ", read-domain output file",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "csv"],
+        default="json",
+        help="read/write output format",
+    )
+    parser.add_argument(
+        "--tpdo",
+        type=int,
+        default=None,
+        help="TPDO borrowed by the monitor (from 1), a disabled one by default",
+    )
+    parser.add_argument(
+        "--sdo-polling",
+        action="store_true",
+        help="monitor with SDO requests instead of a TPDO",
+    )
+    parser.add_argument(
+        "--program",
+        type=int,
+        default=1,
+        help="program number (subindex of 0x1F50/0x1F51) to flash",
+    )
+    parser.add_argument(
+        "--software-id",
+        type=lambda text: int(text, 0),
+        default=None,
+        help="expected program software identification (0x1F56) after flash",
     )
     parser.add_argument("--version", action="version", version=VERSION)
     parser.add_argument("--debug", action="store_true", help=argparse.SUPPRESS)
     parser.add_argument("--info", action="store_true", help=argparse.SUPPRESS)
     args = parser.parse_args()
+    if args.entries and args.command not in [
+        "monitor",
+        "read",
+        "write",
+        "read-domain",
+        "write-domain",
+        "flash",
+    ]:
+        parser.error(f"unrecognized arguments: {' '.join(args.entries)}")
 
-    if args.info:
-        logging.basicConfig(level=logging.INFO)
-    elif args.debug:
-        logging.basicConfig(level=logging.DEBUG)
-    else:
+    if log_level(args) is None:
         logging.disable(logging.CRITICAL)
+    else:
+        logging.basicConfig(level=log_level(args))
 
-    eds_file = []
+    eds_file = None
     current_dir = os.getcwd()
-    for x in os.listdir(current_dir):
-        if x.endswith(".EDS"):
-            eds_file.append(x)
     toml_path = os.path.join(os.getcwd(), "config.toml")
     logging.info(toml_path)
     if os.path.exists(toml_path):
@@ -65,25 +751,61 @@ def main():
             except tomllib.TOMLDecodeError:
                 logging.info("not a valid TOML file")
             else:
-                eds_file = [toml_dict["object_dictionary"]["filename"]]
+                eds_file = toml_dict["object_dictionary"]["filename"]
                 ITF = toml_dict["can"]["interface"]
                 BAUD = int(toml_dict["can"]["baudrate"])
                 NID = int(toml_dict["can"]["nodeid"])
+                NMT_TIMEOUT = float(toml_dict["can"].get("nmt_timeout", 2))
+                CHANNEL = toml_dict["can"].get("channel")
+                SDO = toml_dict.get("sdo", {})
                 logging.info("%s | %s | %s | %s", eds_file, ITF, BAUD, NID)
     else:
         ITF = "peak"
         BAUD = 250
         NID = 1
+        NMT_TIMEOUT = 2
+        CHANNEL = None
+        SDO = {}
         logging.info("missing config.toml file")
 
-    if len(eds_file) == 1:
-        EDS = os.path.join(current_dir, eds_file[0])
-    else:
-        EDS = ""
     if args.file == "":
-        args.file = EDS
+        if eds_file is None:
+            eds_file = find_eds(current_dir)
+        args.file = os.path.join(current_dir, eds_file) if eds_file else ""
+
+    settings = {
+        "baudrate": BAUD,
+        "interface": ITF,
+        "nmt_timeout": NMT_TIMEOUT,
+        "block_transfer": bool(SDO.get("block_transfer", True)),
+        "block_size": int(SDO.get("block_size", 127)),
+        "channel": CHANNEL,
+        "sdo_policy": {key: SDO[key] for key in SDO_POLICY_KEYS if key in SDO},
+    }
+    from device import Device  # pylint: disable=import-outside-toplevel
+
+    device = Device(filename=args.file, nodeid=NID, **settings)
+    if args.fleet and args.command in ["upload", "download"]:
+        fleet(args, settings)
+
+    if args.nodes and args.command in ["upload", "download"]:
+        multi_node(args, settings)
+
+    if args.command == "simulate":
+        simulate(args, NID, settings)
+
+    if args.command == "monitor":
+        monitor(args, device)
+
+    if args.command in ["read", "write"]:
+        read_write(args, device)
+
+    if args.command in ["read-domain", "write-domain"]:
+        domain(args, device)
+
+    if args.command == "flash":
+        flash(args, NID, settings)
 
-    device = Device(filename=args.file, baudrate=BAUD, nodeid=NID, interface=ITF)
     if args.command == "upload":
         if not os.path.isfile(args.file):
             print(f"{args.file} does not exist")
@@ -95,19 +817,35 @@ def main():
             print("I can't connect to the device")
             sys.exit(1)
 
+        from tqdm import tqdm  # pylint: disable=import-outside-toplevel
+
         print("uploading from the device...")
-        iteration = device.get_objdict_elements(args.file)
+        device.set_identity_cache(
+            args.identity_cache or args.refresh_identity_cache,
+            args.refresh_identity_cache,
+        )
+        iteration = device.get_objdict_elements(args.file, upload=True)
         try:
             with tqdm(total=iteration) as pbar:
-                for _ in device.upload_dcf(True):
+                for _ in device.upload_dcf(
+                    True, resume=args.resume, collect_aborts=args.collect_aborts
+                ):
                     pbar.update(1)
         except Exception as err:  # pylint: disable=broad-exception-caught
             print(f"error: {err}")
+            if os.path.isfile(device.get_upload_journal()):
+                print("use --resume to continue the upload")
             sys.exit(1)
         else:
+            if args.identity_cache:
+                hits = device.get_identity_cache_hits()
+                print(f"{hits} values from the identity cache")
+            if args.collect_aborts:
+                print_aborts(device.get_upload_aborts())
             sys.exit(0)
         finally:
             device.disconnect()
+            save_metrics(args, device.get_metrics())
 
     if args.command == "download":
         if not os.path.isfile(args.file):
@@ -120,16 +858,32 @@ def main():
             print("I can't connect to the device")
             sys.exit(1)
 
+        from tqdm import tqdm  # pylint: disable=import-outside-toplevel
+
         print("downloading to the device...")
         iteration = device.get_objdict_elements(args.file)
         try:
             with tqdm(total=iteration) as pbar:
-                for _ in device.download_dcf(args.file, True):
+                for _ in device.download_dcf(
+                    args.file,
+                    True,
+                    diff=args.diff,
+                    snapshot=args.snapshot,
+                    resume=args.resume,
+                    verify=args.verify,
+                    verify_attempts=args.verify_attempts,
+                ):
                     pbar.update(1)
         except Exception as err:  # pylint: disable=broad-exception-caught
             print(f"error: {err}")
+            if device.get_verify_mismatches():
+                report_mismatches(device.get_verify_mismatches(), NID)
+            if os.path.isfile(device.get_download_journal()):
+                print("use --resume to continue the download")
             sys.exit(1)
         else:
+            if args.diff:
+                print(f"{device.get_skipped_writes()} writes skipped")
             if args.save:
                 device.save()
                 print("saved")
@@ -138,6 +892,7 @@ def main():
             sys.exit(0)
         finally:
             device.disconnect()
+            save_metrics(args, device.get_metrics())
 
     if args.command == "save":
         try:
@@ -186,6 +941,10 @@ def main():
             device.disconnect()
 
     if args.command is None:
+        import platform  # pylint: disable=import-outside-toplevel
+        import tkinter as tk  # pylint: disable=import-outside-toplevel
+        from gui import Gui  # pylint: disable=import-outside-toplevel
+
         window = tk.Tk()
         root_path = os.path.dirname(__file__)
         if not (getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS")):
@@ -207,6 +966,11 @@ def main():
 
 
 if __name__ == "__main__":
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+
+        # the fleet processes of the binary start from here
+        multiprocessing.freeze_support()
     try:
         main()
     except Exception as err: